@@ -0,0 +1,142 @@
+"""Adaptive batch sizing for LLM filter calls.
+
+Batch sizes are tuned per model with additive-increase / multiplicative-decrease:
+a batch that parses and returns within the latency target grows the next batch,
+a malformed reply halves it. Latency, token usage and parse success are tracked
+per model so the sizes (and their cost) can be reported.
+
+A question the model cannot answer fails at any batch size, so failures are
+counted per question: each question halves the size at most once until one of
+its batches parses again, and one such question cannot shrink the batches of
+every other filter on the model.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+from config import FILTER_BATCH_SIZE, FILTER_MAX_BATCH_SIZE, FILTER_MIN_BATCH_SIZE, FILTER_TARGET_LATENCY
+
+
+# Questions with a pending failure remembered per model
+_FAILING_QUESTIONS = 256
+
+
+class _ModelState:
+    __slots__ = ("size", "calls", "failures", "numbers", "tokens", "latency", "ewma_latency", "failing")
+
+    def __init__(self, size):
+        self.size = size
+        self.calls = 0
+        self.failures = 0
+        self.numbers = 0
+        self.tokens = 0
+        self.latency = 0.0
+        self.ewma_latency = None
+        # Questions whose last batch failed and already halved the size
+        self.failing = OrderedDict()
+
+
+class AdaptiveBatchSizer:
+    """Chooses filter batch sizes per model from observed latency, tokens and parse success."""
+
+    def __init__(self, initial=FILTER_BATCH_SIZE, minimum=FILTER_MIN_BATCH_SIZE,
+                 maximum=FILTER_MAX_BATCH_SIZE, target_latency=FILTER_TARGET_LATENCY):
+        """
+        Initialize the sizer.
+
+        Args:
+            initial: Starting batch size for a model
+            minimum: Smallest batch size
+            maximum: Largest batch size
+            target_latency: Latency (seconds) a batch may take before sizes stop growing
+        """
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _state(self, model):
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState(self.initial)
+        return state
+
+    def plan(self, model, count):
+        """
+        Split ``count`` numbers into evenly sized batches.
+
+        Returns:
+            list: Batch sizes summing to ``count``
+        """
+        if count <= 0:
+            return []
+        with self._lock:
+            size = self._state(model).size
+        batches = math.ceil(count / size)
+        base, extra = divmod(count, batches)
+        return [base + 1] * extra + [base] * (batches - extra)
+
+    def expected_latency(self, model):
+        """Return the smoothed latency of the model's batch calls, or 0 if unknown."""
+        with self._lock:
+            state = self._models.get(model)
+            if state is None or state.ewma_latency is None:
+                return 0.0
+            return state.ewma_latency
+
+    def record(self, model, batch_size, latency, tokens, success, question=None):
+        """
+        Record the outcome of one batch call and adjust the model's batch size.
+
+        Args:
+            model: Model name
+            batch_size: Numbers in the batch
+            latency: Call latency in seconds
+            tokens: Total tokens used by the call (0 if unknown)
+            success: Whether the reply parsed
+            question: Question of the batch; repeated failures of one question halve the size once
+        """
+        with self._lock:
+            state = self._state(model)
+            state.calls += 1
+            state.numbers += batch_size
+            state.tokens += tokens
+            state.latency += latency
+            if state.ewma_latency is None:
+                state.ewma_latency = latency
+            else:
+                state.ewma_latency = 0.8 * state.ewma_latency + 0.2 * latency
+            if not success:
+                state.failures += 1
+                if question is None or question not in state.failing:
+                    state.size = max(self.minimum, state.size // 2)
+                if question is not None:
+                    state.failing[question] = True
+                    state.failing.move_to_end(question)
+                    if len(state.failing) > _FAILING_QUESTIONS:
+                        state.failing.popitem(last=False)
+                return
+            state.failing.pop(question, None)
+            if batch_size * 2 > state.size and state.ewma_latency < self.target_latency:
+                state.size = min(self.maximum, state.size + max(1, state.size // 4))
+            elif state.ewma_latency > self.target_latency * 1.5:
+                state.size = max(self.minimum, int(state.size * 0.75))
+
+    def get_stats(self):
+        """Return per-model batch size, latency, token and success statistics."""
+        with self._lock:
+            stats = {}
+            for model, state in self._models.items():
+                calls = state.calls or 1
+                stats[model] = {
+                    "batch_size": state.size,
+                    "calls": state.calls,
+                    "parse_success_rate": (state.calls - state.failures) / calls if state.calls else None,
+                    "avg_latency": state.latency / calls,
+                    "avg_tokens_per_call": state.tokens / calls,
+                    "tokens_per_number": state.tokens / state.numbers if state.numbers else None,
+                }
+            return stats
@@ -42,6 +42,23 @@ class AskQuestionResponse(BaseModel):
     game_state: Literal["asking", "guess_only", "won", "lost"]
 
 
+class PreviewRequest(BaseModel):
+    question: str = Field(min_length=1, max_length=500)
+
+
+class PreviewResponse(BaseModel):
+    question: str
+    possible_count: int
+    yes_count: int
+    no_count: int
+    unresolved_count: int
+
+
+class HintResponse(BaseModel):
+    question: Optional[str]
+    possible_count: int
+
+
 class MakeGuessRequest(BaseModel):
     guess: int
 
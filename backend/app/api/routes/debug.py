@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+
+from backend.app.core.dependencies import get_profiler
+from tracing import tracer
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+
+@router.get("/traces")
+def get_traces(
+    limit: int = Query(50, ge=1, le=1000),
+    min_duration_ms: float = Query(0, ge=0),
+    name: Optional[str] = None,
+):
+    return {
+        "stats": tracer.get_stats(),
+        "traces": tracer.traces(limit=limit, min_duration=min_duration_ms / 1000, name=name),
+    }
+
+
+@router.delete("/traces")
+def clear_traces():
+    tracer.clear()
+    return tracer.get_stats()
+
+
+@router.get("/profiler")
+def get_profiler_stats():
+    return get_profiler().get_stats()
+
+
+@router.post("/profiler/start")
+def start_profiler(
+    interval_ms: Optional[float] = Query(None, gt=0),
+    duration_s: Optional[float] = Query(None, gt=0),
+    reset: bool = True,
+):
+    profiler = get_profiler()
+    if reset and not profiler.running:
+        profiler.reset()
+    profiler.start(interval=None if interval_ms is None else interval_ms / 1000, duration=duration_s)
+    return profiler.get_stats()
+
+
+@router.post("/profiler/stop")
+def stop_profiler():
+    profiler = get_profiler()
+    profiler.stop()
+    return profiler.get_stats()
+
+
+@router.get("/profiler/stacks", response_class=PlainTextResponse)
+def get_profiler_stacks():
+    # Collapsed stacks ("frame;frame;frame count" per line) for flamegraph.pl / speedscope
+    return PlainTextResponse(get_profiler().collapsed())
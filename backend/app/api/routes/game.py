@@ -1,27 +1,42 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+import math
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
 
 from backend.app.api.models import (
     AskQuestionRequest,
     AskQuestionResponse,
     EndGameResponse,
     GameStatusResponse,
+    HintResponse,
     MakeGuessRequest,
     MakeGuessResponse,
+    PreviewRequest,
+    PreviewResponse,
     StartGameResponse,
 )
 from backend.app.core.dependencies import get_game_service, get_scoring, get_session_manager
 
-from config import MAX_QUESTIONS
+from circuit_breaker import CircuitOpenError
+from config import MAX_QUESTIONS, REQUEST_DEADLINE_SECONDS
+from deadline import Deadline, DeadlineExceeded
+from tracing import span
 
 router = APIRouter(prefix="/api/game", tags=["game"])
 
 
+def _unavailable(error: CircuitOpenError) -> HTTPException:
+    retry_after = max(1, math.ceil(error.retry_after))
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(retry_after)})
+
+
 @router.post("/start", response_model=StartGameResponse)
-def start_game():
+def start_game(x_game_shard: Optional[int] = Header(None, ge=0)):
+    # In the sharded deployment the dispatcher picks the shard the new game lives on
     game_service = get_game_service()
-    session = game_service.start_game(max_guesses=3)
+    session = game_service.start_game(max_guesses=3, shard=x_game_shard)
     return StartGameResponse(
         game_id=session.game_id,
         secret_number_set=True,
@@ -58,6 +73,12 @@ def get_status(game_id: str):
 
 @router.post("/{game_id}/question", response_model=AskQuestionResponse)
 def ask_question(game_id: str, payload: AskQuestionRequest):
+    with span("POST /api/game/{game_id}/question", game_id=game_id, question=payload.question):
+        return _ask_question(game_id, payload)
+
+
+def _ask_question(game_id: str, payload: AskQuestionRequest) -> AskQuestionResponse:
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS)
     sessions = get_session_manager()
     session = sessions.get_session(game_id)
     if not session:
@@ -65,9 +86,13 @@ def ask_question(game_id: str, payload: AskQuestionRequest):
 
     game_service = get_game_service()
     try:
-        answer = game_service.ask_question(session, payload.question)
+        answer = game_service.ask_question(session, payload.question, deadline=deadline)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e)) from e
+    except CircuitOpenError as e:
+        raise _unavailable(e) from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to determine answer: {e}") from e
 
@@ -82,6 +107,51 @@ def ask_question(game_id: str, payload: AskQuestionRequest):
     )
 
 
+@router.post("/{game_id}/preview", response_model=PreviewResponse)
+def preview_question(game_id: str, payload: PreviewRequest):
+    with span("POST /api/game/{game_id}/preview", game_id=game_id, question=payload.question):
+        return _preview_question(game_id, payload)
+
+
+def _preview_question(game_id: str, payload: PreviewRequest) -> PreviewResponse:
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS)
+    sessions = get_session_manager()
+    session = sessions.get_session(game_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Game session not found.")
+
+    game_service = get_game_service()
+    try:
+        preview = game_service.preview_question(session, payload.question, deadline=deadline)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e)) from e
+    except CircuitOpenError as e:
+        raise _unavailable(e) from e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to preview question: {e}") from e
+
+    return PreviewResponse(question=payload.question, **preview)
+
+
+@router.get("/{game_id}/hint", response_model=HintResponse)
+def get_hint(game_id: str):
+    sessions = get_session_manager()
+    session = sessions.get_session(game_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Game session not found.")
+
+    game_service = get_game_service()
+    try:
+        question = game_service.hint(session)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return HintResponse(question=question, possible_count=session.engine.get_possible_count())
+
+
 @router.post("/{game_id}/guess", response_model=MakeGuessResponse)
 def make_guess(game_id: str, payload: MakeGuessRequest):
     sessions = get_session_manager()
@@ -113,16 +183,33 @@ def make_guess(game_id: str, payload: MakeGuessRequest):
 
 @router.post("/{game_id}/end", response_model=EndGameResponse)
 def end_game(game_id: str):
+    with span("POST /api/game/{game_id}/end", game_id=game_id):
+        return _end_game(game_id)
+
+
+def _end_game(game_id: str) -> EndGameResponse:
     sessions = get_session_manager()
     session = sessions.get_session(game_id)
     if not session:
         raise HTTPException(status_code=404, detail="Game session not found.")
 
+    # An ended game is over: its result (and secret) is recorded, so it can no longer be guessed
+    session.game_over = True
     # Record stats once
     scoring = get_scoring()
     if not session.stats_recorded:
-        scoring.record_game(session.won, session.engine.question_count, mode=2)
+        scoring.record_game(
+            session.won,
+            session.engine.question_count,
+            mode=2,
+            qa_history=session.engine.qa_history,
+            guesses_used=session.guess_attempts,
+            secret_number=session.secret_number,
+            game_id=session.game_id,
+        )
         session.stats_recorded = True
+        sessions.log_event(session, "end")
+    get_game_service().end_game(session)
 
     return EndGameResponse(won=session.won, questions_asked=session.engine.question_count, game_over=session.game_over)
 
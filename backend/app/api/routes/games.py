@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from backend.app.core.dependencies import get_scoring
+
+from config import GAME_EXPORT_MAX_LIMIT
+from game_results import GameResultLog
+
+router = APIRouter(prefix="/api/games", tags=["games"])
+
+# Lines are sent in chunks of about this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+@router.get("/export")
+def export_games(
+    cursor: int = Query(0, ge=0, description="Byte offset from a previous export (0 = from the beginning)"),
+    since: Optional[float] = Query(None, description="Only games finished at or after this Unix time"),
+    until: Optional[float] = Query(None, description="Only games finished before this Unix time"),
+    limit: int = Query(GAME_EXPORT_MAX_LIMIT, ge=1, le=GAME_EXPORT_MAX_LIMIT),
+):
+    """Stream finished games as NDJSON.
+
+    Every line carries a ``cursor``; pass the last one received to resume after it.
+    """
+    results = get_scoring().results
+    if results is None:
+        raise HTTPException(status_code=404, detail="Per-game results are not recorded (GAME_RESULTS_FILE is empty).")
+    if cursor > results.size():
+        raise HTTPException(status_code=400, detail="Cursor is past the end of the results log.")
+    # A sync iterator: Starlette runs it in the threadpool, off the event loop.
+    return StreamingResponse(
+        _ndjson(results, cursor, since, until, limit),
+        media_type="application/x-ndjson",
+    )
+
+
+def _ndjson(
+    results: GameResultLog, cursor: int, since: Optional[float], until: Optional[float], limit: int
+) -> Iterator[bytes]:
+    chunk = bytearray()
+    for line, next_cursor in results.read(cursor, since=since, until=until, limit=limit):
+        # Splice the cursor into the stored line instead of re-encoding the record
+        chunk += line[:-2] + b',"cursor":%d}\n' % next_cursor
+        if len(chunk) >= EXPORT_CHUNK_BYTES:
+            yield bytes(chunk)
+            chunk.clear()
+    if chunk:
+        yield bytes(chunk)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path
+from pydantic import BaseModel
+
+from backend.app.core.dependencies import get_game_service
+from backend.app.core.sharding import SECRET_HEADER, secret_matches
+
+from config import SHARD_COUNT, SHARD_SECRET
+
+
+def _require_shard_secret(secret: Optional[str] = Header(None, alias=SECRET_HEADER)) -> None:
+    # These endpoints expose secret numbers and can rewrite sessions.
+    if not secret_matches(secret, SHARD_SECRET):
+        raise HTTPException(status_code=403, detail="Shard secret missing or invalid.")
+
+
+# Session migration between workers, driven by the dispatcher during a rebalance.
+# Only mounted on workers of a sharded deployment (SHARD_WORKER_ENABLED=1).
+router = APIRouter(
+    prefix="/api/internal/shards", tags=["shards"], dependencies=[Depends(_require_shard_secret)]
+)
+
+
+class ShardSessions(BaseModel):
+    sessions: List[dict]
+
+
+@router.get("/{shard}/sessions")
+def export_shard(shard: int = Path(ge=0, lt=SHARD_COUNT)):
+    return {"shard": shard, "sessions": get_game_service().export_shard(shard, SHARD_COUNT)}
+
+
+@router.post("/{shard}/sessions")
+def import_shard(payload: ShardSessions, shard: int = Path(ge=0, lt=SHARD_COUNT)):
+    return {"shard": shard, "imported": get_game_service().import_sessions(payload.sessions)}
+
+
+@router.delete("/{shard}/sessions")
+def drop_shard(shard: int = Path(ge=0, lt=SHARD_COUNT)):
+    return {"shard": shard, "dropped": get_game_service().drop_shard(shard, SHARD_COUNT)}
@@ -2,7 +2,13 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from backend.app.core.dependencies import get_scoring
+from backend.app.core.dependencies import (
+    get_admission_controller,
+    get_llm_service,
+    get_prefetcher,
+    get_scoring,
+    get_session_manager,
+)
 
 router = APIRouter(prefix="/api", tags=["stats"])
 
@@ -13,3 +19,25 @@ def get_stats():
     return scoring.get_stats()
 
 
+@router.get("/stats/llm")
+def get_llm_stats():
+    llm_service = get_llm_service()
+    return llm_service.get_stats()
+
+
+@router.get("/stats/admission")
+def get_admission_stats():
+    admission = get_admission_controller()
+    return admission.get_stats()
+
+
+@router.get("/stats/sessions")
+def get_session_stats():
+    sessions = get_session_manager()
+    return sessions.get_stats()
+
+
+@router.get("/stats/prefetch")
+def get_prefetch_stats():
+    prefetcher = get_prefetcher()
+    return prefetcher.get_stats() if prefetcher is not None else {"enabled": False}
@@ -0,0 +1,154 @@
+"""Admission control for endpoints that fan out to LLM calls.
+
+Each request to an LLM-bound endpoint must pass, in order:
+
+- a token bucket for its client (IP address),
+- a token bucket for the game it targets,
+- a global cap on in-flight LLM requests, with a bounded wait queue.
+
+Requests that fail a check are rejected immediately with 429 and a Retry-After
+hint instead of queueing up work the upstream quota cannot serve.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self) -> Tuple[bool, float]:
+        """Take one token; return (admitted, seconds until a token is available)."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+@dataclass
+class Rejection:
+    reason: str
+    retry_after: float
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class _BucketMap:
+    """LRU-capped map of token buckets so idle clients do not accumulate."""
+
+    def __init__(self, rate: float, capacity: float, max_entries: int = 10_000):
+        self._rate = rate
+        self._capacity = capacity
+        self._max_entries = max_entries
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def try_acquire(self, key: str) -> Tuple[bool, float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self._rate, self._capacity)
+            while len(self._buckets) > self._max_entries:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.try_acquire()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        client_rate: float,
+        client_burst: float,
+        game_rate: float,
+        game_burst: float,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+    ):
+        self._client_buckets = _BucketMap(client_rate, client_burst)
+        self._game_buckets = _BucketMap(game_rate, game_burst)
+        self._max_in_flight = max_in_flight
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._queued = 0
+        self._stats: Dict[str, int] = {
+            "admitted": 0,
+            "rejected_client_rate": 0,
+            "rejected_game_rate": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "max_queue_depth": 0,
+        }
+
+    def _reject_locked(self, reason: str, retry_after: float) -> Rejection:
+        self._stats[f"rejected_{reason}"] += 1
+        return Rejection(reason=reason, retry_after=retry_after)
+
+    def check_rate(self, client_id: str, game_id: Optional[str]) -> Optional[Rejection]:
+        """Apply the per-client and per-game token buckets."""
+        with self._lock:
+            ok, wait = self._client_buckets.try_acquire(client_id)
+            if not ok:
+                return self._reject_locked("client_rate", wait)
+            if game_id is not None:
+                ok, wait = self._game_buckets.try_acquire(game_id)
+                if not ok:
+                    return self._reject_locked("game_rate", wait)
+        return None
+
+    async def acquire_slot(self) -> Optional[Rejection]:
+        """Wait (bounded) for an in-flight slot; the caller must call release_slot on success."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+        with self._lock:
+            if self._slots.locked() and self._queued >= self._max_queue:
+                return self._reject_locked("queue_full", self._queue_timeout)
+            self._queued += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._queued)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self._queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                return self._reject_locked("queue_timeout", self._queue_timeout)
+        finally:
+            with self._lock:
+                self._queued -= 1
+        with self._lock:
+            self._in_flight += 1
+            self._stats["admitted"] += 1
+        return None
+
+    def release_slot(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._in_flight
+            stats["queue_depth"] = self._queued
+        stats["max_in_flight"] = self._max_in_flight
+        stats["max_queue"] = self._max_queue
+        return stats
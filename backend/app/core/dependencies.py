@@ -3,27 +3,82 @@
 from __future__ import annotations
 
 from functools import lru_cache
+from typing import Optional
 
 from llm_service import LLMService
+from profiler import SamplingProfiler
+from question_prefetch import Prefetcher
 from scoring import Scoring
+from solver import DecisionTreeSolver, load_solver
+from truth_table import TruthTableStore, load_truth_table
 
+from config import (
+    ADMISSION_CLIENT_BURST,
+    ADMISSION_CLIENT_RATE,
+    ADMISSION_GAME_BURST,
+    ADMISSION_GAME_RATE,
+    ADMISSION_MAX_IN_FLIGHT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    MAX_SESSIONS,
+    PREFETCH_ENABLED,
+    SESSION_JOURNAL_BATCH_SIZE,
+    SESSION_JOURNAL_DIR,
+    SESSION_JOURNAL_FLUSH_INTERVAL,
+    SESSION_JOURNAL_FSYNC,
+    SESSION_JOURNAL_SNAPSHOT_EVERY,
+    SESSION_MEMORY_BUDGET_BYTES,
+    SOLVER_HINTS,
+)
+
+from backend.app.core.admission import AdmissionController
 from backend.app.services.game_service import GameService
+from backend.app.services.session_journal import SessionJournal
 from backend.app.services.session_manager import SessionManager
 
 
 @lru_cache(maxsize=1)
 def get_session_manager() -> SessionManager:
-    return SessionManager(ttl_seconds=60 * 60)
+    journal = None
+    if SESSION_JOURNAL_DIR:
+        journal = SessionJournal(
+            SESSION_JOURNAL_DIR,
+            flush_interval=SESSION_JOURNAL_FLUSH_INTERVAL,
+            batch_size=SESSION_JOURNAL_BATCH_SIZE,
+            snapshot_every=SESSION_JOURNAL_SNAPSHOT_EVERY,
+            fsync=SESSION_JOURNAL_FSYNC,
+        )
+    return SessionManager(
+        ttl_seconds=60 * 60,
+        max_sessions=MAX_SESSIONS,
+        memory_budget_bytes=SESSION_MEMORY_BUDGET_BYTES,
+        journal=journal,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_truth_table() -> Optional[TruthTableStore]:
+    return load_truth_table()
 
 
 @lru_cache(maxsize=1)
 def get_llm_service() -> LLMService:
-    return LLMService()
+    return LLMService(truth_table=get_truth_table())
+
+
+@lru_cache(maxsize=1)
+def get_solver() -> Optional[DecisionTreeSolver]:
+    return load_solver() if SOLVER_HINTS else None
 
 
 @lru_cache(maxsize=1)
 def get_game_service() -> GameService:
-    return GameService(get_session_manager(), get_llm_service())
+    return GameService(get_session_manager(), get_llm_service(), prefetcher=get_prefetcher(), solver=get_solver())
+
+
+@lru_cache(maxsize=1)
+def get_prefetcher() -> Optional[Prefetcher]:
+    return Prefetcher() if PREFETCH_ENABLED else None
 
 
 @lru_cache(maxsize=1)
@@ -31,3 +86,19 @@ def get_scoring() -> Scoring:
     return Scoring()
 
 
+@lru_cache(maxsize=1)
+def get_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        client_rate=ADMISSION_CLIENT_RATE,
+        client_burst=ADMISSION_CLIENT_BURST,
+        game_rate=ADMISSION_GAME_RATE,
+        game_burst=ADMISSION_GAME_BURST,
+        max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+        max_queue=ADMISSION_MAX_QUEUE,
+        queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_profiler() -> SamplingProfiler:
+    return SamplingProfiler()
@@ -0,0 +1,89 @@
+"""Shard ids in game ids and the consistent-hash ring assigning shards to workers.
+
+In the sharded deployment a game id starts with its shard (``s1f-<uuid>``), so
+any process can tell which shard a game lives on without a lookup. Shards, not
+games, are placed on workers with a consistent-hash ring: adding or removing a
+worker only moves the shards whose ring position changes owner, and a moved
+shard's sessions can be enumerated and migrated as a unit.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import hmac
+import re
+import uuid
+from typing import Iterable, List, Optional
+
+from config import SHARD_VNODES
+
+SHARDED_GAME_ID = re.compile(r"^s(?P<shard>[0-9a-f]+)-")
+# Carries SHARD_SECRET on migration and rebalance requests
+SECRET_HEADER = "X-Shard-Secret"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def secret_matches(provided: Optional[str], secret: str) -> bool:
+    """Return True if ``provided`` is the shard secret (never when no secret is configured)."""
+    return bool(secret) and provided is not None and hmac.compare_digest(provided.encode(), secret.encode())
+
+
+def new_game_id(shard: Optional[int] = None) -> str:
+    """Return a fresh game id, prefixed with its shard when one is given."""
+    game_id = str(uuid.uuid4())
+    return game_id if shard is None else f"s{shard:x}-{game_id}"
+
+
+def shard_of(game_id: str, shard_count: int) -> int:
+    """Return the shard of a game id (unprefixed ids from unsharded workers are hashed)."""
+    match = SHARDED_GAME_ID.match(game_id)
+    if match is not None:
+        return int(match.group("shard"), 16) % shard_count
+    return _hash(game_id) % shard_count
+
+
+class HashRing:
+    """Consistent-hash ring with ``vnodes`` points per node."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = SHARD_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node: str) -> None:
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def node_for(self, key: str) -> str:
+        """Return the node owning ``key`` (the first ring point clockwise from its hash)."""
+        if not self._points:
+            raise ValueError("Hash ring has no nodes.")
+        index = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+
+def assign_shards(nodes: Iterable[str], shard_count: int, vnodes: int = SHARD_VNODES) -> List[str]:
+    """Return the owning node of every shard, indexed by shard."""
+    ring = HashRing(nodes, vnodes)
+    return [ring.node_for(f"shard-{shard}") for shard in range(shard_count)]
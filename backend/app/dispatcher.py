@@ -0,0 +1,304 @@
+"""Front dispatcher for the sharded deployment.
+
+Sessions live in the memory of the worker process that created them, so
+running several ordinary API workers behind a plain load balancer would send
+requests to workers that do not know the game. In the sharded deployment each
+worker owns a set of shards (see backend/app/core/sharding.py) and this
+dispatcher forwards every ``/api/game/{game_id}/...`` request to the owner of
+the game's shard. New games are spread round-robin over the shards.
+
+Adding or removing workers (``POST /api/shards/rebalance``) moves only the
+shards whose owner changes on the hash ring; their sessions are copied to the
+new owner while requests for the shard are held back.
+
+Run the dispatcher and its workers with::
+
+    python -m backend.app.dispatcher --workers 4 --port 8000
+
+or start the workers yourself (with ``SHARD_WORKER_ENABLED=1``) and run
+``uvicorn --factory backend.app.dispatcher:create_app`` with ``SHARD_WORKERS``
+listing their URLs; give all of them the same ``SHARD_SECRET``. Rebalancing
+requires that secret in the ``X-Shard-Secret`` header, and the workers'
+``/api/internal`` endpoints are never forwarded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import re
+import secrets
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from pydantic import BaseModel
+
+from backend.app.core.sharding import SECRET_HEADER, assign_shards, secret_matches, shard_of
+
+from config import SHARD_COUNT, SHARD_PROXY_TIMEOUT, SHARD_SECRET, SHARD_VNODES, SHARD_WORKERS
+
+GAME_PATH = re.compile(r"^/api/game/(?P<game_id>[^/]+)")
+# Worker-to-dispatcher endpoints, never reachable through the proxy
+INTERNAL_PATH = "/api/internal/"
+START_PATH = "/api/game/start"
+SHARD_HEADER = "X-Game-Shard"
+
+# Connection-level headers are not forwarded (RFC 9110, section 7.6.1); the
+# body is re-framed, so its length and encoding are recomputed as well.
+HOP_BY_HOP = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+    "content-length",
+    "content-encoding",
+}
+
+
+class ShardRouter:
+    """Shard ownership, request routing and shard migration."""
+
+    def __init__(
+        self, workers: List[str], shard_count: int = SHARD_COUNT, vnodes: int = SHARD_VNODES, secret: str = SHARD_SECRET
+    ):
+        if not workers:
+            raise ValueError("The sharded deployment needs at least one worker (set SHARD_WORKERS).")
+        self.secret = secret
+        self.shard_count = shard_count
+        self.vnodes = vnodes
+        self.workers = list(workers)
+        self.owners = assign_shards(self.workers, shard_count, vnodes)
+        self._next_shard = itertools.count()
+        self._in_flight = [0] * shard_count
+        # shard -> event set when its migration is over
+        self._migrating: Dict[int, asyncio.Event] = {}
+        self._rebalance_lock = asyncio.Lock()
+        self.stats = {
+            "forwarded": 0,
+            "upstream_errors": 0,
+            "held_for_migration": 0,
+            "rebalances": 0,
+            "moved_shards": 0,
+            "moved_sessions": 0,
+            "failed_moves": 0,
+            "migration_seconds": 0.0,
+        }
+
+    def shard_for(self, path: str) -> Optional[int]:
+        """Return the shard a request path belongs to, a fresh one for new games, or None."""
+        if path == START_PATH:
+            return next(self._next_shard) % self.shard_count
+        match = GAME_PATH.match(path)
+        return shard_of(match.group("game_id"), self.shard_count) if match else None
+
+    async def enter(self, shard: int) -> None:
+        """Wait until the shard is not migrating and count the request as in flight."""
+        while shard in self._migrating:
+            self.stats["held_for_migration"] += 1
+            await self._migrating[shard].wait()
+        self._in_flight[shard] += 1
+
+    def leave(self, shard: int) -> None:
+        self._in_flight[shard] -= 1
+
+    async def rebalance(self, workers: List[str], client: httpx.AsyncClient) -> dict:
+        """
+        Move shards to match a new worker list.
+
+        Each moved shard is held (new requests wait, in-flight ones finish),
+        its sessions are exported from the old owner, imported by the new one
+        and then dropped from the old one. A shard whose export or import
+        fails stays with its old owner.
+
+        Returns:
+            dict: Moved shards and sessions, and the shards that could not be moved
+        """
+        if not workers:
+            raise ValueError("Cannot rebalance to an empty worker list.")
+        async with self._rebalance_lock:
+            started = time.monotonic()
+            target_owners = assign_shards(workers, self.shard_count, self.vnodes)
+            moved_sessions = 0
+            moved, failed = [], []
+            for shard, target in enumerate(target_owners):
+                source = self.owners[shard]
+                if source == target:
+                    continue
+                self._migrating[shard] = asyncio.Event()
+                try:
+                    while self._in_flight[shard]:
+                        await asyncio.sleep(0.005)
+                    moved_sessions += await self._migrate(client, shard, source, target)
+                    self.owners[shard] = target
+                    moved.append(shard)
+                except httpx.HTTPError as e:
+                    print(f"Warning: Could not move shard {shard} from {source} to {target}: {e}")
+                    failed.append(shard)
+                finally:
+                    self._migrating.pop(shard).set()
+            # Workers that failed to take their shards get no other traffic either
+            owning = set(self.owners)
+            self.workers = [w for w in dict.fromkeys(list(workers) + self.workers) if w in owning]
+            self.stats["rebalances"] += 1
+            self.stats["moved_shards"] += len(moved)
+            self.stats["moved_sessions"] += moved_sessions
+            self.stats["failed_moves"] += len(failed)
+            self.stats["migration_seconds"] += time.monotonic() - started
+            return {"moved_shards": len(moved), "moved_sessions": moved_sessions, "failed_shards": failed}
+
+    async def _migrate(self, client: httpx.AsyncClient, shard: int, source: str, target: str) -> int:
+        url = f"{INTERNAL_PATH}shards/{shard}/sessions"
+        headers = {SECRET_HEADER: self.secret}
+        response = await client.get(source + url, headers=headers)
+        response.raise_for_status()
+        sessions = response.json()["sessions"]
+        # Posted even when empty, so a shard is never handed to a worker that cannot take it
+        response = await client.post(target + url, json={"sessions": sessions}, headers=headers)
+        response.raise_for_status()
+        try:
+            (await client.delete(source + url, headers=headers)).raise_for_status()
+        except httpx.HTTPError as e:
+            # Requests now go to the new owner; the old copies just expire
+            print(f"Warning: Could not drop shard {shard} from {source}: {e}")
+        return len(sessions)
+
+    def get_stats(self) -> dict:
+        shards = Counter(self.owners)
+        return {
+            **self.stats,
+            "shard_count": self.shard_count,
+            "workers": {worker: shards.get(worker, 0) for worker in self.workers},
+            "in_flight": sum(self._in_flight),
+            "migrating": len(self._migrating),
+        }
+
+
+class RebalanceRequest(BaseModel):
+    workers: List[str]
+
+
+def create_app(workers: Optional[List[str]] = None, secret: str = SHARD_SECRET) -> FastAPI:
+    shards = ShardRouter(workers or SHARD_WORKERS, secret=secret)
+    client = httpx.AsyncClient(timeout=SHARD_PROXY_TIMEOUT)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await client.aclose()
+
+    app = FastAPI(title="Math Guessing Game Dispatcher", version="0.1.0", lifespan=lifespan)
+    round_robin = itertools.count()
+
+    @app.get("/api/shards")
+    def get_shards():
+        return shards.get_stats()
+
+    @app.post("/api/shards/rebalance")
+    async def rebalance(payload: RebalanceRequest, provided: Optional[str] = Header(None, alias=SECRET_HEADER)):
+        # Rebalancing sends every session to the listed hosts, so only the operator may do it
+        if not secret_matches(provided, shards.secret):
+            raise HTTPException(status_code=403, detail="Shard secret missing or invalid.")
+        try:
+            return await shards.rebalance(payload.workers, client)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+    async def forward(request: Request):
+        path = request.url.path
+        if path.startswith(INTERNAL_PATH):
+            raise HTTPException(status_code=404, detail="Not Found")
+        shard = shards.shard_for(path)
+        if shard is None:
+            # Not game-specific (stats, health): any worker can answer
+            worker = shards.workers[next(round_robin) % len(shards.workers)]
+            return await _proxy(request, worker, {})
+        await shards.enter(shard)
+        try:
+            extra = {SHARD_HEADER: str(shard)} if path == START_PATH else {}
+            return await _proxy(request, shards.owners[shard], extra)
+        finally:
+            shards.leave(shard)
+
+    async def _proxy(request: Request, worker: str, extra_headers: Dict[str, str]) -> Response:
+        headers = {
+            k: v for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP and k.lower() != SECRET_HEADER.lower()
+        }
+        headers.update(extra_headers)
+        if request.client is not None:
+            # Workers trust this from a local proxy, so admission control still sees the real client
+            forwarded = request.headers.get("x-forwarded-for")
+            headers["x-forwarded-for"] = f"{forwarded}, {request.client.host}" if forwarded else request.client.host
+        try:
+            upstream = await client.request(
+                request.method,
+                worker + request.url.path,
+                params=request.query_params,
+                headers=headers,
+                content=await request.body(),
+            )
+        except httpx.HTTPError as e:
+            shards.stats["upstream_errors"] += 1
+            raise HTTPException(status_code=502, detail=f"Worker {worker} unavailable: {e}") from e
+        shards.stats["forwarded"] += 1
+        return Response(
+            content=upstream.content,
+            status_code=upstream.status_code,
+            headers={k: v for k, v in upstream.headers.items() if k.lower() not in HOP_BY_HOP},
+        )
+
+    app.state.shards = shards
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the dispatcher and one API worker per shard owner.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes to start")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="Dispatcher port; workers use the next ports")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    # Workers only accept migration requests carrying this secret
+    secret = SHARD_SECRET or secrets.token_urlsafe(32)
+    if not SHARD_SECRET:
+        print(f"Generated SHARD_SECRET for this run (needed for /api/shards/rebalance): {secret}")
+    urls, processes = [], []
+    for i in range(args.workers):
+        port = args.port + 1 + i
+        env = dict(os.environ, SHARD_WORKER_ENABLED="1", SHARD_SECRET=secret)
+        if env.get("SESSION_JOURNAL_DIR"):
+            # Journals are per process
+            env["SESSION_JOURNAL_DIR"] = os.path.join(env["SESSION_JOURNAL_DIR"], f"worker-{port}")
+        processes.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+                env=env,
+            )
+        )
+        urls.append(f"http://127.0.0.1:{port}")
+    try:
+        uvicorn.run(create_app(urls, secret=secret), host=args.host, port=args.port)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
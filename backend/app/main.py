@@ -1,14 +1,46 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+import re
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from backend.app.api.routes.debug import router as debug_router
 from backend.app.api.routes.game import router as game_router
+from backend.app.api.routes.games import router as games_router
+from backend.app.api.routes.shards import router as shards_router
 from backend.app.api.routes.stats import router as stats_router
+from backend.app.core.dependencies import (
+    get_admission_controller,
+    get_game_service,
+    get_llm_service,
+    get_session_manager,
+    get_truth_table,
+)
+from config import DEBUG_ENDPOINTS_ENABLED, GAME_EXPORT_ENABLED, SHARD_WORKER_ENABLED
+
+# Endpoints that fan out to LLM calls and are subject to admission control.
+LLM_BOUND_PATH = re.compile(r"^/api/game/(?P<game_id>[^/]+)/(question|preview)$")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rebuild the games that were live when this worker last stopped. Done at
+    # startup rather than in create_app, so importing the app never builds the LLM client.
+    sessions = get_session_manager()
+    if sessions.journal is not None:
+        restored = get_game_service().restore_sessions()
+        print(f"Restored {restored} game sessions in {sessions.journal.get_stats()['recovery_seconds']:.3f}s")
+    yield
+    # Flush the session journal on a clean shutdown.
+    if sessions.journal is not None:
+        sessions.journal.close()
 
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Math Guessing Game API", version="0.1.0")
+    app = FastAPI(title="Math Guessing Game API", version="0.1.0", lifespan=lifespan)
 
     # Dev-friendly CORS; tighten for production.
     app.add_middleware(
@@ -24,12 +56,44 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    @app.middleware("http")
+    async def admission_control(request: Request, call_next):
+        match = LLM_BOUND_PATH.match(request.url.path)
+        if request.method != "POST" or not match:
+            return await call_next(request)
+
+        admission = get_admission_controller()
+        client_id = request.client.host if request.client else "unknown"
+        rejection = admission.check_rate(client_id, match.group("game_id"))
+        if rejection is None:
+            rejection = await admission.acquire_slot()
+        if rejection is not None:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": f"Too many requests ({rejection.reason}); retry later."},
+                headers={"Retry-After": rejection.retry_after_header},
+            )
+        try:
+            return await call_next(request)
+        finally:
+            admission.release_slot()
+
     app.include_router(game_router)
     app.include_router(stats_router)
+    if GAME_EXPORT_ENABLED:
+        app.include_router(games_router)
+    if DEBUG_ENDPOINTS_ENABLED:
+        app.include_router(debug_router)
+    if SHARD_WORKER_ENABLED:
+        app.include_router(shards_router)
+
+    # Map the shared truth table once per worker process so lookups hit shared pages.
+    get_truth_table()
 
+    # Liveness only: never constructs the LLM client, just reports whether it exists yet.
     @app.get("/api/health")
     def health():
-        return {"ok": True}
+        return {"ok": True, "llm_initialized": get_llm_service.cache_info().currsize > 0}
 
     return app
 
@@ -3,12 +3,18 @@
 from __future__ import annotations
 
 import random
-from typing import Literal
+from typing import List, Literal, Optional
 
 from config import MAX_QUESTIONS, MIN_NUMBER, MAX_NUMBER
+from deadline import Deadline
 from game_engine import GameEngine
+from llm_scheduler import BACKGROUND, scheduling
 from llm_service import LLMService
+from question_prefetch import Prefetcher, QuestionPredictor
+from solver import DecisionTreeSolver
+from tracing import span
 
+from backend.app.services.session_journal import State, session_to_state
 from backend.app.services.session_manager import GameSession, SessionManager
 
 
@@ -16,15 +22,32 @@ GameState = Literal["asking", "guess_only", "won", "lost"]
 
 
 class GameService:
-    def __init__(self, session_manager: SessionManager, llm_service: LLMService):
+    def __init__(
+        self,
+        session_manager: SessionManager,
+        llm_service: LLMService,
+        prefetcher: Optional[Prefetcher] = None,
+        predictor: Optional[QuestionPredictor] = None,
+        solver: Optional[DecisionTreeSolver] = None,
+    ):
         self._sessions = session_manager
         self._llm = llm_service
-
-    def start_game(self, *, max_guesses: int = 3) -> GameSession:
+        # Speculative prefetch of the likely next questions (disabled without a prefetcher)
+        self._prefetcher = prefetcher
+        if prefetcher is not None:
+            # Evicted and expired games stop their prefetch round too
+            session_manager.set_removal_listener(prefetcher.cancel)
+        self._predictor = predictor or QuestionPredictor()
+        # Suggests the best next question to players (hints are disabled without a solver)
+        self._solver = solver
+
+    def start_game(self, *, max_guesses: int = 3, shard: Optional[int] = None) -> GameSession:
         secret_number = random.randint(MIN_NUMBER, MAX_NUMBER)
-        engine = GameEngine(llm_service=self._llm)
+        engine = GameEngine(llm_service=self._llm, solver=self._solver)
         engine.set_secret_number(secret_number)
-        return self._sessions.create_session(engine=engine, secret_number=secret_number, max_guesses=max_guesses)
+        return self._sessions.create_session(
+            engine=engine, secret_number=secret_number, max_guesses=max_guesses, shard=shard
+        )
 
     def get_state(self, session: GameSession) -> GameState:
         if session.game_over:
@@ -33,15 +56,79 @@ class GameService:
             return "guess_only"
         return "asking"
 
-    def ask_question(self, session: GameSession, question: str) -> str:
+    def ask_question(self, session: GameSession, question: str, deadline: Optional[Deadline] = None) -> str:
         if session.game_over:
             raise ValueError("Game is already over.")
         if session.engine.question_count >= MAX_QUESTIONS:
             raise ValueError("Maximum questions reached; you can only guess now.")
 
-        answer = self._llm.determine_answer_for_number(session.secret_number, question)
-        session.engine.record_qa(question, answer)
-        return answer
+        if self._prefetcher is not None:
+            self._prefetcher.on_ask(session.game_id, question)
+
+        # The session key gives each game a fair share of the LLM call slots
+        with span("GameService.ask_question", question_count=session.engine.question_count), scheduling(
+            session=session.game_id
+        ):
+            answer = self._llm.determine_answer_for_number(session.secret_number, question, deadline=deadline)
+            session.engine.record_qa(question, answer, deadline=deadline)
+            self._sessions.refresh(session)
+            # The resulting mask is journaled so recovery needs no LLM call
+            self._sessions.log_event(
+                session,
+                "qa",
+                q=question,
+                a=answer,
+                m=format(session.engine.range_manager.snapshot(), "x"),
+                c=session.engine.question_count,
+            )
+            self._predictor.observe(session.engine.qa_history)
+            self._prefetch_next(session)
+            return answer
+
+    def _prefetch_next(self, session: GameSession) -> None:
+        """Resolve the likely next questions for the current candidates in the background."""
+        if self._prefetcher is None:
+            return
+        if session.engine.question_count >= MAX_QUESTIONS:
+            self._prefetcher.cancel(session.game_id)
+            return
+        questions = self._predictor.predict(session.engine.qa_history)
+        if not questions:
+            return
+        candidates = session.engine.get_possible_numbers()
+        llm = self._llm
+        game_id = session.game_id
+
+        def resolve(question: str, deadline: Deadline) -> None:
+            # Resolving the split caches the answer for every candidate, the secret
+            # number included, so the real ask and its filter become cache hits.
+            with scheduling(BACKGROUND, session=game_id):
+                llm.filter_numbers(candidates, question, "Yes", deadline=deadline)
+
+        self._prefetcher.schedule(session.game_id, questions, resolve)
+
+    def end_game(self, session: GameSession) -> None:
+        """Stop background work for a finished game."""
+        if self._prefetcher is not None:
+            self._prefetcher.cancel(session.game_id)
+
+    def preview_question(self, session: GameSession, question: str, deadline: Optional[Deadline] = None) -> dict:
+        """Count the candidates left for each answer without asking the question."""
+        if session.game_over:
+            raise ValueError("Game is already over.")
+
+        with span("GameService.preview_question"), scheduling(session=session.game_id):
+            preview = session.engine.preview(question, deadline=deadline)
+            self._sessions.refresh(session)
+            return preview
+
+    def hint(self, session: GameSession) -> Optional[str]:
+        """Return the solver's best next question, or None if there is nothing left to narrow down."""
+        if self._solver is None:
+            raise LookupError("Hints are disabled (set SOLVER_HINTS=1).")
+        if session.game_over:
+            raise ValueError("Game is already over.")
+        return session.engine.next_optimal_question()
 
     def make_guess(self, session: GameSession, guess: int) -> bool:
         if session.game_over:
@@ -52,11 +139,72 @@ class GameService:
         if correct:
             session.won = True
             session.game_over = True
-            return True
-
-        if session.guess_attempts >= session.max_guesses:
+        elif session.guess_attempts >= session.max_guesses:
             session.won = False
             session.game_over = True
-        return False
+        self._sessions.log_event(
+            session, "guess", v=guess, ga=session.guess_attempts, w=session.won, o=session.game_over
+        )
+        if session.game_over:
+            self.end_game(session)
+        return correct
+
+    def restore_sessions(self) -> int:
+        """Rebuild the journaled sessions after a restart, without calling the LLM.
+
+        Returns:
+            Number of sessions restored
+        """
+        journal = self._sessions.journal
+        if journal is None:
+            return 0
+        states = journal.recover()
+        for state in states.values():
+            self._sessions.restore_session(self._session_from_state(state))
+        return len(states)
+
+    def export_shard(self, shard: int, shard_count: int) -> List[State]:
+        """Return the states of the sessions on a shard, for migration to another worker."""
+        return [session_to_state(s) for s in self._sessions.shard_sessions(shard, shard_count)]
+
+    def import_sessions(self, states: List[State]) -> int:
+        """Take over sessions migrated from another worker (journaled as new sessions here)."""
+        for state in states:
+            self._sessions.restore_session(self._session_from_state(state), journal=True)
+        return len(states)
+
+    def drop_shard(self, shard: int, shard_count: int) -> int:
+        """Forget the sessions on a shard after they were migrated away."""
+        sessions = self._sessions.shard_sessions(shard, shard_count)
+        for session in sessions:
+            if self._prefetcher is not None:
+                self._prefetcher.cancel(session.game_id)
+            self._sessions.delete_session(session.game_id)
+        return len(sessions)
+
+    def _session_from_state(self, state: State) -> GameSession:
+        engine = GameEngine(
+            min_num=state["min"],
+            max_num=state["max"],
+            max_questions=state["mq"],
+            llm_service=self._llm,
+            solver=self._solver,
+        )
+        engine.set_secret_number(state["s"])
+        engine.range_manager.mask = int(state["m"], 16)
+        engine.qa_history = [tuple(qa) for qa in state["h"]]
+        engine.question_count = state["c"]
+        return GameSession(
+            game_id=state["g"],
+            created_at=state["ts"],
+            last_access_at=state["la"],
+            secret_number=state["s"],
+            max_guesses=state["mg"],
+            guess_attempts=state["ga"],
+            won=state["w"],
+            game_over=state["o"],
+            stats_recorded=state["sr"],
+            engine=engine,
+        )
 
 
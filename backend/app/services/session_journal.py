@@ -0,0 +1,245 @@
+"""Event-sourced journal of session mutations for crash recovery.
+
+Every session mutation is appended as one compact JSON line:
+
+- ``start``: the full initial session state
+- ``qa``: a recorded question, its answer and the resulting candidate mask
+- ``guess``: a guess and the resulting attempt count / outcome
+- ``end``: stats were recorded for the game
+- ``drop``: the session was deleted, evicted or expired
+
+Lines are buffered and written in batches by a background flusher (group
+commit), so a request only pays for serializing its event. Every
+``snapshot_every`` events the live sessions are written to a snapshot and the
+journal is truncated. On restart, :meth:`SessionJournal.recover` loads the
+snapshot and replays the journal tail. Filter results are stored as masks, so
+no LLM call is needed to rebuild a game. Events carry the counters they
+produce, which makes replaying an event already in the snapshot a no-op.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+SNAPSHOT_VERSION = 1
+
+State = Dict[str, object]
+
+
+def session_to_state(session) -> State:
+    """Serialize a GameSession (and its engine) to a compact state dict."""
+    engine = session.engine
+    return {
+        "g": session.game_id,
+        "ts": session.created_at,
+        "la": session.last_access_at,
+        "s": session.secret_number,
+        "mg": session.max_guesses,
+        "ga": session.guess_attempts,
+        "w": session.won,
+        "o": session.game_over,
+        "sr": session.stats_recorded,
+        "min": engine.min_num,
+        "max": engine.max_num,
+        "mq": engine.max_questions,
+        "m": format(engine.range_manager.snapshot(), "x"),
+        "h": [list(qa) for qa in engine.qa_history],
+        "c": engine.question_count,
+    }
+
+
+def apply_event(states: Dict[str, State], event: State) -> None:
+    """Apply one journal event to the recovered states (idempotently)."""
+    kind = event["t"]
+    game_id = event["g"]
+    if kind == "start":
+        if game_id not in states:
+            state = dict(event)
+            del state["t"]
+            states[game_id] = state
+        return
+    if kind == "drop":
+        states.pop(game_id, None)
+        return
+    state = states.get(game_id)
+    if state is None:
+        return
+    state["la"] = event["ts"]
+    if kind == "qa":
+        if state["c"] < event["c"]:
+            state["h"].append([event["q"], event["a"]])
+            state["m"] = event["m"]
+            state["c"] = event["c"]
+    elif kind == "guess":
+        if state["ga"] < event["ga"]:
+            state["ga"] = event["ga"]
+            state["w"] = event["w"]
+            state["o"] = event["o"]
+    elif kind == "end":
+        state["sr"] = True
+        state["o"] = True
+
+
+class SessionJournal:
+    def __init__(
+        self,
+        directory: str,
+        *,
+        flush_interval: float = 0.2,
+        batch_size: int = 64,
+        snapshot_every: int = 1000,
+        fsync: bool = False,
+    ):
+        """
+        Args:
+            directory: Where ``journal.jsonl`` and ``snapshot.json`` live (one directory per worker)
+            flush_interval: Longest time an event stays buffered, in seconds
+            batch_size: Buffered events that trigger an immediate write
+            snapshot_every: Events between snapshots
+            fsync: fsync after each write (durable across power loss, slower)
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.snapshot_path = os.path.join(directory, "snapshot.json")
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._snapshot_every = snapshot_every
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._events_since_snapshot = 0
+        self._state_provider: Optional[Callable[[], List[State]]] = None
+        self._closed = threading.Event()
+        self._stats: Dict[str, float] = {
+            "events": 0,
+            "bytes_written": 0,
+            "flushes": 0,
+            "append_seconds": 0.0,
+            "flush_seconds": 0.0,
+            "snapshots": 0,
+            "snapshot_seconds": 0.0,
+            "recovered_sessions": 0,
+            "replayed_events": 0,
+            "recovery_seconds": 0.0,
+        }
+        self._flusher = threading.Thread(target=self._flush_loop, name="session-journal", daemon=True)
+        self._flusher.start()
+
+    def set_state_provider(self, provider: Callable[[], List[State]]) -> None:
+        """Register the callable returning the states of all live sessions, used for snapshots."""
+        self._state_provider = provider
+
+    def append(self, kind: str, game_id: str, **fields: object) -> None:
+        """Buffer one event; it is written by the next batch flush."""
+        started = time.perf_counter()
+        line = json.dumps({"t": kind, "g": game_id, "ts": time.time(), **fields}, separators=(",", ":"))
+        with self._lock:
+            self._buffer.append(line)
+            self._stats["events"] += 1
+            self._events_since_snapshot += 1
+            if len(self._buffer) >= self._batch_size:
+                self._flush_locked()
+            self._stats["append_seconds"] += time.perf_counter() - started
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def snapshot(self) -> None:
+        """Write the live sessions to the snapshot file and truncate the journal."""
+        if self._state_provider is None:
+            return
+        started = time.perf_counter()
+        with self._lock:
+            # Appends wait for the snapshot, so no event falls between the
+            # captured state and the truncated journal.
+            self._flush_locked()
+            data = {"version": SNAPSHOT_VERSION, "taken_at": time.time(), "sessions": self._state_provider()}
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+                if self._fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._file.close()
+            self._file = open(self.journal_path, "w", encoding="utf-8")
+            self._events_since_snapshot = 0
+            self._stats["snapshots"] += 1
+            self._stats["snapshot_seconds"] += time.perf_counter() - started
+
+    def recover(self) -> Dict[str, State]:
+        """
+        Rebuild the session states from the snapshot and the journal tail.
+
+        Returns:
+            game_id -> state (see :func:`session_to_state`)
+        """
+        started = time.perf_counter()
+        states: Dict[str, State] = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == SNAPSHOT_VERSION:
+                states = {state["g"]: state for state in data["sessions"]}
+        replayed = 0
+        with self._lock:
+            self._flush_locked()
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    apply_event(states, event)
+                    replayed += 1
+            self._stats["recovered_sessions"] = len(states)
+            self._stats["replayed_events"] = replayed
+            self._stats["recovery_seconds"] = time.perf_counter() - started
+        return states
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["buffered_events"] = len(self._buffer)
+            stats["events_since_snapshot"] = self._events_since_snapshot
+        events = stats["events"]
+        stats["avg_append_us"] = stats["append_seconds"] / events * 1e6 if events else 0.0
+        stats["avg_bytes_per_event"] = stats["bytes_written"] / events if events else 0.0
+        stats["avg_flush_ms"] = stats["flush_seconds"] / stats["flushes"] * 1000 if stats["flushes"] else 0.0
+        return stats
+
+    def _flush_locked(self) -> None:
+        if not self._buffer or self._file.closed:
+            return
+        started = time.perf_counter()
+        data = "\n".join(self._buffer) + "\n"
+        self._buffer.clear()
+        self._file.write(data)
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+        self._stats["bytes_written"] += len(data)
+        self._stats["flushes"] += 1
+        self._stats["flush_seconds"] += time.perf_counter() - started
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self._flush_interval):
+            self.flush()
+            if self._events_since_snapshot >= self._snapshot_every:
+                try:
+                    self.snapshot()
+                except (OSError, ValueError) as e:
+                    print(f"Warning: Could not write session snapshot: {e}")
@@ -1,38 +1,121 @@
 """In-memory session manager for multi-user game sessions.
 
+Sessions are kept in LRU order and capped both by count and by an estimated
+memory budget; the least recently used sessions are evicted first. With a
+SessionJournal attached, every mutation is journaled so sessions survive a
+worker restart. A removal listener (see ``set_removal_listener``) is told about
+every session that is evicted, expires or is deleted, so work still running for
+it (e.g. a question prefetch) can be cancelled.
+
 For production, this can be swapped with Redis or another shared store.
 """
 
 from __future__ import annotations
 
+import sys
+import threading
 import time
-import uuid
-from dataclasses import dataclass, field
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from backend.app.core.sharding import new_game_id, shard_of
+from backend.app.services.session_journal import SessionJournal, State, session_to_state
 
 
-@dataclass
 class GameSession:
-    game_id: str
-    created_at: float
-    last_access_at: float
-    secret_number: int
-    max_guesses: int
-    guess_attempts: int = 0
-    won: bool = False
-    game_over: bool = False
-    stats_recorded: bool = False
-    engine: object = field(default=None)
+    # Slotted (no per-instance __dict__) to keep the per-game footprint small.
+    __slots__ = (
+        "game_id",
+        "created_at",
+        "last_access_at",
+        "secret_number",
+        "max_guesses",
+        "guess_attempts",
+        "won",
+        "game_over",
+        "stats_recorded",
+        "engine",
+    )
+
+    def __init__(
+        self,
+        *,
+        game_id: str,
+        created_at: float,
+        last_access_at: float,
+        secret_number: int,
+        max_guesses: int,
+        guess_attempts: int = 0,
+        won: bool = False,
+        game_over: bool = False,
+        stats_recorded: bool = False,
+        engine: object = None,
+    ):
+        self.game_id = game_id
+        self.created_at = created_at
+        self.last_access_at = last_access_at
+        self.secret_number = secret_number
+        self.max_guesses = max_guesses
+        self.guess_attempts = guess_attempts
+        self.won = won
+        self.game_over = game_over
+        self.stats_recorded = stats_recorded
+        self.engine = engine
+
+
+def session_footprint(session: GameSession) -> int:
+    """Estimate the bytes owned by one session (shared services are not counted)."""
+    size = sys.getsizeof(session) + sys.getsizeof(session.game_id)
+    engine = session.engine
+    if engine is None:
+        return size
+    size += sys.getsizeof(engine)
+    history = getattr(engine, "qa_history", None) or []
+    size += sys.getsizeof(history)
+    for question, _answer in history:
+        # Answers are the shared "Yes"/"No" constants.
+        size += sys.getsizeof((question, _answer)) + sys.getsizeof(question)
+    previews = getattr(engine, "previews", None) or {}
+    size += sys.getsizeof(previews)
+    for question, masks in previews.items():
+        size += sys.getsizeof(question) + sys.getsizeof(masks) + sum(sys.getsizeof(m) for m in masks)
+    range_manager = getattr(engine, "range_manager", None)
+    if range_manager is not None:
+        size += sys.getsizeof(range_manager) + sys.getsizeof(getattr(range_manager, "mask", 0))
+    return size
 
 
 class SessionManager:
-    def __init__(self, ttl_seconds: int = 60 * 60):
+    def __init__(
+        self,
+        ttl_seconds: int = 60 * 60,
+        max_sessions: Optional[int] = None,
+        memory_budget_bytes: Optional[int] = None,
+        journal: Optional[SessionJournal] = None,
+    ):
         self._ttl_seconds = ttl_seconds
-        self._sessions: Dict[str, GameSession] = {}
+        self._max_sessions = max_sessions
+        self._memory_budget_bytes = memory_budget_bytes
+        self._lock = threading.Lock()
+        # game_id -> session, least recently used first
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._footprints: Dict[str, int] = {}
+        self._memory_bytes = 0
+        self._evictions = 0
+        self._expirations = 0
+        # Sessions removed under the lock; their "drop" events are journaled (and the
+        # removal listener called) after it is released
+        self._dropped: List[str] = []
+        self._removal_listener: Optional[Callable[[str], None]] = None
+        self.journal = journal
+        if journal is not None:
+            journal.set_state_provider(self.export_states)
 
-    def create_session(self, *, engine: object, secret_number: int, max_guesses: int) -> GameSession:
+    def create_session(
+        self, *, engine: object, secret_number: int, max_guesses: int, shard: Optional[int] = None
+    ) -> GameSession:
         now = time.time()
-        game_id = str(uuid.uuid4())
+        game_id = new_game_id(shard)
         session = GameSession(
             game_id=game_id,
             created_at=now,
@@ -41,23 +124,131 @@ class SessionManager:
             max_guesses=max_guesses,
             engine=engine,
         )
-        self._sessions[game_id] = session
+        with self._lock:
+            self._cleanup_expired(now)
+            self._sessions[game_id] = session
+            self._set_footprint(session)
+            self._enforce_limits()
+        self._log_start(session)
+        self._log_dropped()
         return session
 
+    def restore_session(self, session: GameSession, *, journal: bool = False) -> None:
+        """Add a session rebuilt from saved state.
+
+        Sessions recovered from this worker's own journal are not journaled
+        again; sessions migrated from another worker are (``journal=True``).
+        """
+        with self._lock:
+            self._sessions[session.game_id] = session
+            self._set_footprint(session)
+            self._enforce_limits()
+        if journal:
+            self._log_start(session)
+        self._log_dropped()
+
     def get_session(self, game_id: str) -> Optional[GameSession]:
-        self._cleanup_expired()
-        session = self._sessions.get(game_id)
-        if session:
-            session.last_access_at = time.time()
+        now = time.time()
+        with self._lock:
+            self._cleanup_expired(now)
+            session = self._sessions.get(game_id)
+            if session:
+                session.last_access_at = now
+                self._sessions.move_to_end(game_id)
+        self._log_dropped()
         return session
 
+    def refresh(self, session: GameSession) -> None:
+        """Re-measure a session after it grew (e.g. a question was recorded)."""
+        with self._lock:
+            if session.game_id in self._sessions:
+                self._set_footprint(session)
+                self._enforce_limits()
+        self._log_dropped()
+
     def delete_session(self, game_id: str) -> None:
-        self._sessions.pop(game_id, None)
+        with self._lock:
+            self._remove(game_id)
+        self._log_dropped()
 
-    def _cleanup_expired(self) -> None:
-        now = time.time()
-        expired = [gid for gid, s in self._sessions.items() if (now - s.last_access_at) > self._ttl_seconds]
-        for gid in expired:
-            self._sessions.pop(gid, None)
+    def set_removal_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callable run with the game id of every session removed (evicted, expired or deleted)."""
+        self._removal_listener = listener
+
+    def log_event(self, session: GameSession, kind: str, **fields: object) -> None:
+        """Journal a mutation of ``session`` (no-op without a journal)."""
+        if self.journal is not None:
+            self.journal.append(kind, session.game_id, **fields)
+
+    def export_states(self) -> List[State]:
+        """Return the journal state of every live session (used for snapshots)."""
+        with self._lock:
+            return [session_to_state(session) for session in self._sessions.values()]
+
+    def shard_sessions(self, shard: int, shard_count: int) -> List[GameSession]:
+        """Return the live sessions on one shard."""
+        with self._lock:
+            return [s for gid, s in self._sessions.items() if shard_of(gid, shard_count) == shard]
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            count = len(self._sessions)
+            return {
+                "sessions": count,
+                "max_sessions": self._max_sessions,
+                "memory_bytes": self._memory_bytes,
+                "memory_budget_bytes": self._memory_budget_bytes,
+                "avg_bytes_per_session": self._memory_bytes / count if count else 0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "journal": self.journal.get_stats() if self.journal is not None else None,
+            }
+
+    def _log_start(self, session: GameSession) -> None:
+        if self.journal is not None:
+            state = session_to_state(session)
+            del state["g"]
+            self.journal.append("start", session.game_id, **state)
+
+    def _set_footprint(self, session: GameSession) -> None:
+        size = session_footprint(session)
+        self._memory_bytes += size - self._footprints.get(session.game_id, 0)
+        self._footprints[session.game_id] = size
+
+    def _remove(self, game_id: str) -> Optional[GameSession]:
+        session = self._sessions.pop(game_id, None)
+        self._memory_bytes -= self._footprints.pop(game_id, 0)
+        if session is not None and (self.journal is not None or self._removal_listener is not None):
+            self._dropped.append(game_id)
+        return session
+
+    def _log_dropped(self) -> None:
+        # Called without holding self._lock: a snapshot holds the journal lock
+        # while it collects states under self._lock.
+        if not self._dropped:
+            return
+        with self._lock:
+            dropped, self._dropped = self._dropped, []
+        for game_id in dropped:
+            if self.journal is not None:
+                self.journal.append("drop", game_id)
+            if self._removal_listener is not None:
+                self._removal_listener(game_id)
 
+    def _enforce_limits(self) -> None:
+        while len(self._sessions) > 1 and (
+            (self._max_sessions is not None and len(self._sessions) > self._max_sessions)
+            or (self._memory_budget_bytes is not None and self._memory_bytes > self._memory_budget_bytes)
+        ):
+            oldest = next(iter(self._sessions))
+            self._remove(oldest)
+            self._evictions += 1
 
+    def _cleanup_expired(self, now: float) -> None:
+        # LRU order means expired sessions are at the front.
+        while self._sessions:
+            gid, session = next(iter(self._sessions.items()))
+            if (now - session.last_access_at) <= self._ttl_seconds:
+                break
+            self._remove(gid)
+            self._expirations += 1
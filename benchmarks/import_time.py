@@ -0,0 +1,93 @@
+"""Cold-start benchmark: how long the CLI and the ASGI app take to import.
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+Run from the project root:
+
+    python benchmarks/import_time.py [--runs 10] [--top 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> statement executed in a fresh interpreter
+TARGETS = {
+    "cli": "import main",
+    "asgi": "import backend.app.main",
+}
+
+_TIMER = (
+    "import time; _t = time.perf_counter(); {stmt}; "
+    "print(time.perf_counter() - _t)"
+)
+
+
+def time_import(stmt, runs):
+    """
+    Time a statement in ``runs`` fresh interpreters.
+
+    Args:
+        stmt: Python statement to time
+        runs: Number of interpreters to start
+
+    Returns:
+        list: Wall-clock seconds per run
+    """
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _TIMER.format(stmt=stmt)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_modules(stmt, top):
+    """
+    Return the ``top`` modules with the largest cumulative import time.
+
+    Returns:
+        list: (microseconds, module name) pairs, slowest first
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the CLI and the ASGI app.")
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list per target")
+    parser.add_argument("targets", nargs="*", default=list(TARGETS), help=f"targets ({', '.join(TARGETS)})")
+    args = parser.parse_args()
+
+    for name in args.targets:
+        stmt = TARGETS[name]
+        try:
+            samples = time_import(stmt, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{name}: import failed\n{e.stderr}")
+            continue
+        print(
+            f"{name} ({stmt}): median {statistics.median(samples) * 1000:.1f} ms, "
+            f"min {min(samples) * 1000:.1f} ms, max {max(samples) * 1000:.1f} ms over {len(samples)} runs"
+        )
+        for cumulative, module in slowest_modules(stmt, args.top):
+            print(f"  {cumulative / 1000:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
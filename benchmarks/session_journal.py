@@ -0,0 +1,93 @@
+"""Session journal benchmark: write overhead per event and recovery time.
+
+Plays games against the local LLM stand-in with and without a journal, then
+rebuilds the sessions from the journal as a restarted worker would. Run from
+the project root:
+
+    python benchmarks/session_journal.py [--games 2000] [--questions 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_BACKEND", "local")
+
+from backend.app.services.game_service import GameService  # noqa: E402
+from backend.app.services.session_journal import SessionJournal  # noqa: E402
+from backend.app.services.session_manager import SessionManager  # noqa: E402
+from llm_service import LLMService  # noqa: E402
+
+QUESTIONS = [
+    "Is it even?",
+    "Is it less than 250?",
+    "Is it a prime number?",
+    "Is it divisible by 3?",
+    "Is it a perfect square?",
+    "Does it end in 7?",
+    "Is it less than 100?",
+]
+
+
+def play(service, games, questions, seed=0):
+    """
+    Play ``games`` games of ``questions`` questions and one guess each.
+
+    Returns:
+        float: Elapsed seconds
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for _ in range(games):
+        session = service.start_game()
+        for question in rng.sample(QUESTIONS, questions):
+            service.ask_question(session, question)
+        service.make_guess(session, rng.randint(0, 500))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure session journal write overhead and recovery time.")
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--snapshot-every", type=int, default=1000)
+    parser.add_argument("--fsync", action="store_true")
+    args = parser.parse_args()
+
+    llm = LLMService()
+    # Warm the answer cache so both runs measure session handling, not the stand-in
+    play(GameService(SessionManager(), llm), 50, args.questions)
+
+    baseline = play(GameService(SessionManager(), llm), args.games, args.questions)
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = SessionJournal(directory, snapshot_every=args.snapshot_every, fsync=args.fsync)
+        journaled = play(GameService(SessionManager(journal=journal), llm), args.games, args.questions)
+        journal.close()
+        stats = journal.get_stats()
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+        restarted = SessionManager(journal=SessionJournal(directory))
+        started = time.perf_counter()
+        restored = GameService(restarted, llm).restore_sessions()
+        recovery = time.perf_counter() - started
+        recovery_stats = restarted.journal.get_stats()
+        restarted.journal.close()
+
+    events = stats["events"]
+    print(f"games: {args.games} x {args.questions} questions, {events} events")
+    print(f"without journal: {baseline:.3f}s, with journal: {journaled:.3f}s "
+          f"(+{(journaled - baseline) / events * 1e6:.1f} us/event wall clock)")
+    print(f"append: {stats['avg_append_us']:.1f} us/event, {stats['flushes']} flushes "
+          f"averaging {stats['avg_flush_ms']:.2f} ms, {stats['avg_bytes_per_event']:.0f} bytes/event")
+    print(f"snapshots: {stats['snapshots']} taking {stats['snapshot_seconds']:.3f}s, on disk: {size / 1024:.0f} KiB")
+    print(f"recovery: {restored} sessions from snapshot + {recovery_stats['replayed_events']} events "
+          f"in {recovery:.3f}s (journal replay {recovery_stats['recovery_seconds']:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
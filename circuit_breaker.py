@@ -0,0 +1,163 @@
+"""Circuit breaker for calls to the LLM API.
+
+The breaker watches the outcome and latency of recent calls. When too many of
+them fail, or are too slow, it opens: calls are refused immediately with
+:class:`CircuitOpenError` instead of piling more requests onto a struggling
+upstream. After a cool-down it lets a few probe calls through (half-open);
+if they succeed the breaker closes again, otherwise it re-opens.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+from config import (
+    BREAKER_FAILURE_RATE, BREAKER_HALF_OPEN_PROBES, BREAKER_MIN_CALLS, BREAKER_OPEN_SECONDS,
+    BREAKER_SLOW_CALL_SECONDS, BREAKER_SLOW_RATE, BREAKER_WINDOW,
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when the LLM is unavailable because the circuit breaker is open."""
+
+    def __init__(self, message, retry_after=0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Trips on the error rate or slow-call rate of a sliding window of calls."""
+
+    def __init__(self, failure_rate=BREAKER_FAILURE_RATE, slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+                 slow_rate=BREAKER_SLOW_RATE, min_calls=BREAKER_MIN_CALLS, window=BREAKER_WINDOW,
+                 open_seconds=BREAKER_OPEN_SECONDS, half_open_probes=BREAKER_HALF_OPEN_PROBES):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_rate: Share of failed calls in the window that trips the breaker
+            slow_call_seconds: Latency from which a call counts as slow
+            slow_rate: Share of slow calls in the window that trips the breaker
+            min_calls: Calls needed in the window before it can trip
+            window: Number of recent calls considered
+            open_seconds: Cool-down before probing (half-open)
+            half_open_probes: Successful probes needed to close again (also the
+                number of probes allowed at a time)
+        """
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self._calls = deque(maxlen=window)  # (failed, slow) per call
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "trips": 0, "probes": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def retry_after(self):
+        """Seconds until the breaker will next let a probe through (0 when closed)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self):
+        """
+        Reserve permission for one call.
+
+        Returns:
+            bool: True if the call may proceed; it must then be reported with :meth:`record`
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+                self._probes_in_flight += 1
+                self.stats["probes"] += 1
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def check(self):
+        """
+        Reserve permission for one call or raise.
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        if not self.allow():
+            raise self.open_error()
+
+    def open_error(self):
+        """Return the CircuitOpenError describing the current outage."""
+        retry_after = self.retry_after()
+        return CircuitOpenError(
+            f"LLM temporarily unavailable (circuit open, retry in {math.ceil(retry_after)}s)",
+            retry_after=retry_after,
+        )
+
+    def record(self, success, latency):
+        """Report the outcome of a call admitted by :meth:`allow` or :meth:`check`."""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["failures"] += int(not success)
+            self.stats["slow_calls"] += int(slow)
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if not success or slow:
+                    self._trip()
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_probes:
+                        self._state = CLOSED
+                        self._calls.clear()
+                return
+            if self._state == OPEN:
+                return  # a call admitted before the breaker tripped
+            self._calls.append((not success, slow))
+            if len(self._calls) >= self.min_calls:
+                failed = sum(1 for f, _ in self._calls if f)
+                slow_calls = sum(1 for _, s in self._calls if s)
+                if failed >= self.failure_rate * len(self._calls) or slow_calls >= self.slow_rate * len(self._calls):
+                    self._trip()
+
+    def get_stats(self):
+        """Return the state, window rates and counters."""
+        with self._lock:
+            self._maybe_half_open()
+            stats = dict(self.stats)
+            calls = len(self._calls)
+            stats["state"] = self._state
+            stats["window_calls"] = calls
+            stats["window_failure_rate"] = sum(1 for f, _ in self._calls if f) / calls if calls else 0.0
+            stats["window_slow_rate"] = sum(1 for _, s in self._calls if s) / calls if calls else 0.0
+        return stats
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._calls.clear()
+        self.stats["trips"] += 1
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
@@ -1,15 +1,110 @@
 """Configuration settings for the Math Guessing Game."""
 
 import os
-from dotenv import load_dotenv
+
+
+def _load_env_file():
+    """Load a .env file from the working or project directory, if one exists.
+
+    python-dotenv is only imported when there is a file to load.
+    """
+    for directory in (os.getcwd(), os.path.dirname(os.path.abspath(__file__))):
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            try:
+                from dotenv import load_dotenv
+            except ImportError:
+                return
+            load_dotenv(path)
+            return
+
 
 # Load environment variables from .env file if it exists
-load_dotenv()
+_load_env_file()
 
 # OpenAI API Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
 
+# Model tiers: simple comparisons use the small model, number-theory questions the strong one
+OPENAI_MODEL_SMALL = os.getenv("OPENAI_MODEL_SMALL", OPENAI_MODEL)
+OPENAI_MODEL_STRONG = os.getenv("OPENAI_MODEL_STRONG", OPENAI_MODEL)
+# Cost per 1000 tokens of each tier, for reporting
+MODEL_COST_SMALL = float(os.getenv("MODEL_COST_SMALL", "0"))
+MODEL_COST_STRONG = float(os.getenv("MODEL_COST_STRONG", "0"))
+
+# "openai" or "local" (predicate-backed stand-in from local_llm.py, no API key needed)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+
+# Ask the API for JSON mode on structured filter calls (requires a model that supports it)
+FILTER_JSON_MODE = os.getenv("FILTER_JSON_MODE", "1") == "1"
+
+# Adaptive filter batching: starting size, bounds and the per-batch latency target (seconds)
+FILTER_BATCH_SIZE = int(os.getenv("FILTER_BATCH_SIZE", "100"))
+FILTER_MIN_BATCH_SIZE = int(os.getenv("FILTER_MIN_BATCH_SIZE", "10"))
+FILTER_MAX_BATCH_SIZE = int(os.getenv("FILTER_MAX_BATCH_SIZE", "2000"))
+FILTER_TARGET_LATENCY = float(os.getenv("FILTER_TARGET_LATENCY", "5"))
+
+# Recovery from malformed filter replies: extra calls (retries and bisected halves) allowed per
+# filter_numbers call, and the smallest batch that is still bisected. Numbers left over when
+# the budget is spent stay unresolved (kept as candidates).
+FILTER_RECOVERY_CALLS = int(os.getenv("FILTER_RECOVERY_CALLS", "8"))
+FILTER_MIN_BISECT_SIZE = int(os.getenv("FILTER_MIN_BISECT_SIZE", "8"))
+
+# HTTP transport for the OpenAI client: connection pool, keep-alive and timeouts (seconds).
+# Retries are disabled so the request deadline alone decides how long a call may take.
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "32"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "0"))
+
+# Time budget of one API request, from the route through every LLM call it makes (seconds)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "25"))
+
+# Admission control for LLM-bound endpoints: token buckets (requests/second and burst) per
+# client and per game, plus a global in-flight cap with a bounded wait queue
+ADMISSION_CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", "1"))
+ADMISSION_CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", "5"))
+ADMISSION_GAME_RATE = float(os.getenv("ADMISSION_GAME_RATE", "0.5"))
+ADMISSION_GAME_BURST = float(os.getenv("ADMISSION_GAME_BURST", "3"))
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+
+# Request hedging: send a duplicate LLM call once the primary is slower than the given
+# percentile of recent latencies, for at most HEDGE_MAX_RATE of all calls
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MAX_RATE = float(os.getenv("HEDGE_MAX_RATE", "0.1"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+# LLM call scheduling (see llm_scheduler.py): calls in flight overall and per priority class.
+# Keep the filter and background limits below the total so interactive answers always have slots.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_INTERACTIVE_CONCURRENCY = int(os.getenv("LLM_INTERACTIVE_CONCURRENCY", "16"))
+LLM_FILTER_CONCURRENCY = int(os.getenv("LLM_FILTER_CONCURRENCY", "8"))
+LLM_BACKGROUND_CONCURRENCY = int(os.getenv("LLM_BACKGROUND_CONCURRENCY", "2"))
+
+# In-process request tracing: spans per request, kept for the last TRACE_BUFFER_SIZE requests
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") == "1"
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "256"))
+
+# Debug endpoints (/api/debug: traces and the on-demand sampling profiler); keep off in production
+DEBUG_ENDPOINTS_ENABLED = os.getenv("DEBUG_ENDPOINTS_ENABLED", "0") == "1"
+# Sampling profiler: seconds between samples and distinct stacks kept
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))
+PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", "5000"))
+
+# Fault injection for the local stand-in
+LOCAL_LLM_MALFORMED_RATE = float(os.getenv("LOCAL_LLM_MALFORMED_RATE", "0"))
+LOCAL_LLM_ERROR_RATE = float(os.getenv("LOCAL_LLM_ERROR_RATE", "0"))
+LOCAL_LLM_LATENCY_SECONDS = float(os.getenv("LOCAL_LLM_LATENCY_SECONDS", "0"))
+LOCAL_LLM_SLOW_RATE = float(os.getenv("LOCAL_LLM_SLOW_RATE", "0"))
+LOCAL_LLM_SLOW_SECONDS = float(os.getenv("LOCAL_LLM_SLOW_SECONDS", "2"))
+
 # Game Configuration
 MIN_NUMBER = 0
 MAX_NUMBER = 500
@@ -18,6 +113,82 @@ MAX_QUESTIONS = 10
 # Scoring file path
 SCORING_FILE = "game_stats.json"
 
+# Per-game results (outcome and qa_history) as JSON Lines; empty disables (see game_results.py).
+# GAME_EXPORT_ENABLED serves the log at /api/games/export; keep it off on public deployments,
+# since records include the secret number. GAME_EXPORT_MAX_LIMIT caps the games of one request.
+GAME_RESULTS_FILE = os.getenv("GAME_RESULTS_FILE", "game_results.jsonl")
+GAME_EXPORT_ENABLED = os.getenv("GAME_EXPORT_ENABLED", "0") == "1"
+GAME_EXPORT_MAX_LIMIT = int(os.getenv("GAME_EXPORT_MAX_LIMIT", "100000"))
+
+# Live game sessions per worker: maximum count and estimated memory budget (LRU eviction)
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+SESSION_MEMORY_BUDGET_BYTES = int(os.getenv("SESSION_MEMORY_BUDGET_BYTES", str(16 * 1024 * 1024)))
+
+# Session journal for crash recovery: directory (one per worker; empty disables journaling),
+# flush interval (seconds), events per batched write, events between snapshots, and fsync
+SESSION_JOURNAL_DIR = os.getenv("SESSION_JOURNAL_DIR", "")
+SESSION_JOURNAL_FLUSH_INTERVAL = float(os.getenv("SESSION_JOURNAL_FLUSH_INTERVAL", "0.2"))
+SESSION_JOURNAL_BATCH_SIZE = int(os.getenv("SESSION_JOURNAL_BATCH_SIZE", "64"))
+SESSION_JOURNAL_SNAPSHOT_EVERY = int(os.getenv("SESSION_JOURNAL_SNAPSHOT_EVERY", "1000"))
+SESSION_JOURNAL_FSYNC = os.getenv("SESSION_JOURNAL_FSYNC", "0") == "1"
+
+# Vectorized predicate evaluation (needs NumPy): ranges at least VECTOR_MIN_SIZE numbers are
+# evaluated in chunks of VECTOR_CHUNK_SIZE, and across processes from VECTOR_PARALLEL_MIN_SIZE
+VECTOR_MIN_SIZE = int(os.getenv("VECTOR_MIN_SIZE", "4096"))
+VECTOR_CHUNK_SIZE = int(os.getenv("VECTOR_CHUNK_SIZE", str(1 << 20)))
+VECTOR_PARALLEL_MIN_SIZE = int(os.getenv("VECTOR_PARALLEL_MIN_SIZE", str(1 << 24)))
+
+# Speculative prefetch of the likely next questions while the player thinks: questions per
+# round, background threads, queue cap, per-question time limit (seconds), times a question
+# must have been asked before it is predicted, and distinct questions tracked. Off by default:
+# every round spends LLM calls that are wasted when the player asks something else
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "0") == "1"
+PREFETCH_QUESTIONS = int(os.getenv("PREFETCH_QUESTIONS", "2"))
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "64"))
+PREFETCH_TIMEOUT = float(os.getenv("PREFETCH_TIMEOUT", "20"))
+PREFETCH_MIN_COUNT = int(os.getenv("PREFETCH_MIN_COUNT", "3"))
+PREFETCH_MAX_TRACKED_QUESTIONS = int(os.getenv("PREFETCH_MAX_TRACKED_QUESTIONS", "2000"))
+
+# Circuit breaker for the LLM API: it opens when at least BREAKER_FAILURE_RATE of the last
+# BREAKER_WINDOW calls failed, or BREAKER_SLOW_RATE took BREAKER_SLOW_CALL_SECONDS or longer
+# (once BREAKER_MIN_CALLS are in the window). While open, questions the predicate library
+# recognizes are answered locally and others are rejected; after BREAKER_OPEN_SECONDS
+# BREAKER_HALF_OPEN_PROBES successful probe calls close it again.
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "10"))
+BREAKER_SLOW_RATE = float(os.getenv("BREAKER_SLOW_RATE", "0.8"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+# Sharded deployment (see backend/app/dispatcher.py): games are spread over SHARD_COUNT shards
+# and each shard is owned by one worker process. The dispatcher routes to the workers listed
+# in SHARD_WORKERS (comma-separated base URLs), assigning shards by consistent hashing with
+# SHARD_VNODES ring points per worker. SHARD_WORKER_ENABLED exposes the session migration
+# endpoints on a worker; SHARD_PROXY_TIMEOUT bounds a forwarded request (seconds).
+# SHARD_SECRET is shared by the dispatcher and its workers and required by the migration and
+# rebalance endpoints (they refuse every request while it is empty).
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "256"))
+SHARD_WORKERS = [url.strip() for url in os.getenv("SHARD_WORKERS", "").split(",") if url.strip()]
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+SHARD_WORKER_ENABLED = os.getenv("SHARD_WORKER_ENABLED", "0") == "1"
+SHARD_PROXY_TIMEOUT = float(os.getenv("SHARD_PROXY_TIMEOUT", "60"))
+SHARD_SECRET = os.getenv("SHARD_SECRET", "")
+
+# Precomputed decision tree table used by the optimal solver (see solver.py); with SOLVER_HINTS=1
+# players can ask the solver for the best next question ("hint" in the CLI, GET .../hint in the API)
+SOLVER_TABLE_FILE = os.getenv("SOLVER_TABLE_FILE", "solver_table.bin")
+SOLVER_HINTS = os.getenv("SOLVER_HINTS", "0") == "1"
+
+# Memory-mapped truth table of resolved questions shared by all workers (see truth_table.py)
+TRUTH_TABLE_FILE = os.getenv("TRUTH_TABLE_FILE", "truth_table.bin")
+
+# Answer cache: questions kept in memory and TF-IDF similarity needed to reuse a resolved question
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "256"))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.9"))
+
 
 
 
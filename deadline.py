@@ -0,0 +1,105 @@
+"""Per-request deadlines propagated from the API route down to every LLM call."""
+
+import math
+import time
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when work cannot finish before the request's deadline."""
+
+
+class Deadline:
+    """An absolute point in time by which a request must be answered."""
+
+    __slots__ = ("expires_at",)
+
+    def __init__(self, seconds):
+        """
+        Start a deadline.
+
+        Args:
+            seconds: Time budget from now, in seconds
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Return the seconds left (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        """Return True once the deadline has passed."""
+        return time.monotonic() >= self.expires_at
+
+    def check(self, what, needed=0.0):
+        """
+        Raise if the deadline has passed or less than ``needed`` seconds remain.
+
+        Args:
+            what: Description of the work about to start, for the error message
+            needed: Expected duration of that work, in seconds
+
+        Raises:
+            DeadlineExceeded: If the work cannot finish in time
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Request deadline exceeded before {what}")
+        if needed > remaining:
+            raise DeadlineExceeded(
+                f"Request deadline would be exceeded by {what} "
+                f"(needs ~{needed:.1f}s, {remaining:.1f}s left)"
+            )
+
+    def cancel(self):
+        """Expire the deadline now, so work checking it stops at its next check."""
+        self.expires_at = 0.0
+
+    def timeout(self, cap=None):
+        """Return the remaining time, optionally capped, for use as a call timeout."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+
+class LatestDeadline(Deadline):
+    """The latest of several deadlines, for work shared by several requests.
+
+    The work only runs out of time once every request sharing it has: one of
+    them expiring or being cancelled leaves the others' time in place.
+    Cancelling the shared deadline stops the work without touching the
+    requests' own deadlines.
+    """
+
+    __slots__ = ("_deadlines", "cancelled")
+
+    def __init__(self, deadline=None):
+        """
+        Start with one request's deadline.
+
+        Args:
+            deadline: Deadline of the first request, or None for no deadline
+        """
+        self._deadlines = []
+        self.cancelled = False
+        self.add(deadline)
+
+    @property
+    def expires_at(self):
+        if self.cancelled:
+            return 0.0
+        return max(d.expires_at for d in self._deadlines)
+
+    def add(self, deadline):
+        """Extend the work's time to another request's deadline (None: no deadline)."""
+        self._deadlines.append(deadline if deadline is not None else _NEVER)
+
+    def cancel(self):
+        """Cancel the shared work; the requests' own deadlines are left as they are."""
+        self.cancelled = True
+
+
+class _Never:
+    __slots__ = ()
+    expires_at = math.inf
+
+
+_NEVER = _Never()
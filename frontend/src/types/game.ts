@@ -30,6 +30,19 @@ export interface AskQuestionResponse {
   game_state: GameState
 }
 
+export interface PreviewResponse {
+  question: string
+  possible_count: number
+  yes_count: number
+  no_count: number
+  unresolved_count: number
+}
+
+export interface HintResponse {
+  question: string | null
+  possible_count: number
+}
+
 export interface MakeGuessResponse {
   correct: boolean
   game_over: boolean
@@ -2,11 +2,21 @@
 
 from range_manager import RangeManager
 from config import MIN_NUMBER, MAX_NUMBER, MAX_QUESTIONS
+from tracing import span
+
+# Previewed questions kept per game, reused when one of them is then asked
+PREVIEW_CACHE_SIZE = 8
 
 class GameEngine:
     """Core game engine managing game state."""
     
-    def __init__(self, min_num=MIN_NUMBER, max_num=MAX_NUMBER, max_questions=MAX_QUESTIONS, llm_service=None):
+    __slots__ = (
+        "llm_service", "solver", "range_manager", "min_num", "max_num", "max_questions",
+        "qa_history", "question_count", "secret_number", "previews",
+    )
+    
+    def __init__(self, min_num=MIN_NUMBER, max_num=MAX_NUMBER, max_questions=MAX_QUESTIONS, llm_service=None,
+                 solver=None):
         """
         Initialize game engine.
         
@@ -15,8 +25,10 @@ class GameEngine:
             max_num: Maximum number in range
             max_questions: Maximum questions allowed
             llm_service: LLMService instance (required for filtering)
+            solver: Optional DecisionTreeSolver used for optimal questions and guesses
         """
         self.llm_service = llm_service
+        self.solver = solver
         self.range_manager = RangeManager(min_num, max_num, llm_service=llm_service)
         self.min_num = min_num
         self.max_num = max_num
@@ -24,6 +36,8 @@ class GameEngine:
         self.qa_history = []
         self.question_count = 0
         self.secret_number = None  # For mode 2 (user guesses)
+        # question -> (snapshot, yes_mask, no_mask) for the current candidates
+        self.previews = {}
     
     def reset(self):
         """Reset game state for a new game."""
@@ -31,6 +45,7 @@ class GameEngine:
         self.qa_history = []
         self.question_count = 0
         self.secret_number = None
+        self.previews = {}
     
     def set_secret_number(self, number):
         """Set the secret number (for mode 2)."""
@@ -38,17 +53,64 @@ class GameEngine:
             raise ValueError(f"Number must be between {self.min_num} and {self.max_num}")
         self.secret_number = number
     
-    def record_qa(self, question, answer):
+    def record_qa(self, question, answer, deadline=None):
         """
         Record a question and answer pair.
         
+        The range is filtered first so that a deadline failure leaves the game
+        state unchanged.
+        
         Args:
             question: The question asked
             answer: The answer given ("Yes" or "No")
+            deadline: Optional Deadline for the request
         """
+        preview = self.previews.get(question)
+        if preview is not None and preview[0] == self.range_manager.snapshot():
+            # Already evaluated by preview() against these same candidates; numbers
+            # resolved for neither answer are kept
+            snapshot, yes_mask, no_mask = preview
+            self.range_manager.apply_mask(snapshot & ~(no_mask if answer == "Yes" else yes_mask))
+        else:
+            self.range_manager.apply_filter(question, answer, deadline=deadline)
+        # The candidates changed, so earlier previews no longer apply
+        self.previews = {}
         self.qa_history.append((question, answer))
         self.question_count += 1
-        self.range_manager.apply_filter(question, answer)
+    
+    def preview(self, question, deadline=None):
+        """
+        Count how many numbers would remain for each answer, without recording the question.
+        
+        The split is cached, so asking the same question next reuses it
+        instead of filtering again.
+        
+        Args:
+            question: The question to evaluate
+            deadline: Optional Deadline for the request
+        
+        Returns:
+            dict: "possible_count", "yes_count", "no_count" and "unresolved_count"
+            (numbers the LLM could not answer for; they stay possible after either
+            answer), which add up to "possible_count"
+        """
+        with span("GameEngine.preview") as current:
+            cached = self.previews.get(question)
+            if cached is None or cached[0] != self.range_manager.snapshot():
+                cached = self.range_manager.evaluate(question, deadline=deadline)
+                if len(self.previews) >= PREVIEW_CACHE_SIZE:
+                    self.previews.pop(next(iter(self.previews)))
+                self.previews[question] = cached
+            else:
+                current.set(cached=True)
+            snapshot, yes_mask, no_mask = cached
+            possible, yes, no = (bin(mask).count("1") for mask in (snapshot, yes_mask, no_mask))
+            return {
+                "possible_count": possible,
+                "yes_count": yes,
+                "no_count": no,
+                "unresolved_count": possible - yes - no,
+            }
     
     def get_possible_numbers(self):
         """Get the current set of possible numbers."""
@@ -66,6 +128,18 @@ class GameEngine:
         """Get number of questions remaining."""
         return max(0, self.max_questions - self.question_count)
     
+    def next_optimal_question(self):
+        """
+        Get the solver's optimal next question for the remaining numbers.
+        
+        Returns:
+            str: The question text, or None if no solver is set or the set is not in its table
+        """
+        if self.solver is None:
+            return None
+        predicate = self.solver.next_question(self.get_possible_numbers())
+        return predicate.question if predicate else None
+    
     def make_final_guess(self):
         """
         Make final guess based on remaining possible numbers.
@@ -81,6 +155,11 @@ class GameEngine:
         if len(possible) == 1:
             return possible[0]
         
+        if self.solver is not None:
+            guess = self.solver.best_guess(possible)
+            if guess is not None:
+                return guess
+        
         # If multiple possibilities, return the first one (could be random)
         import random
         return random.choice(possible)
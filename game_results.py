@@ -0,0 +1,147 @@
+"""Append-only log of finished games, one compact JSON line per game.
+
+Each line holds the game's outcome and its full ``qa_history``, so the file can
+be fed straight to ``truth_table.collect_questions``::
+
+    {"ts":1760000000.123,"game_id":"...","mode":2,"won":true,"questions":4,"guesses":1,"secret":42,"qa_history":[["Is it even?","Yes"],...]}
+
+Lines are written with one ``O_APPEND`` write each, so several worker
+processes can share the file. Readers address the log by byte offset: a
+cursor is the offset just past the last line consumed, and reading never
+loads more than one line at a time.
+"""
+
+import json
+import os
+import re
+import time
+
+from config import GAME_RESULTS_FILE
+
+# Lines are appended in finishing order; allow this much clock skew between
+# writers when seeking by time.
+TIME_SLACK_SECONDS = 5.0
+
+_TS_PREFIX = re.compile(rb'^\{"ts":(-?[0-9.eE+-]+)')
+
+
+def _line_time(line):
+    match = _TS_PREFIX.match(line)
+    return float(match.group(1)) if match else json.loads(line)["ts"]
+
+
+class GameResultLog:
+    """Records finished games and reads them back by cursor and time range."""
+
+    def __init__(self, path=GAME_RESULTS_FILE):
+        """
+        Initialize the log (the file is created on the first append).
+
+        Args:
+            path: Path of the JSON Lines file
+        """
+        self.path = path
+        self._fd = None
+
+    def append(self, game_id, mode, won, questions, guesses, secret_number, qa_history):
+        """
+        Record one finished game.
+
+        Args:
+            game_id: Game id (None for CLI games)
+            mode: Game mode (1 or 2)
+            won: True if the game was won
+            questions: Questions asked
+            guesses: Guesses used
+            secret_number: The secret number
+            qa_history: List of (question, answer) pairs
+        """
+        record = {
+            "ts": round(time.time(), 3),
+            "game_id": game_id,
+            "mode": mode,
+            "won": won,
+            "questions": questions,
+            "guesses": guesses,
+            "secret": secret_number,
+            "qa_history": [list(qa) for qa in qa_history],
+        }
+        data = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, data)
+        except OSError as e:
+            print(f"Warning: Could not record game result: {e}")
+
+    def size(self):
+        """Return the current size of the log in bytes (0 if it does not exist yet)."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def read(self, cursor=0, since=None, until=None, limit=None):
+        """
+        Iterate over recorded games.
+
+        Args:
+            cursor: Byte offset to start from (a cursor returned earlier, or 0)
+            since: Only games finished at or after this Unix time
+            until: Only games finished before this Unix time
+            limit: Maximum number of games
+
+        Yields:
+            tuple: (line as bytes including the newline, cursor after the line)
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            start = self._align(f, cursor)
+            if since is not None:
+                start = max(start, self._seek_time(f, since - TIME_SLACK_SECONDS, start))
+            f.seek(start)
+            position = start
+            count = 0
+            while limit is None or count < limit:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # End of file, or a line still being written
+                    return
+                position += len(line)
+                ts = _line_time(line) if since is not None or until is not None else None
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts >= until:
+                    if ts >= until + TIME_SLACK_SECONDS:
+                        return
+                    continue
+                count += 1
+                yield line, position
+
+    def _align(self, f, offset):
+        """Move an offset that points into a line to the start of the next line."""
+        if offset <= 0:
+            return 0
+        f.seek(offset - 1)
+        if f.read(1) == b"\n":
+            return offset
+        f.readline()
+        return f.tell()
+
+    def _seek_time(self, f, ts, lo):
+        """Binary search for the offset of the first line at or after ``ts`` (lines are in time order)."""
+        f.seek(0, os.SEEK_END)
+        hi = f.tell()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line_start = self._align(f, mid)
+            f.seek(line_start)
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                hi = mid
+            elif _line_time(line) < ts:
+                lo = line_start + len(line)
+            else:
+                hi = mid
+        return self._align(f, lo)
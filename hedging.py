@@ -0,0 +1,165 @@
+"""Request hedging to cut the tail latency of LLM calls.
+
+When a call has not returned within an adaptive percentile of recent latencies,
+a duplicate is sent and whichever finishes first is used. The loser is
+cancelled if it has not started yet; a request already in flight cannot be
+aborted by the synchronous client, so it runs to completion and its result is
+discarded. Each attempt holds its own concurrency slot until it has actually
+finished (see ``release`` and ``acquire_hedge`` of :meth:`RequestHedger.call`),
+so a losing request still counts against the limits while it runs, and no
+duplicate is sent when no slot is free. Hedges are capped at a fraction of all
+calls so a slow upstream does not double spend.
+
+Latencies are tracked per kind of call (``kind`` of :meth:`RequestHedger.call`,
+e.g. single answers vs. filter batches), so a slow batch is measured against
+other batches rather than being hedged against the much shorter answer calls.
+"""
+
+import threading
+import time
+from collections import deque
+
+from config import HEDGE_ENABLED, HEDGE_MAX_RATE, HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE
+
+
+class RequestHedger:
+    """Runs calls with an optional hedged duplicate."""
+
+    def __init__(self, enabled=HEDGE_ENABLED, percentile=HEDGE_PERCENTILE, max_rate=HEDGE_MAX_RATE,
+                 min_delay=HEDGE_MIN_DELAY, min_samples=HEDGE_MIN_SAMPLES, window=200, max_workers=32):
+        """
+        Initialize the hedger.
+
+        Args:
+            enabled: When False, calls run directly on the caller's thread
+            percentile: Latency percentile (0-1) after which a hedge is sent
+            max_rate: Maximum fraction of calls that may be hedged
+            min_delay: Lower bound on the hedge delay, in seconds
+            min_samples: Latency samples needed before hedging starts
+            window: Number of recent latencies considered per kind of call
+            max_workers: Threads available for primary and hedged calls
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies = {}  # kind -> deque of recent latencies
+        self._lock = threading.Lock()
+        self._executor = None
+        if enabled:
+            # concurrent.futures (and logging with it) is only imported when hedging is on
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self.stats = {
+            "calls": 0, "hedged": 0, "hedge_wins": 0, "hedges_skipped_budget": 0, "hedges_skipped_no_slot": 0,
+        }
+
+    def hedge_delay(self, kind=None):
+        """Return the current hedge delay of a kind of call in seconds, or None while there are too few samples."""
+        with self._lock:
+            latencies = self._latencies.get(kind, ())
+            if len(latencies) < self.min_samples:
+                return None
+            ordered = sorted(latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile))
+        return max(self.min_delay, ordered[index])
+
+    def _record(self, kind, latency):
+        with self._lock:
+            latencies = self._latencies.get(kind)
+            if latencies is None:
+                latencies = self._latencies[kind] = deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def _timed(self, fn, kind):
+        started = time.monotonic()
+        result = fn()
+        self._record(kind, time.monotonic() - started)
+        return result
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.stats["hedged"] + 1 > self.max_rate * self.stats["calls"]:
+                self.stats["hedges_skipped_budget"] += 1
+                return False
+            return True
+
+    def call(self, fn, release=None, acquire_hedge=None, kind=None):
+        """
+        Run ``fn``, hedging it if it is slow.
+
+        Args:
+            fn: Zero-argument callable performing the request
+            release: Optional callable run once the primary attempt has finished,
+                possibly after this call returned (releases the caller's slot)
+            acquire_hedge: Optional callable taking a slot for a duplicate; it
+                returns the slot's release callable, or None to skip the hedge
+            kind: Kind of call whose latencies set the hedge delay (e.g. the work class)
+
+        Returns:
+            The result of whichever attempt finished first successfully
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+        delay = self.hedge_delay(kind) if self.enabled else None
+        if delay is None:
+            try:
+                return self._timed(fn, kind)
+            finally:
+                if release is not None:
+                    release()
+
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        primary = self._submit(fn, kind, release)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._may_hedge():
+            return primary.result()
+        hedge_release = acquire_hedge() if acquire_hedge is not None else None
+        if acquire_hedge is not None and hedge_release is None:
+            with self._lock:
+                self.stats["hedges_skipped_no_slot"] += 1
+            return primary.result()
+        with self._lock:
+            self.stats["hedged"] += 1
+
+        hedge = self._submit(fn, kind, hedge_release)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _submit(self, fn, kind, release):
+        """Run an attempt on the executor; ``release`` runs when it finishes or is cancelled."""
+        try:
+            future = self._executor.submit(self._timed, fn, kind)
+        except BaseException:
+            if release is not None:
+                release()
+            raise
+        if release is not None:
+            future.add_done_callback(lambda _: release())
+        return future
+
+    def get_stats(self):
+        """Return hedge counters, rates and the current delay of each kind of call."""
+        with self._lock:
+            stats = dict(self.stats)
+            kinds = list(self._latencies)
+        stats["enabled"] = self.enabled
+        stats["hedge_rate"] = stats["hedged"] / stats["calls"] if stats["calls"] else 0.0
+        stats["hedge_win_rate"] = stats["hedge_wins"] / stats["hedged"] if stats["hedged"] else 0.0
+        stats["hedge_delay"] = {kind: self.hedge_delay(kind) for kind in kinds} if self.enabled else None
+        return stats
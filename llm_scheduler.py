@@ -0,0 +1,285 @@
+"""Priority scheduling of LLM calls.
+
+Every call to the LLM API takes a slot from :class:`LLMScheduler` first.
+Calls belong to a priority class:
+
+- ``interactive``: a player is waiting on the answer (e.g. determine_answer_for_number)
+- ``filter``: candidate filtering batches, slower and bulkier
+- ``background``: speculative work nobody waits on (prefetch)
+
+A free slot always goes to the highest-priority class with queued work that is
+under its own concurrency limit, so interactive calls never queue behind bulk
+filtering. The filter and background limits are kept below the total, which
+leaves slots that only interactive calls can use. Within a class, slots are
+handed out round-robin across sessions, so one game filtering a large range
+cannot starve the others.
+
+The class and session come from the caller's context (see :func:`scheduling`).
+Background context demotes every call made inside it. Work shared by several
+callers (see singleflight.py) runs in the highest class among them
+(:class:`SharedClass`), so a real request joining a prefetch is not demoted.
+"""
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from config import (
+    LLM_BACKGROUND_CONCURRENCY, LLM_FILTER_CONCURRENCY, LLM_INTERACTIVE_CONCURRENCY, LLM_MAX_CONCURRENCY,
+)
+from deadline import DeadlineExceeded
+
+INTERACTIVE = "interactive"
+FILTER = "filter"
+BACKGROUND = "background"
+# Highest priority first
+PRIORITY_CLASSES = (INTERACTIVE, FILTER, BACKGROUND)
+
+# Longest single wait, so a cancelled deadline is noticed promptly
+_POLL_SECONDS = 0.25
+
+_context = contextvars.ContextVar("llm_scheduling", default=(None, None))
+
+
+@contextmanager
+def scheduling(work_class=None, session=None):
+    """
+    Set the priority class and session for the LLM calls made inside the block.
+
+    Args:
+        work_class: Class that calls in the block are demoted to (None keeps the
+            enclosing class), or a SharedClass; a call never runs above its own class
+        session: Key used for fair queuing, usually the game id
+    """
+    outer_class, outer_session = _context.get()
+    token = _context.set((work_class or outer_class, session if session is not None else outer_session))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def context_class():
+    """Return the class the current context demotes calls to (None: no demotion)."""
+    work_class = _context.get()[0]
+    return work_class.work_class() if isinstance(work_class, SharedClass) else work_class
+
+
+class SharedClass:
+    """Context class of work shared by several callers: the highest of their classes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._classes = []
+
+    def join(self):
+        """Add the calling context's class to the shared work."""
+        work_class = context_class()
+        with self._lock:
+            self._classes.append(work_class)
+
+    def work_class(self):
+        """Return the highest class joined so far (None if a caller is not demoted at all)."""
+        with self._lock:
+            if not self._classes or None in self._classes:
+                return None
+            return min(self._classes, key=PRIORITY_CLASSES.index)
+
+
+class _Waiter:
+    __slots__ = ("event", "granted", "enqueued_at")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+
+class LLMScheduler:
+    """Grants LLM call slots by priority class, per-class limit and session round-robin."""
+
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, limits=None, window=1000):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency: Calls in flight across all classes
+            limits: Class -> calls in flight for that class (defaults from config)
+            window: Recent wait times kept per class for percentiles
+        """
+        self.max_concurrency = max_concurrency
+        self.limits = limits or {
+            INTERACTIVE: LLM_INTERACTIVE_CONCURRENCY,
+            FILTER: LLM_FILTER_CONCURRENCY,
+            BACKGROUND: LLM_BACKGROUND_CONCURRENCY,
+        }
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = {c: 0 for c in PRIORITY_CLASSES}
+        # Class -> session -> waiters; sessions are served in rotation
+        self._queues = {c: OrderedDict() for c in PRIORITY_CLASSES}
+        self._queued = {c: 0 for c in PRIORITY_CLASSES}
+        self._waits = {c: deque(maxlen=window) for c in PRIORITY_CLASSES}
+        self.stats = {
+            c: {"calls": 0, "queued": 0, "timeouts": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for c in PRIORITY_CLASSES
+        }
+
+    def effective_class(self, work_class):
+        """Return the class a call of ``work_class`` runs in under the current context."""
+        demoted_to = context_class()
+        if demoted_to is None:
+            return work_class
+        return max(work_class, demoted_to, key=PRIORITY_CLASSES.index)
+
+    @contextmanager
+    def slot(self, work_class=INTERACTIVE, deadline=None):
+        """
+        Hold an LLM call slot for the duration of the block.
+
+        Args:
+            work_class: Priority class of the call (demoted by the current context)
+            deadline: Optional Deadline bounding the time spent queued
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while queued
+        """
+        work_class, release = self.acquire(work_class, deadline)
+        try:
+            yield work_class
+        finally:
+            release()
+
+    def acquire(self, work_class=INTERACTIVE, deadline=None):
+        """
+        Take an LLM call slot, waiting in the queue for it.
+
+        Unlike :meth:`slot`, the slot may be released from another thread, so it
+        can be held until a request running in the background has finished.
+
+        Args:
+            work_class: Priority class of the call (demoted by the current context)
+            deadline: Optional Deadline bounding the time spent queued
+
+        Returns:
+            tuple: (effective class, release callable; calls after the first do nothing)
+
+        Raises:
+            DeadlineExceeded: If the deadline passes while queued
+        """
+        work_class = self.effective_class(work_class)
+        self._acquire(work_class, _context.get()[1], deadline)
+        return work_class, self._releaser(work_class)
+
+    def try_acquire(self, work_class):
+        """
+        Take a slot for ``work_class`` only if one is free without queueing.
+
+        A slot is never taken ahead of calls already queued in the same or a
+        higher class, so optional work (hedged duplicates) never delays them.
+
+        Returns:
+            callable: Release callable for the slot, or None if no slot is free
+        """
+        with self._lock:
+            if self._in_flight >= self.max_concurrency or self._running[work_class] >= self.limits[work_class]:
+                return None
+            for queued_class in PRIORITY_CLASSES[:PRIORITY_CLASSES.index(work_class) + 1]:
+                if self._queued[queued_class]:
+                    return None
+            self._in_flight += 1
+            self._running[work_class] += 1
+        return self._releaser(work_class)
+
+    def _releaser(self, work_class):
+        released = []
+
+        def release():
+            with self._lock:
+                if released:
+                    return
+                released.append(True)
+                self._in_flight -= 1
+                self._running[work_class] -= 1
+                self._dispatch_locked()
+
+        return release
+
+    def get_stats(self):
+        """Return per-class queue and wait-time statistics."""
+        with self._lock:
+            result = {"max_concurrency": self.max_concurrency, "in_flight": self._in_flight, "classes": {}}
+            for c in PRIORITY_CLASSES:
+                stats = dict(self.stats[c])
+                waits = sorted(self._waits[c])
+                stats.update(
+                    limit=self.limits[c],
+                    running=self._running[c],
+                    waiting=self._queued[c],
+                    waiting_sessions=len(self._queues[c]),
+                    avg_wait_ms=stats["wait_seconds"] / stats["calls"] * 1000 if stats["calls"] else 0.0,
+                    p50_wait_ms=waits[len(waits) // 2] * 1000 if waits else 0.0,
+                    p95_wait_ms=waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+                )
+                result["classes"][c] = stats
+        return result
+
+    def _acquire(self, work_class, session, deadline):
+        waiter = _Waiter()
+        with self._lock:
+            self._queues[work_class].setdefault(session, deque()).append(waiter)
+            self._queued[work_class] += 1
+            self._dispatch_locked()
+            if waiter.granted:
+                return
+            self.stats[work_class]["queued"] += 1
+        while True:
+            timeout = _POLL_SECONDS if deadline is None else min(_POLL_SECONDS, deadline.remaining())
+            if waiter.event.wait(timeout):
+                return
+            if deadline is not None and deadline.expired():
+                with self._lock:
+                    if waiter.granted:
+                        return
+                    self._withdraw_locked(work_class, session, waiter)
+                    self.stats[work_class]["timeouts"] += 1
+                raise DeadlineExceeded(f"Request deadline exceeded while queued for an LLM slot ({work_class})")
+
+    def _dispatch_locked(self):
+        """Grant free slots to queued calls, highest priority class first."""
+        while self._in_flight < self.max_concurrency:
+            for work_class in PRIORITY_CLASSES:
+                if self._queued[work_class] and self._running[work_class] < self.limits[work_class]:
+                    break
+            else:
+                return
+            sessions = self._queues[work_class]
+            session, waiters = next(iter(sessions.items()))
+            waiter = waiters.popleft()
+            if waiters:
+                # Next turn goes to the next session
+                sessions.move_to_end(session)
+            else:
+                del sessions[session]
+            self._queued[work_class] -= 1
+            self._in_flight += 1
+            self._running[work_class] += 1
+            wait = time.monotonic() - waiter.enqueued_at
+            stats = self.stats[work_class]
+            stats["calls"] += 1
+            stats["wait_seconds"] += wait
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+            self._waits[work_class].append(wait)
+            waiter.granted = True
+            waiter.event.set()
+
+    def _withdraw_locked(self, work_class, session, waiter):
+        waiters = self._queues[work_class].get(session)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self._queues[work_class][session]
+        self._queued[work_class] -= 1
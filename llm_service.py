@@ -1,18 +1,312 @@
 """LLM Service for question generation and answer validation using OpenAI."""
 
+import hashlib
 import json
-from openai import OpenAI
-from config import OPENAI_API_KEY, OPENAI_MODEL
+import threading
+import time
+from collections import OrderedDict
+from config import (
+    OPENAI_API_KEY, OPENAI_MODEL, LLM_BACKEND, FILTER_JSON_MODE, ANSWER_CACHE_SIZE, NEAR_DUPLICATE_THRESHOLD,
+    LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY, LLM_CONNECT_TIMEOUT,
+    LLM_REQUEST_TIMEOUT, LLM_MAX_RETRIES, FILTER_RECOVERY_CALLS, FILTER_MIN_BISECT_SIZE,
+)
+from deadline import DeadlineExceeded
+from circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from adaptive_batching import AdaptiveBatchSizer
+from hedging import RequestHedger
+from llm_scheduler import FILTER, INTERACTIVE, LLMScheduler
+from model_router import ModelRouter
+from predicates import match_question
+from question_canonicalizer import QuestionIndex, canonicalize
+from range_codec import decode_numbers, encode_numbers
+from singleflight import SingleFlight
+from tracing import current_span, span
+
+# Attempts per filter batch (one retry) before the batch is bisected
+FILTER_BATCH_ATTEMPTS = 2
+
+
+class _CallBudget:
+    """Counts down the extra LLM calls one filter may spend recovering from bad replies."""
+    
+    __slots__ = ("remaining",)
+    
+    def __init__(self, calls):
+        self.remaining = calls
+    
+    def take(self):
+        """Use one call; return False when the budget is spent."""
+        if self.remaining <= 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+class FilterProtocolError(ValueError):
+    """Raised when a structured filter reply does not match the expected schema."""
+
+
+def parse_filter_reply(content, batch):
+    """
+    Strictly parse a structured filter reply.
+    
+    The reply must be a JSON object ``{"yes": "...", "no": "..."}`` whose values
+    use the compact range encoding (see range_codec) and together partition the
+    batch exactly: every number appears once, in one of the two lists.
+    
+    Args:
+        content: Raw reply text
+        batch: List of numbers that were asked about
+    
+    Returns:
+        set: Numbers whose answer is "Yes"
+    
+    Raises:
+        FilterProtocolError: If the reply does not match the schema
+    """
+    text = (content or "").strip()
+    if text.startswith("```"):
+        text = text.strip("`").strip()
+        if text.startswith("json"):
+            text = text[4:].strip()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise FilterProtocolError(f"Reply is not JSON: {content!r}") from e
+    if not isinstance(data, dict) or not isinstance(data.get("yes"), str) or not isinstance(data.get("no"), str):
+        raise FilterProtocolError(f"Reply must have string 'yes' and 'no' fields: {content!r}")
+    try:
+        # Only numbers of the batch are valid, so larger runs are rejected before expanding
+        low, high = min(batch), max(batch)
+        yes = decode_numbers(data["yes"], low, high)
+        no = decode_numbers(data["no"], low, high)
+    except ValueError as e:
+        raise FilterProtocolError(str(e)) from e
+    yes_set, no_set = set(yes), set(no)
+    if len(yes_set) != len(yes) or len(no_set) != len(no) or yes_set & no_set:
+        raise FilterProtocolError("Reply lists a number more than once")
+    if yes_set | no_set != set(batch):
+        raise FilterProtocolError(f"Reply covers {len(yes_set | no_set)} numbers, expected the {len(batch)} asked")
+    return yes_set
+
+
+def _pooled_http_client():
+    """Build the shared HTTP transport with explicit pool sizing, keep-alive and timeouts."""
+    import httpx
+    
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    )
+
+
+def candidate_fingerprint(numbers):
+    """Return a short fingerprint identifying a candidate set."""
+    return hashlib.blake2b(encode_numbers(numbers).encode("ascii"), digest_size=12).hexdigest()
+
 
 class LLMService:
     """Service for interacting with OpenAI API for question generation and validation."""
     
-    def __init__(self):
-        """Initialize the OpenAI client."""
-        if not OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY not set. Please set it in environment variables or .env file.")
-        self.client = OpenAI(api_key=OPENAI_API_KEY)
+    def __init__(self, truth_table=None):
+        """
+        Initialize the OpenAI client.
+        
+        Args:
+            truth_table: Optional TruthTableStore consulted before calling the LLM
+        """
+        if LLM_BACKEND == "local":
+            from local_llm import LocalChatClient
+            self.client = LocalChatClient()
+        else:
+            if not OPENAI_API_KEY:
+                raise ValueError("OPENAI_API_KEY not set. Please set it in environment variables or .env file.")
+            # Imported here so that startup and the local backend don't pay for the SDK
+            from openai import OpenAI
+            self.client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                http_client=_pooled_http_client(),
+                max_retries=LLM_MAX_RETRIES,
+                timeout=LLM_REQUEST_TIMEOUT,
+            )
         self.model = OPENAI_MODEL
+        self.truth_table = truth_table
+        # Resolved answers per canonical question: key -> {number: "Yes"/"No"}
+        self.question_index = QuestionIndex(threshold=NEAR_DUPLICATE_THRESHOLD)
+        self._answers = OrderedDict()
+        self._answers_lock = threading.Lock()
+        self._cache_stats = {"number_hits": 0, "number_misses": 0}
+        self._filter_stats = {"batches": 0, "retries": 0, "bisections": 0, "unresolved_numbers": 0}
+        self.batch_sizer = AdaptiveBatchSizer()
+        self.hedger = RequestHedger()
+        self.router = ModelRouter()
+        # Concurrent identical requests share one in-flight computation
+        self.singleflight = SingleFlight()
+        # Fails fast during outages; questions the predicate library knows are then answered locally
+        self.breaker = CircuitBreaker()
+        # Interactive answers go ahead of filtering and background work
+        self.scheduler = LLMScheduler()
+        self._degraded_stats = {"local_answers": 0, "local_filters": 0, "unanswerable": 0}
+    
+    def _chat(self, tier, deadline=None, work_class=INTERACTIVE, **kwargs):
+        """
+        Send a chat completion request to a model tier, hedging it when it runs slow.
+        
+        The call first waits for a slot from the scheduler; a hedged duplicate
+        needs a free slot of its own. Hedge delays are tracked per work class,
+        so filter batches and single answers each have their own latency window.
+        
+        Args:
+            tier: Model tier chosen by the router
+            deadline: Optional Deadline; the call's timeout is capped to the time left
+            work_class: Scheduler priority class of the call
+            **kwargs: Arguments for ``chat.completions.create`` (without ``model``)
+        
+        Raises:
+            DeadlineExceeded: If the deadline has passed or expires during the call
+            CircuitOpenError: If the circuit breaker is open
+        """
+        kwargs["model"] = self.router.model(tier)
+        if deadline is not None:
+            deadline.check("LLM call")
+        # The slot is held until the request has finished, even when a hedged
+        # duplicate returned first and this call is already done
+        call_class = work_class
+        work_class, release = self.scheduler.acquire(work_class, deadline)
+        try:
+            if deadline is not None:
+                kwargs["timeout"] = deadline.timeout(LLM_REQUEST_TIMEOUT)
+            self.breaker.check()
+        except BaseException:
+            release()
+            raise
+        return self._send(tier, deadline, call_class, work_class, kwargs, release)
+    
+    def _send(self, tier, deadline, call_class, work_class, kwargs, release):
+        with span("llm.chat", tier=tier, model=kwargs["model"], work_class=work_class) as current:
+            started = time.monotonic()
+            try:
+                response = self.hedger.call(
+                    lambda: self.client.chat.completions.create(**kwargs),
+                    release=release,
+                    acquire_hedge=lambda: self.scheduler.try_acquire(work_class),
+                    kind=call_class,
+                )
+            except Exception as e:
+                latency = time.monotonic() - started
+                self.breaker.record(False, latency)
+                self.router.record(tier, latency, 0, error=True)
+                if deadline is not None and deadline.expired():
+                    raise DeadlineExceeded(f"Request deadline exceeded during LLM call: {e}") from e
+                raise
+            latency = time.monotonic() - started
+            self.breaker.record(True, latency)
+            usage = getattr(response, "usage", None)
+            tokens = getattr(usage, "total_tokens", 0) or 0
+            current.set(tokens=tokens)
+            self.router.record(tier, latency, tokens)
+            return response
+    
+    def _cached_answers(self, question):
+        """Return the known answers of the resolved question matching ``question`` (may be empty)."""
+        key = self.question_index.lookup(question)
+        if key is None:
+            return {}
+        with self._answers_lock:
+            answers = self._answers.get(key)
+            if answers is None:
+                return {}
+            self._answers.move_to_end(key)
+            return dict(answers)
+    
+    def _remember_answers(self, question, answers):
+        """Store resolved answers for a question, evicting the least recently used question."""
+        if not answers:
+            return
+        key = self.question_index.add(question)
+        with self._answers_lock:
+            self._answers.setdefault(key, {}).update(answers)
+            self._answers.move_to_end(key)
+            while len(self._answers) > ANSWER_CACHE_SIZE:
+                self._answers.popitem(last=False)
+    
+    def _count_cache(self, hits, misses):
+        with self._answers_lock:
+            self._cache_stats["number_hits"] += hits
+            self._cache_stats["number_misses"] += misses
+    
+    def _count_filter(self, name, amount=1):
+        with self._answers_lock:
+            self._filter_stats[name] += amount
+    
+    def _local_predicate(self, question, error):
+        """
+        Get the local evaluator for a question while the LLM is unavailable.
+        
+        Raises:
+            CircuitOpenError: If the question cannot be evaluated locally
+        """
+        predicate = match_question(question)
+        if predicate is None:
+            with self._answers_lock:
+                self._degraded_stats["unanswerable"] += 1
+            raise CircuitOpenError(
+                f"{error} The question {question!r} can only be answered by the LLM; "
+                "simple arithmetic questions (e.g. 'Is it even?', 'Is it less than 200?') still work.",
+                retry_after=error.retry_after,
+            ) from error
+        return predicate
+    
+    def local_predicate(self, question):
+        """
+        Return the local evaluator to use instead of the LLM right now, if any.
+        
+        While the circuit breaker is open, questions that predicates.py
+        recognizes are evaluated locally; callers holding a whole range (see
+        ``RangeManager.apply_predicate``) can then filter it in one bitmap.
+        
+        Returns:
+            Predicate: The question's predicate, or None if the LLM is available
+            or the question is not recognized
+        """
+        if self.breaker.state != OPEN:
+            return None
+        predicate = match_question(question)
+        if predicate is not None:
+            with self._answers_lock:
+                self._degraded_stats["local_filters"] += 1
+        return predicate
+    
+    def get_stats(self):
+        """
+        Get runtime statistics for the service.
+        
+        Returns:
+            dict: Statistics grouped by feature
+        """
+        with self._answers_lock:
+            cache = dict(self._cache_stats)
+            cache["cached_questions"] = len(self._answers)
+        lookups = cache["number_hits"] + cache["number_misses"]
+        cache["number_hit_rate"] = cache["number_hits"] / lookups if lookups else 0.0
+        cache["questions"] = self.question_index.get_stats()
+        with self._answers_lock:
+            filters = dict(self._filter_stats)
+            degraded = dict(self._degraded_stats)
+        filters["models"] = self.batch_sizer.get_stats()
+        return {
+            "cache": cache,
+            "filter": filters,
+            "hedging": self.hedger.get_stats(),
+            "tiers": self.router.get_stats(),
+            "singleflight": self.singleflight.get_stats(),
+            "breaker": {**self.breaker.get_stats(), **degraded},
+            "scheduler": self.scheduler.get_stats(),
+        }
     
     def generate_question(self, possible_numbers, qa_history):
         """
@@ -57,8 +351,8 @@ Examples of good questions:
 Return ONLY the question text, nothing else. Do not include "Q:" or any other prefix."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self._chat(
+                self.router.tier_for("generate"),
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that generates mathematical questions for a number guessing game."},
                     {"role": "user", "content": prompt}
@@ -99,8 +393,8 @@ Respond with ONLY "Yes" if the answer is correct, or "No" if the answer is incor
  not include any explanation or other text."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self._chat(
+                self.router.tier_for("validate", user_question),
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that validates mathematical answers."},
                     {"role": "user", "content": prompt}
@@ -137,8 +431,8 @@ Respond with ONLY "Yes" if the answer is correct, or "No" if the answer is incor
  not include any explanation or other text."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self._chat(
+                self.router.tier_for("validate", question),
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that validates mathematical answers."},
                     {"role": "user", "content": prompt}
@@ -151,17 +445,55 @@ Respond with ONLY "Yes" if the answer is correct, or "No" if the answer is incor
         except Exception as e:
             raise Exception(f"Failed to validate answer: {str(e)}")
     
-    def determine_answer_for_number(self, number, question):
+    def determine_answer_for_number(self, number, question, deadline=None):
         """
         Determine the correct Yes/No answer for a question about a specific number.
         
         Args:
             number: The number being evaluated
             question: The mathematical question asked
+            deadline: Optional Deadline for the request
         
         Returns:
             str: "Yes" or "No" - the correct answer for the question about the number
         """
+        with span("llm.determine_answer", number=number) as current:
+            if self.truth_table is not None:
+                known = self.truth_table.answer(question, number)
+                if known is not None:
+                    current.set(source="truth_table")
+                    return known
+            
+            cached = self._cached_answers(question).get(number)
+            self._count_cache(int(cached is not None), int(cached is None))
+            if cached is not None:
+                current.set(source="cache")
+                return cached
+            
+            current.set(source="llm")
+            key = ("answer", canonicalize(question), number)
+            try:
+                if self.breaker.state == OPEN:
+                    raise self.breaker.open_error()
+                return self._coalesce(key, lambda shared: self._determine_answer_uncached(number, question, shared), deadline)
+            except CircuitOpenError as e:
+                predicate = self._local_predicate(question, e)
+                with self._answers_lock:
+                    self._degraded_stats["local_answers"] += 1
+                current.set(source="local")
+                return predicate.answer(number)
+    
+    def _coalesce(self, key, fn, deadline):
+        """
+        Run ``fn(shared_deadline)`` through single-flight.
+        
+        The shared work runs until the latest deadline of the requests waiting
+        for it; each request stops waiting when its own deadline passes.
+        """
+        return self.singleflight.do(key, fn, deadline)
+    
+    def _determine_answer_uncached(self, number, question, deadline=None):
+        """Ask the LLM for the answer for one number and cache it."""
         prompt = f"""You are mathametical and numerical computational expert. You are determining the correct answer for a question about a specific number in a number guessing game.
 
 Secret number: {number}
@@ -171,29 +503,40 @@ Determine what the correct answer (Yes or No) should be for this question about
 
 Respond with ONLY "Yes" or "No", nothing else. Do not include any explanation or other text."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that determines correct mathematical answers."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=10
-            )
-            result = response.choices[0].message.content.strip()
+        tier = self.router.tier_for("answer", question)
+        while True:
+            try:
+                response = self._chat(
+                    tier,
+                    deadline,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant that determines correct mathematical answers."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,
+                    max_tokens=10
+                )
+                result = response.choices[0].message.content.strip()
+            except (DeadlineExceeded, CircuitOpenError):
+                raise
+            except Exception as e:
+                raise Exception(f"Failed to determine answer: {str(e)}")
             # Normalize to Yes/No
             if result.lower().startswith("yes"):
-                return "Yes"
+                answer = "Yes"
             elif result.lower().startswith("no"):
-                return "No"
+                answer = "No"
             else:
-                # Fallback if LLM returns unexpected format
-                raise Exception(f"Unexpected response format: {result}")
-        except Exception as e:
-            raise Exception(f"Failed to determine answer: {str(e)}")
+                # Unexpected format: escalate to a stronger model, if any
+                tier = self.router.escalate(tier)
+                if tier is None:
+                    raise Exception(f"Failed to determine answer: Unexpected response format: {result}")
+                continue
+            break
+        self._remember_answers(question, {number: answer})
+        return answer
     
-    def filter_numbers(self, numbers, question, answer):
+    def filter_numbers(self, numbers, question, answer, deadline=None):
         """
         Filter a set of numbers based on a question and answer using LLM.
         
@@ -201,76 +544,229 @@ Respond with ONLY "Yes" or "No", nothing else. Do not include any explanation or
             numbers: Set or list of numbers to filter
             question: The mathematical question asked
             answer: "Yes" or "No" - the answer given
+            deadline: Optional Deadline; batches that cannot finish in time are not started
         
         Returns:
-            set: Set of numbers that match the question/answer criteria
+            set: Set of numbers that match the question/answer criteria; numbers
+            that could not be resolved are kept
         """
         if not numbers:
             return set()
         
-        numbers_list = sorted(list(numbers))
         expected_answer = answer if answer in ["Yes", "No"] else ("Yes" if answer.lower() in ["yes", "y"] else "No")
+        yes, no = self.split_numbers(numbers, question, deadline=deadline)
+        return set(numbers) - (no if expected_answer == "Yes" else yes)
+    
+    def split_numbers(self, numbers, question, deadline=None):
+        """
+        Split a set of numbers by the answer to a question.
         
-        # For efficiency, batch process numbers
-        # If set is small, check all individually
-        # If set is large, use batch processing
-        filtered_numbers = set()
+        Both answers are resolved at once, so filtering the same numbers for
+        "Yes" and for "No" (even concurrently) costs one filter.
         
-        # Batch size for LLM calls (process multiple numbers at once)
-        batch_size = 50
+        Args:
+            numbers: Set or list of numbers to split
+            question: The mathematical question asked
+            deadline: Optional Deadline; batches that cannot finish in time are not started
+        
+        Returns:
+            tuple: (yes, no) sets; numbers that could not be resolved are in neither
+        """
+        if not numbers:
+            return set(), set()
         
-        for i in range(0, len(numbers_list), batch_size):
-            batch = numbers_list[i:i + batch_size]
+        with span("llm.filter", candidates=len(numbers)) as current:
+            if self.truth_table is not None:
+                known = self.truth_table.filter_numbers(numbers, question, "Yes")
+                if known is not None:
+                    current.set(source="truth_table", yes=len(known))
+                    return known, set(numbers) - known
             
-            # Create prompt for batch filtering
-            numbers_str = ", ".join(map(str, batch))
-            prompt = f"""You are a mathematical and numerical computational expert. You are filtering numbers based on a question and answer.
+            current.set(source="llm")
+            key = ("filter", canonicalize(question), candidate_fingerprint(numbers))
+            try:
+                if self.breaker.state == OPEN:
+                    raise self.breaker.open_error()
+                yes, no = self._coalesce(key, lambda shared: self._split_uncached(numbers, question, shared), deadline)
+            except CircuitOpenError as e:
+                yes, no = self._split_locally(numbers, question, e)
+                current.set(source="local")
+            current.set(yes=len(yes), no=len(no))
+            return set(yes), set(no)
+    
+    async def filter_numbers_async(self, numbers, question, answer, deadline=None):
+        """
+        Asyncio variant of :meth:`filter_numbers`.
+        
+        The blocking work runs on the shared work's own thread and is shared
+        with any concurrent identical request, threaded or async.
+        """
+        if not numbers:
+            return set()
+        
+        expected_answer = answer if answer in ["Yes", "No"] else ("Yes" if answer.lower() in ["yes", "y"] else "No")
+        yes, no = await self.split_numbers_async(numbers, question, deadline=deadline)
+        return set(numbers) - (no if expected_answer == "Yes" else yes)
+    
+    async def split_numbers_async(self, numbers, question, deadline=None):
+        """Asyncio variant of :meth:`split_numbers`."""
+        if not numbers:
+            return set(), set()
+        
+        with span("llm.filter", candidates=len(numbers)) as current:
+            if self.truth_table is not None:
+                known = self.truth_table.filter_numbers(numbers, question, "Yes")
+                if known is not None:
+                    current.set(source="truth_table", yes=len(known))
+                    return known, set(numbers) - known
+            
+            current.set(source="llm")
+            key = ("filter", canonicalize(question), candidate_fingerprint(numbers))
+            try:
+                if self.breaker.state == OPEN:
+                    raise self.breaker.open_error()
+                yes, no = await self.singleflight.do_async(
+                    key, lambda shared: self._split_uncached(numbers, question, shared), deadline
+                )
+            except CircuitOpenError as e:
+                yes, no = self._split_locally(numbers, question, e)
+                current.set(source="local")
+            current.set(yes=len(yes), no=len(no))
+            return set(yes), set(no)
+    
+    def _split_locally(self, numbers, question, error):
+        """Split with the local evaluator while the circuit breaker is open."""
+        predicate = self._local_predicate(question, error)
+        with self._answers_lock:
+            self._degraded_stats["local_filters"] += 1
+        yes = {n for n in numbers if predicate.answer(n) == "Yes"}
+        return yes, set(numbers) - yes
+    
+    def _split_uncached(self, numbers, question, deadline=None):
+        """Split numbers using cached answers and the LLM for the rest."""
+        known = self._cached_answers(question)
+        numbers_list = sorted(n for n in numbers if n not in known)
+        self._count_cache(len(numbers) - len(numbers_list), len(numbers_list))
+        current_span().set(cached=len(numbers) - len(numbers_list), uncached=len(numbers_list))
+        resolved = {n: known[n] for n in numbers if n in known}
+        
+        # For efficiency, batch process numbers; batch sizes adapt to the model's
+        # observed latency and parse success
+        if numbers_list:
+            fetched = {}
+            start = 0
+            tier = self.router.tier_for("filter", question)
+            model = self.router.model(tier)
+            budget = _CallBudget(FILTER_RECOVERY_CALLS)
+            try:
+                for size in self.batch_sizer.plan(model, len(numbers_list)):
+                    if deadline is not None:
+                        deadline.check("filter batch", needed=self.batch_sizer.expected_latency(model))
+                    batch = numbers_list[start:start + size]
+                    fetched.update(self._resolve_batch(question, batch, tier, deadline, budget))
+                    start += size
+            finally:
+                # Keep what was resolved even if the deadline cut the loop short
+                self._remember_answers(question, fetched)
+            resolved.update(fetched)
+        
+        # Numbers that could not be resolved are in neither set
+        yes = frozenset(n for n, a in resolved.items() if a == "Yes")
+        no = frozenset(n for n, a in resolved.items() if a == "No")
+        return yes, no
+    
+    def _resolve_batch(self, question, batch, tier, deadline=None, budget=None):
+        """
+        Resolve the answers for a batch with the structured filter protocol.
+        
+        A malformed or inconsistent reply is retried once for the whole batch on
+        the next stronger model tier; if it fails again the batch is bisected and
+        each half resolved on its own. Retries and bisected halves spend the
+        filter's recovery budget; once it is spent, or the batch is too small to
+        bisect, the batch is left unresolved. Errors other than malformed replies
+        (e.g. API errors) are raised to the caller.
+        
+        Args:
+            question: The mathematical question asked
+            batch: Sorted list of numbers
+            tier: Model tier to start with
+            deadline: Optional Deadline for the request
+            budget: Recovery calls left for the whole filter (default: a fresh budget)
+        
+        Returns:
+            dict: Number -> "Yes"/"No"; numbers that could not be resolved are omitted
+        """
+        if budget is None:
+            budget = _CallBudget(FILTER_RECOVERY_CALLS)
+        with span("llm.filter_batch", size=len(batch)) as current:
+            for attempt in range(FILTER_BATCH_ATTEMPTS):
+                if attempt:
+                    if not budget.take():
+                        break
+                    self._count_filter("retries")
+                    tier = self.router.escalate(tier) or tier
+                current.set(attempts=attempt + 1)
+                try:
+                    return self._request_batch(question, batch, tier, deadline)
+                except FilterProtocolError as e:
+                    error = e
+            
+            if len(batch) < max(2, FILTER_MIN_BISECT_SIZE) or budget.remaining < 2:
+                print(f"Warning: Could not resolve {len(batch)} numbers for {question!r}: {error}")
+                self._count_filter("unresolved_numbers", len(batch))
+                current.set(unresolved=len(batch))
+                return {}
+            self._count_filter("bisections")
+            current.set(bisected=True)
+            mid = len(batch) // 2
+            resolved = {}
+            for half in (batch[:mid], batch[mid:]):
+                if budget.take():
+                    resolved.update(self._resolve_batch(question, half, tier, deadline, budget))
+                else:
+                    self._count_filter("unresolved_numbers", len(half))
+            return resolved
+    
+    def _request_batch(self, question, batch, tier, deadline=None):
+        """Make one structured filter call and return number -> "Yes"/"No"."""
+        self._count_filter("batches")
+        numbers_str = encode_numbers(batch)
+        prompt = f"""You are a mathematical and numerical computational expert. You are answering a question for many numbers at once.
 
 Question: "{question}"
-Expected answer: {expected_answer}
+Numbers: {numbers_str}
 
-Given the following list of numbers: [{numbers_str}]
+Number sets are written compactly as comma-separated runs: "100-149" means every number from 100 to 149,
+"0-48/2" means 0, 2, 4, ..., 48 (start-end/step) and "7" is a single number.
 
-For each number, determine if the answer to the question would be "{expected_answer}".
-Return ONLY a comma-separated list of numbers that match (i.e., numbers where the answer to the question is "{expected_answer}").
+Split the numbers by the answer to the question. Respond with ONLY a JSON object of the form
+{{"yes": "<numbers where the answer is Yes>", "no": "<numbers where the answer is No>"}}
+using the same compact format. Every number must appear in exactly one of the two lists.
 
-Example: If the question is "Is the number even?" and expected answer is "Yes", and the numbers are [1, 2, 3, 4, 5], return: 2, 4
-
-Return ONLY the matching numbers as a comma-separated list, nothing else."""
-
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that filters numbers based on mathematical questions."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1,
-                    max_tokens=500
-                )
-                result = response.choices[0].message.content.strip()
-                
-                # Parse the result to extract numbers
-                # Remove any brackets, parentheses, or extra text
-                result = result.strip("[]()")
-                # Split by comma and extract numbers
-                for part in result.split(","):
-                    part = part.strip()
-                    try:
-                        num = int(part)
-                        if num in batch:  # Only include numbers from this batch
-                            filtered_numbers.add(num)
-                    except ValueError:
-                        continue
-            except Exception as e:
-                # If batch processing fails, fall back to individual checks
-                for num in batch:
-                    try:
-                        num_answer = self.determine_answer_for_number(num, question)
-                        if num_answer == expected_answer:
-                            filtered_numbers.add(num)
-                    except Exception:
-                        continue
-        
-        return filtered_numbers
+Example: If the question is "Is the number even?" and the numbers are 1-10, respond: {{"yes": "2-10/2", "no": "1-9/2"}}"""
 
+        extra = {"response_format": {"type": "json_object"}} if FILTER_JSON_MODE else {}
+        model = self.router.model(tier)
+        started = time.monotonic()
+        response = self._chat(
+            tier,
+            deadline,
+            work_class=FILTER,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that answers mathematical questions about numbers and replies in JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,
+            max_tokens=2 * len(batch) + 50,
+            **extra
+        )
+        latency = time.monotonic() - started
+        usage = getattr(response, "usage", None)
+        tokens = getattr(usage, "total_tokens", 0) or 0
+        try:
+            yes = parse_filter_reply(response.choices[0].message.content, batch)
+        except FilterProtocolError:
+            self.batch_sizer.record(model, len(batch), latency, tokens, success=False, question=question)
+            raise
+        self.batch_sizer.record(model, len(batch), latency, tokens, success=True, question=question)
+        return {num: "Yes" if num in yes else "No" for num in batch}
@@ -0,0 +1,118 @@
+"""Local stand-in for the OpenAI chat client, for offline development and load testing.
+
+``LocalChatClient`` exposes the same ``client.chat.completions.create(...)``
+surface that ``LLMService`` uses and answers the service's prompts with the
+local predicate library. Faults can be injected to exercise the service's
+error handling: malformed replies, slow replies and outright errors.
+
+Enable it with ``LLM_BACKEND=local``.
+"""
+
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+
+from config import (
+    LOCAL_LLM_ERROR_RATE,
+    LOCAL_LLM_LATENCY_SECONDS,
+    LOCAL_LLM_MALFORMED_RATE,
+    LOCAL_LLM_SLOW_RATE,
+    LOCAL_LLM_SLOW_SECONDS,
+)
+from predicates import default_predicates, match_question
+from range_codec import decode_numbers, encode_numbers
+
+_QUESTION_RE = re.compile(r'(?:Question|User\'s question): "(.*)"')
+_SECRET_RE = re.compile(r"Secret number: (-?\d+)")
+_USER_ANSWER_RE = re.compile(r"User's answer: (\w+)")
+_NUMBERS_RE = re.compile(r"^Numbers: (.*)$", re.MULTILINE)
+
+
+class LocalLLMError(Exception):
+    """Injected upstream failure."""
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model=None, messages=None, **kwargs):
+        return self._owner.complete(model, messages or [], **kwargs)
+
+
+class LocalChatClient:
+    """Predicate-backed replacement for ``OpenAI()`` with fault injection."""
+
+    def __init__(self, malformed_rate=LOCAL_LLM_MALFORMED_RATE, error_rate=LOCAL_LLM_ERROR_RATE,
+                 latency=LOCAL_LLM_LATENCY_SECONDS, slow_rate=LOCAL_LLM_SLOW_RATE,
+                 slow_seconds=LOCAL_LLM_SLOW_SECONDS, seed=None):
+        """
+        Initialize the stand-in.
+
+        Args:
+            malformed_rate: Fraction of replies replaced with unparseable text
+            error_rate: Fraction of calls that raise LocalLLMError
+            latency: Base latency added to every call, in seconds
+            slow_rate: Fraction of calls that take ``slow_seconds`` extra
+            slow_seconds: Extra latency of slow calls, in seconds
+            seed: Optional random seed for reproducible fault injection
+        """
+        self.malformed_rate = malformed_rate
+        self.error_rate = error_rate
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self._random = random.Random(seed)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def complete(self, model, messages, **kwargs):
+        """Answer one chat completion request."""
+        self.calls += 1
+        delay = self.latency
+        if self._random.random() < self.slow_rate:
+            delay += self.slow_seconds
+        timeout = kwargs.get("timeout")
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise LocalLLMError("Request timed out")
+        if delay:
+            time.sleep(delay)
+        if self._random.random() < self.error_rate:
+            raise LocalLLMError("Injected upstream error")
+
+        prompt = messages[-1]["content"] if messages else ""
+        if self._random.random() < self.malformed_rate:
+            content = "Sorry, I can't help with that."
+        else:
+            content = self._reply(prompt)
+        usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4)
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(message=message)], usage=usage)
+
+    def _reply(self, prompt):
+        question_match = _QUESTION_RE.search(prompt)
+        if question_match is None:
+            # Question generation
+            return self._random.choice(default_predicates()).question
+
+        predicate = match_question(question_match.group(1))
+        if predicate is None:
+            return "I don't know."
+
+        numbers_match = _NUMBERS_RE.search(prompt)
+        if numbers_match is not None:
+            numbers = decode_numbers(numbers_match.group(1))
+            yes = [n for n in numbers if predicate.test(n)]
+            no = [n for n in numbers if not predicate.test(n)]
+            return json.dumps({"yes": encode_numbers(yes), "no": encode_numbers(no)})
+
+        number = int(_SECRET_RE.search(prompt).group(1))
+        actual = predicate.answer(number)
+        user_answer = _USER_ANSWER_RE.search(prompt)
+        if user_answer is not None:
+            return "Yes" if user_answer.group(1).lower() == actual.lower() else "No"
+        return actual
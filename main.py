@@ -1,7 +1,9 @@
 """Main entry point for the Math Guessing Game."""
 
+from llm_service import LLMService
 from mode_user_guesses import play_user_guesses_mode
 from scoring import Scoring
+from truth_table import load_truth_table
 
 def display_menu():
     """Display the main menu."""
@@ -19,6 +21,8 @@ def main():
     print("A game where mathematical questions help narrow down numbers between 0-500.")
     
     scoring = Scoring()
+    # Built on the first game and reused for the rest of the session
+    llm_service = None
     
     while True:
         display_menu()
@@ -26,7 +30,9 @@ def main():
         
         if choice == "1":
             try:
-                play_user_guesses_mode()
+                if llm_service is None:
+                    llm_service = LLMService(truth_table=load_truth_table())
+                play_user_guesses_mode(llm_service=llm_service, scoring=scoring)
             except KeyboardInterrupt:
                 print("\n\nGame interrupted.")
             except Exception as e:
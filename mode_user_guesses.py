@@ -4,24 +4,40 @@ import random
 from game_engine import GameEngine
 from llm_service import LLMService
 from scoring import Scoring
-from config import MIN_NUMBER, MAX_NUMBER, MAX_QUESTIONS
+from truth_table import load_truth_table
+from config import MIN_NUMBER, MAX_NUMBER, MAX_QUESTIONS, SOLVER_HINTS
 
-def play_user_guesses_mode():
-    """Play the game mode where user guesses computer's number."""
+def play_user_guesses_mode(llm_service=None, scoring=None):
+    """
+    Play the game mode where user guesses computer's number.
+    
+    Args:
+        llm_service: LLMService to reuse across games (created if not given)
+        scoring: Scoring store to reuse across games (loaded if not given)
+    """
     print("\n=== Mode 2: You Guess the Computer's Number ===")
     print(f"I've selected a secret number between {MIN_NUMBER} and {MAX_NUMBER}.")
     print("Ask me mathematical questions (answerable with Yes/No) to figure it out!")
     print("Examples: 'Is the number even?', 'Is it less than 200?', 'Is it a perfect square?'")
-    print("Type 'guess' when you're ready to make your guess.\n")
+    print("Type 'guess' when you're ready to make your guess.")
+    if SOLVER_HINTS:
+        print("Type 'hint' to see the question that narrows the numbers down fastest.")
+    print()
     
     # Computer selects secret number
     secret_number = random.randint(MIN_NUMBER, MAX_NUMBER)
     
     # Initialize game components
-    llm_service = LLMService()
-    engine = GameEngine(llm_service=llm_service)
+    if llm_service is None:
+        llm_service = LLMService(truth_table=load_truth_table())
+    if scoring is None:
+        scoring = Scoring()
+    solver = None
+    if SOLVER_HINTS:
+        from solver import load_solver
+        solver = load_solver()
+    engine = GameEngine(llm_service=llm_service, solver=solver)
     engine.set_secret_number(secret_number)
-    scoring = Scoring()
 
     # Show initial possibilities count once at game start
     print(f"Possible numbers remaining: {engine.get_possible_count()}\n")
@@ -69,6 +85,11 @@ def play_user_guesses_mode():
             print("Please enter a question or 'guess'.")
             continue
 
+        if user_input.lower() == "hint" and solver is not None:
+            hint = engine.next_optimal_question()
+            print(f"Hint: {hint}\n" if hint else "Hint: there is nothing left to narrow down, make your guess.\n")
+            continue
+
         if user_input.lower() == "guess":
             guess_input = input(f"Enter your guess ({MIN_NUMBER}-{MAX_NUMBER}): ").strip()
             guess_attempts += 1
@@ -121,7 +142,14 @@ def play_user_guesses_mode():
         print(f"You have exhausted all guess attempts. You lose. The secret number was {secret_number}.")
 
     # Record game
-    scoring.record_game(won, question_count, mode=2)
+    scoring.record_game(
+        won,
+        question_count,
+        mode=2,
+        qa_history=engine.qa_history,
+        guesses_used=guess_attempts,
+        secret_number=secret_number,
+    )
     
     return won
 
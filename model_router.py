@@ -0,0 +1,127 @@
+"""Routes LLM calls to model tiers by call type and question difficulty.
+
+Simple comparisons ("Is it less than 200?", "Is it even?") go to a small, fast
+model; number-theory questions (primes, squares, digit sums, ...) and anything
+unrecognized go to a stronger one. A call that fails to parse or returns an
+inconsistent reply is escalated to the next tier. Latency, tokens, cost and
+escalations are tracked per tier.
+"""
+
+import threading
+
+from config import MODEL_COST_SMALL, MODEL_COST_STRONG, OPENAI_MODEL_SMALL, OPENAI_MODEL_STRONG
+from predicates import match_question
+
+# Tiers from cheapest to strongest
+TIERS = ("small", "strong")
+
+# Predicate families the small tier handles reliably
+_SIMPLE_FAMILIES = {"lt", "mod:2", "last_digit"}
+
+# (call type, question class) -> tier
+DEFAULT_ROUTES = {
+    ("generate", "simple"): "small",
+    ("generate", "complex"): "small",
+    ("answer", "simple"): "small",
+    ("answer", "complex"): "strong",
+    ("validate", "simple"): "small",
+    ("validate", "complex"): "strong",
+    ("filter", "simple"): "small",
+    ("filter", "complex"): "strong",
+}
+
+
+def classify_question(question):
+    """
+    Classify a question as "simple" or "complex".
+
+    Args:
+        question: The question as asked (None for calls without a question)
+
+    Returns:
+        str: "simple" for comparisons and parity, otherwise "complex"
+    """
+    if not question:
+        return "simple"
+    predicate = match_question(question)
+    if predicate is None:
+        return "complex"
+    key = predicate.key[4:] if predicate.key.startswith("not:") else predicate.key
+    if key in _SIMPLE_FAMILIES or key.split(":")[0] in _SIMPLE_FAMILIES:
+        return "simple"
+    return "complex"
+
+
+class ModelRouter:
+    """Picks a model tier for each call and keeps per-tier statistics."""
+
+    def __init__(self, models=None, costs=None, routes=None):
+        """
+        Initialize the router.
+
+        Args:
+            models: Dict tier -> model name
+            costs: Dict tier -> cost per 1000 tokens
+            routes: Dict (call type, question class) -> tier
+        """
+        self.models = models or {"small": OPENAI_MODEL_SMALL, "strong": OPENAI_MODEL_STRONG}
+        self.costs = costs or {"small": MODEL_COST_SMALL, "strong": MODEL_COST_STRONG}
+        self.routes = routes or DEFAULT_ROUTES
+        self._lock = threading.Lock()
+        self._stats = {
+            tier: {"calls": 0, "errors": 0, "latency": 0.0, "tokens": 0, "escalations_to": 0}
+            for tier in TIERS
+        }
+
+    def tier_for(self, call_type, question=None):
+        """Return the tier for a call type and question."""
+        return self.routes.get((call_type, classify_question(question)), "strong")
+
+    def model(self, tier):
+        """Return the model name for a tier."""
+        return self.models[tier]
+
+    def escalate(self, tier):
+        """
+        Get the next stronger tier and count the escalation.
+
+        Returns:
+            str: The stronger tier, or None if ``tier`` is already the strongest
+        """
+        index = TIERS.index(tier)
+        if index + 1 >= len(TIERS):
+            return None
+        stronger = TIERS[index + 1]
+        with self._lock:
+            self._stats[stronger]["escalations_to"] += 1
+        return stronger
+
+    def record(self, tier, latency, tokens, error=False):
+        """Record one call made on ``tier``."""
+        with self._lock:
+            stats = self._stats[tier]
+            stats["calls"] += 1
+            stats["latency"] += latency
+            stats["tokens"] += tokens
+            if error:
+                stats["errors"] += 1
+
+    def get_stats(self):
+        """Return per-tier calls, latency, tokens, cost and escalation rate."""
+        with self._lock:
+            snapshot = {tier: dict(stats) for tier, stats in self._stats.items()}
+        total_calls = sum(s["calls"] for s in snapshot.values())
+        result = {}
+        for tier, stats in snapshot.items():
+            calls = stats["calls"]
+            result[tier] = {
+                "model": self.models[tier],
+                "calls": calls,
+                "errors": stats["errors"],
+                "avg_latency": stats["latency"] / calls if calls else 0.0,
+                "tokens": stats["tokens"],
+                "cost": stats["tokens"] / 1000 * self.costs[tier],
+                "escalations_to": stats["escalations_to"],
+                "escalation_rate": stats["escalations_to"] / total_calls if total_calls else 0.0,
+            }
+        return result
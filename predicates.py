@@ -0,0 +1,197 @@
+"""Library of arithmetic Yes/No predicates that can be evaluated without the LLM."""
+
+import math
+import re
+
+from config import VECTOR_MIN_SIZE
+from question_canonicalizer import canonicalize
+
+
+def is_prime(n):
+    """Return True if n is a prime number."""
+    if n < 2:
+        return False
+    if n < 4:
+        return True
+    if n % 2 == 0:
+        return False
+    for d in range(3, math.isqrt(n) + 1, 2):
+        if n % d == 0:
+            return False
+    return True
+
+
+def is_perfect_square(n):
+    """Return True if n is a perfect square."""
+    return n >= 0 and math.isqrt(n) ** 2 == n
+
+
+def is_perfect_cube(n):
+    """Return True if n is a perfect cube."""
+    root = round(abs(n) ** (1 / 3))
+    return any((root + d) ** 3 == abs(n) for d in (-1, 0, 1))
+
+
+def is_palindrome(n):
+    """Return True if the decimal digits of n read the same both ways."""
+    s = str(abs(n))
+    return s == s[::-1]
+
+
+def digit_sum(n):
+    """Return the sum of the decimal digits of n."""
+    return sum(int(c) for c in str(abs(n)))
+
+
+class Predicate:
+    """A Yes/No question about the number together with a local evaluator."""
+
+    __slots__ = ("key", "question", "test")
+
+    def __init__(self, key, question, test):
+        """
+        Initialize a predicate.
+
+        Args:
+            key: Stable identifier used when persisting predicates (e.g. "lt:200")
+            question: Human readable question text
+            test: Callable returning True when the answer for a number is "Yes"
+        """
+        self.key = key
+        self.question = question
+        self.test = test
+
+    def __repr__(self):
+        return f"Predicate({self.key!r})"
+
+    def answer(self, number):
+        """Return "Yes" or "No" for the given number."""
+        return "Yes" if self.test(number) else "No"
+
+    def mask(self, min_num, max_num):
+        """
+        Evaluate the predicate over a range as a bitmask.
+
+        Bit ``i`` of the result is set when ``min_num + i`` answers "Yes".
+        Large ranges are evaluated with the vectorized engine when NumPy is
+        installed (see vector_predicates).
+
+        Args:
+            min_num: Minimum number in range
+            max_num: Maximum number in range
+
+        Returns:
+            int: Bitmask of matching numbers
+        """
+        if max_num - min_num + 1 >= VECTOR_MIN_SIZE:
+            import vector_predicates
+
+            if vector_predicates.available():
+                try:
+                    return vector_predicates.evaluate_mask(self.key, min_num, max_num)
+                except ValueError:
+                    pass  # custom key without a vectorized form
+        mask = 0
+        for offset, n in enumerate(range(min_num, max_num + 1)):
+            if self.test(n):
+                mask |= 1 << offset
+        return mask
+
+
+def predicate_from_key(key):
+    """
+    Rebuild a predicate from its persisted key.
+
+    Args:
+        key: Predicate key such as "lt:200", "mod:3" or "prime"
+
+    Returns:
+        Predicate: The matching predicate
+
+    Raises:
+        ValueError: If the key is not recognized
+    """
+    name, _, arg = key.partition(":")
+    if name == "not":
+        inner = predicate_from_key(arg)
+        return Predicate(key, f"Not: {inner.question}", lambda n: not inner.test(n))
+    if name == "lt":
+        t = int(arg)
+        return Predicate(key, f"Is the number less than {t}?", lambda n: n < t)
+    if name == "mod":
+        k = int(arg)
+        if k == 2:
+            return Predicate(key, "Is the number even?", lambda n: n % 2 == 0)
+        return Predicate(key, f"Is the number divisible by {k}?", lambda n: n % k == 0)
+    if name == "digitsum_mod":
+        k = int(arg)
+        return Predicate(key, f"Is the sum of the digits of the number divisible by {k}?",
+                         lambda n: digit_sum(n) % k == 0)
+    if name == "last_digit":
+        d = int(arg)
+        return Predicate(key, f"Does the number end in {d}?", lambda n: abs(n) % 10 == d)
+    if name == "prime":
+        return Predicate(key, "Is the number prime?", is_prime)
+    if name == "square":
+        return Predicate(key, "Is the number a perfect square?", is_perfect_square)
+    if name == "cube":
+        return Predicate(key, "Is the number a perfect cube?", is_perfect_cube)
+    if name == "palindrome":
+        return Predicate(key, "Is the number a palindrome?", is_palindrome)
+    raise ValueError(f"Unknown predicate key: {key}")
+
+
+# Fixed (range independent) predicates; thresholds ("lt:N") are generated on demand.
+DEFAULT_PREDICATE_KEYS = (
+    "mod:2", "mod:3", "mod:4", "mod:5", "mod:6", "mod:7", "mod:8", "mod:9", "mod:10", "mod:11",
+    "digitsum_mod:2", "digitsum_mod:3",
+    "last_digit:0", "last_digit:5",
+    "prime", "square", "cube", "palindrome",
+)
+
+
+def default_predicates():
+    """Return the default list of fixed predicates."""
+    return [predicate_from_key(key) for key in DEFAULT_PREDICATE_KEYS]
+
+
+# Canonical question forms (see question_canonicalizer) -> predicate key templates
+_QUESTION_PATTERNS = [
+    (re.compile(r"^even$"), lambda m: "mod:2"),
+    (re.compile(r"^odd$"), lambda m: "not:mod:2"),
+    (re.compile(r"^less than (\d+)$"), lambda m: f"lt:{m.group(1)}"),
+    (re.compile(r"^greater than (\d+)$"), lambda m: f"not:lt:{int(m.group(1)) + 1}"),
+    (re.compile(r"^divisible by (\d+)$"), lambda m: f"mod:{m.group(1)}" if int(m.group(1)) > 0 else None),
+    (re.compile(r"^not divisible by (\d+)$"), lambda m: f"not:mod:{m.group(1)}" if int(m.group(1)) > 0 else None),
+    (re.compile(r"^(end|ends) (in|with) (\d)$"), lambda m: f"last_digit:{m.group(3)}"),
+    (re.compile(r"^sum of digits divisible by (\d+)$"), lambda m: f"digitsum_mod:{m.group(1)}" if int(m.group(1)) > 0 else None),
+    (re.compile(r"^sum of digits even$"), lambda m: "digitsum_mod:2"),
+    (re.compile(r"^sum of digits odd$"), lambda m: "not:digitsum_mod:2"),
+    (re.compile(r"^prime$"), lambda m: "prime"),
+    (re.compile(r"^perfect square$"), lambda m: "square"),
+    (re.compile(r"^perfect cube$"), lambda m: "cube"),
+    (re.compile(r"^palindrome$"), lambda m: "palindrome"),
+]
+
+
+def match_question(question):
+    """
+    Recognize a question that can be evaluated locally.
+
+    Args:
+        question: The question as asked
+
+    Returns:
+        Predicate: The equivalent predicate, or None if the question is not recognized
+    """
+    canonical = canonicalize(question)
+    for pattern, to_key in _QUESTION_PATTERNS:
+        m = pattern.match(canonical)
+        if m:
+            key = to_key(m)
+            if key is None:
+                return None
+            predicate = predicate_from_key(key)
+            predicate.question = question
+            return predicate
+    return None
@@ -0,0 +1,128 @@
+"""On-demand sampling profiler producing flame-graph-ready collapsed stacks.
+
+While running, a background thread samples the stack of every other thread at
+a fixed interval and counts identical stacks. Only stacks passing through this
+project's code are kept, so idle server threads don't drown out the hot paths.
+The output is the "collapsed" format (``frame;frame;frame count`` per line)
+read by flamegraph.pl, speedscope and similar tools.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from config import PROFILER_INTERVAL, PROFILER_MAX_STACKS
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def _is_project_file(filename):
+    """True for this project's sources (not a virtualenv or site-packages inside it)."""
+    return filename.startswith(PROJECT_ROOT) and not filename.startswith(sys.prefix) and "site-packages" not in filename
+
+
+class SamplingProfiler:
+    """Samples thread stacks in the background; can be started and stopped at runtime."""
+
+    def __init__(self, interval=PROFILER_INTERVAL, max_stacks=PROFILER_MAX_STACKS):
+        """
+        Initialize the profiler (not started).
+
+        Args:
+            interval: Seconds between samples
+            max_stacks: Distinct stacks kept; further new stacks are counted as "[truncated]"
+        """
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._samples = 0
+        self._started_at = None
+        self._stops_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=None, duration=None):
+        """
+        Start sampling (no-op if already running).
+
+        Args:
+            interval: Seconds between samples (defaults to the configured interval)
+            duration: Stop automatically after this many seconds (None = until stopped)
+        """
+        with self._lock:
+            if self.running:
+                return
+            if interval is not None:
+                self.interval = interval
+            self._stop.clear()
+            self._started_at = time.time()
+            self._stops_at = None if duration is None else time.monotonic() + duration
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop sampling; collected stacks are kept until :meth:`reset`."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def reset(self):
+        """Discard collected stacks."""
+        with self._lock:
+            self._counts.clear()
+            self._samples = 0
+
+    def collapsed(self):
+        """Return collected stacks in collapsed format, most frequent first."""
+        with self._lock:
+            items = self._counts.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def get_stats(self):
+        """Return the profiler state and sample counts."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval": self.interval,
+                "started_at": self._started_at,
+                "samples": self._samples,
+                "distinct_stacks": len(self._counts),
+            }
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self._stops_at is not None and time.monotonic() >= self._stops_at:
+                break
+            self._sample(own)
+
+    def _sample(self, own):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames = []
+            in_project = False
+            while frame is not None:
+                code = frame.f_code
+                in_project = in_project or _is_project_file(code.co_filename)
+                frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if in_project:
+                frames.append(names.get(ident, str(ident)))
+                stacks.append(";".join(reversed(frames)))
+        with self._lock:
+            self._samples += 1
+            for stack in stacks:
+                if stack not in self._counts and len(self._counts) >= self.max_stacks:
+                    stack = "[truncated]"
+                self._counts[stack] += 1
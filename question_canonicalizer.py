@@ -0,0 +1,305 @@
+"""Question canonicalization and near-duplicate matching for answer caching.
+
+Players phrase the same question in many ways ("Is it even?", "is the number
+divisible by 2", "is x an even number??"). :func:`canonicalize` rewrites a
+question into a short canonical form ("even") and :class:`QuestionIndex` maps
+new questions onto already resolved ones, first by exact canonical form and
+then by character n-gram TF-IDF similarity, entirely offline.
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+_NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70,
+    "eighty": 80, "ninety": 90,
+}
+_SCALES = {"hundred": 100, "thousand": 1000}
+
+# Tokens that only name the subject of the question and carry no meaning.
+_FILLER = {
+    "is", "does", "do", "has", "can", "the", "a", "an", "it", "its", "x", "n", "number", "your", "my",
+    "secret", "this", "that", "value", "integer", "please", "tell", "me", "if", "whether",
+}
+
+# (pattern, replacement) rewrites applied in order to the filler-free text.
+_PHRASES = [
+    (r"\bevenly divisible by\b", "divisible by"),
+    (r"\b(a )?multiple of\b", "divisible by"),
+    (r"\bdivisible by 2\b(?! (and|or) \d)", "even"),
+    (r"\bnot even\b", "odd"),
+    (r"\bnot odd\b", "even"),
+    (r"\bnot divisible by 2\b", "odd"),
+    (r"\b(smaller|lower|fewer) than\b", "less than"),
+    (r"\b(below|under)\b", "less than"),
+    (r"\b(bigger|larger|higher|more) than\b", "greater than"),
+    (r"\b(above|over)\b", "greater than"),
+    (r"\bprime number\b", "prime"),
+    (r"\bsquare number\b", "perfect square"),
+    (r"\bcube number\b", "perfect cube"),
+    (r"^square\b", "perfect square"),
+    (r"^cube\b", "perfect cube"),
+]
+_PHRASES = [(re.compile(p), r) for p, r in _PHRASES]
+
+# Operators are spelled out before punctuation is stripped, so "x > 200" and
+# "x < 200" (or "x+1" and "x-1") keep different keys. Longest symbols first.
+_OPERATORS = [
+    (r">=|=>|≥", " greater than or equal to "),
+    (r"<=|=<|≤", " less than or equal to "),
+    (r"!=|<>|≠", " not equal to "),
+    (r"==?", " equal to "),
+    (r">", " greater than "),
+    (r"<", " less than "),
+    (r"\+", " plus "),
+    (r"\*\*|\^", " to the power of "),
+    (r"[*×]", " times "),
+    (r"[/÷]", " divided by "),
+    (r"%", " mod "),
+    # A minus between operands ("x-1", "10 - 3"), a negative number ("-5");
+    # other hyphens join words ("twenty-five")
+    (r"(?:(?<=[0-9])|(?<=\b[a-z]))\s*-\s*(?=[0-9]|[a-z]\b)", " minus "),
+    (r"-(?=[0-9])", " negative "),
+]
+_OPERATORS = [(re.compile(p), r) for p, r in _OPERATORS]
+
+# Words that change a question's meaning without a number: questions must
+# agree on them to be merged as near-duplicates.
+_OPERATOR_WORDS = {
+    "not", "plus", "minus", "times", "divided", "mod", "power", "negative", "equal", "less", "greater",
+}
+
+# Punctuation that carries no meaning; any other symbol left after the
+# operators are spelled out makes the question too risky to rewrite.
+_HARMLESS = re.compile(r"[?!.,;:'\"()\s]")
+
+_AT_LEAST = re.compile(r"\b(greater than or equal to|at least) (\d+)\b")
+_AT_MOST = re.compile(r"\b(less than or equal to|at most) (\d+)\b")
+
+
+_UNITS = {word for word, value in _NUMBER_WORDS.items() if 1 <= value <= 9}
+_TENS = {word for word, value in _NUMBER_WORDS.items() if value >= 20}
+
+
+def _token(tokens, i):
+    return tokens[i] if i < len(tokens) else None
+
+
+def _parse_small(tokens, i):
+    """Parse a number below 100 ("seven", "fifteen", "forty two") at ``i``; return (value, end) or None."""
+    token = _token(tokens, i)
+    if token in _TENS:
+        if _token(tokens, i + 1) in _UNITS:
+            return _NUMBER_WORDS[token] + _NUMBER_WORDS[tokens[i + 1]], i + 2
+        return _NUMBER_WORDS[token], i + 1
+    if token in _NUMBER_WORDS:
+        return _NUMBER_WORDS[token], i + 1
+    return None
+
+
+def _parse_tail(tokens, i, parse, stop):
+    """
+    Parse the part after a scale word: an optional "and" followed by a number.
+
+    The tail is rejected when it is followed by ``stop`` (a scale word), since
+    it then starts a number of its own: "two hundred and three hundred" is two
+    numbers, not 200 + 3 with a dangling "hundred".
+    """
+    start = i + 1 if _token(tokens, i) == "and" else i
+    tail = parse(tokens, start)
+    if tail is None or _token(tokens, tail[1]) in stop:
+        return None
+    return tail
+
+
+def _parse_group(tokens, i):
+    """Parse a number below 1000 ("two hundred and five") at ``i``; return (value, end) or None."""
+    small = _parse_small(tokens, i)
+    if small is None:
+        return None
+    value, end = small
+    if _token(tokens, end) == "hundred" and 1 <= value <= 9:
+        value, end = value * 100, end + 1
+        tail = _parse_tail(tokens, end, _parse_small, _SCALES)
+        if tail is not None:
+            value, end = value + tail[0], tail[1]
+    return value, end
+
+
+def _parse_number(tokens, i):
+    """Parse a spelled-out number at ``i``; return (value, end) or None."""
+    group = _parse_group(tokens, i)
+    if group is None:
+        return None
+    value, end = group
+    if _token(tokens, end) == "thousand":
+        value, end = value * 1000, end + 1
+        tail = _parse_tail(tokens, end, _parse_group, {"thousand"})
+        if tail is not None:
+            value, end = value + tail[0], tail[1]
+    return value, end
+
+
+def _numerals_to_digits(tokens):
+    """
+    Replace spelled-out numbers ("two hundred and five") with digits.
+
+    "and" only joins the parts of one number directly after "hundred" or
+    "thousand"; "two and three" stays two numbers.
+    """
+    out = []
+    i = 0
+    while i < len(tokens):
+        number = _parse_number(tokens, i)
+        if number is None:
+            out.append(tokens[i])
+            i += 1
+        else:
+            out.append(str(number[0]))
+            i = number[1]
+    return out
+
+
+def canonicalize(question):
+    """
+    Rewrite a question into its canonical form.
+
+    Args:
+        question: The question as asked
+
+    Returns:
+        str: Canonical form, e.g. "even", "less than 200", "divisible by 7"
+    """
+    text = question.lower()
+    for pattern, replacement in _OPERATORS:
+        text = pattern.sub(replacement, text)
+    raw = re.sub(r"\s+", " ", question.strip().lower())
+    if re.sub(r"[a-z0-9]", "", _HARMLESS.sub("", text.replace("-", ""))):
+        # An unhandled symbol: keep the question as asked instead of dropping it
+        return raw
+    text = text.replace("-", " ")
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    tokens = _numerals_to_digits(text.split())
+    text = " ".join(t for t in tokens if t not in _FILLER)
+    for pattern, replacement in _PHRASES:
+        text = pattern.sub(replacement, text)
+    text = _AT_LEAST.sub(lambda m: f"greater than {int(m.group(2)) - 1}", text)
+    text = _AT_MOST.sub(lambda m: f"less than {int(m.group(2)) + 1}", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text or raw
+
+
+def _ngrams(text, n=3):
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+def _guard(text):
+    """Parts of a question that must match exactly for two questions to be merged."""
+    return tuple(w for w in text.split() if w.isdigit() or w in _OPERATOR_WORDS)
+
+
+class QuestionIndex:
+    """Maps questions onto previously resolved canonical questions."""
+
+    def __init__(self, threshold=0.9):
+        """
+        Initialize an empty index.
+
+        Args:
+            threshold: Minimum TF-IDF cosine similarity for a near-duplicate match
+        """
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._docs = []        # canonical forms
+        self._vectors = []     # n-gram counters
+        self._by_key = {}      # canonical form -> doc id
+        self._postings = {}    # n-gram -> set of doc ids
+        self._df = Counter()   # n-gram -> document frequency
+        self.stats = {"exact_hits": 0, "near_duplicate_hits": 0, "misses": 0}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _weights(self, vector):
+        total = len(self._docs) + 1
+        return {g: c * math.log(total / (1 + self._df[g])) + c for g, c in vector.items()}
+
+    def _nearest(self, key):
+        vector = _ngrams(key)
+        guard = _guard(key)
+        candidates = set()
+        for gram in vector:
+            candidates |= self._postings.get(gram, set())
+        if not candidates:
+            return None, 0.0
+        query = self._weights(vector)
+        query_norm = math.sqrt(sum(w * w for w in query.values()))
+        best, best_score = None, 0.0
+        for doc_id in candidates:
+            doc = self._docs[doc_id]
+            if _guard(doc) != guard:
+                continue
+            weights = self._weights(self._vectors[doc_id])
+            dot = sum(w * weights.get(g, 0.0) for g, w in query.items())
+            norm = query_norm * math.sqrt(sum(w * w for w in weights.values()))
+            score = dot / norm if norm else 0.0
+            if score > best_score:
+                best, best_score = doc, score
+        return best, best_score
+
+    def lookup(self, question):
+        """
+        Find the resolved question a new question should share answers with.
+
+        Args:
+            question: The question as asked
+
+        Returns:
+            str: The canonical key of a matching resolved question, or None on a miss
+        """
+        key = canonicalize(question)
+        with self._lock:
+            if key in self._by_key:
+                self.stats["exact_hits"] += 1
+                return key
+            match, score = self._nearest(key)
+            if match is not None and score >= self.threshold:
+                self.stats["near_duplicate_hits"] += 1
+                return match
+            self.stats["misses"] += 1
+            return None
+
+    def add(self, question):
+        """
+        Register a resolved question.
+
+        Returns:
+            str: Its canonical key
+        """
+        key = canonicalize(question)
+        with self._lock:
+            if key not in self._by_key:
+                vector = _ngrams(key)
+                doc_id = len(self._docs)
+                self._docs.append(key)
+                self._vectors.append(vector)
+                self._by_key[key] = doc_id
+                for gram in vector:
+                    self._postings.setdefault(gram, set()).add(doc_id)
+                    self._df[gram] += 1
+        return key
+
+    def get_stats(self):
+        """Return lookup counters and the hit rate."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["indexed_questions"] = len(self._docs)
+        lookups = stats["exact_hits"] + stats["near_duplicate_hits"] + stats["misses"]
+        stats["hit_rate"] = (lookups - stats["misses"]) / lookups if lookups else 0.0
+        return stats
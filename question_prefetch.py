@@ -0,0 +1,242 @@
+"""Speculative prefetch of likely next questions during player think time.
+
+:class:`QuestionPredictor` learns which questions players ask, overall and
+right after a given question (popularity and bigram counts over canonical
+forms). After each ask, :class:`Prefetcher` resolves the predicted next
+questions for the game's current candidates on a small background pool, so
+the answers are already in the LLM answer cache when the player asks one of
+them. A game has one prefetch round at a time; the next ask or the end of the
+game cancels what is left of it.
+"""
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    PREFETCH_MAX_PENDING, PREFETCH_MAX_TRACKED_QUESTIONS, PREFETCH_MIN_COUNT, PREFETCH_QUESTIONS,
+    PREFETCH_TIMEOUT, PREFETCH_WORKERS,
+)
+from deadline import Deadline
+from question_canonicalizer import canonicalize
+
+
+class QuestionPredictor:
+    """Predicts the next question from question popularity and question-to-question transitions."""
+
+    def __init__(self, min_count=PREFETCH_MIN_COUNT, max_questions=PREFETCH_MAX_TRACKED_QUESTIONS):
+        """
+        Initialize an empty predictor.
+
+        Args:
+            min_count: Times a question must have been asked before it is predicted
+            max_questions: Distinct questions tracked; the least asked are forgotten first
+        """
+        self.min_count = min_count
+        self.max_questions = max_questions
+        self._lock = threading.Lock()
+        self._popularity = Counter()
+        self._following = {}  # canonical -> Counter of the canonical question asked next
+        self._phrasing = {}  # canonical -> most recent question text
+
+    def observe(self, qa_history):
+        """Learn from the latest question of a game (the last entry of ``qa_history``)."""
+        if not qa_history:
+            return
+        question = qa_history[-1][0]
+        canonical = canonicalize(question)
+        previous = canonicalize(qa_history[-2][0]) if len(qa_history) > 1 else None
+        with self._lock:
+            self._popularity[canonical] += 1
+            self._phrasing[canonical] = question
+            if previous is not None:
+                self._following.setdefault(previous, Counter())[canonical] += 1
+            if len(self._popularity) > self.max_questions:
+                self._forget_least_asked()
+
+    def predict(self, qa_history, limit=PREFETCH_QUESTIONS):
+        """
+        Predict the most likely next questions of a game.
+
+        Questions usually asked right after the last one come first, then the
+        most popular questions overall; questions already asked are skipped.
+
+        Args:
+            qa_history: The game's (question, answer) pairs so far
+            limit: Number of questions to return
+
+        Returns:
+            list: Question texts
+        """
+        asked = {canonicalize(q) for q, _ in qa_history}
+        last = canonicalize(qa_history[-1][0]) if qa_history else None
+        with self._lock:
+            ranked = []
+            following = self._following.get(last)
+            if following:
+                ranked.extend(c for c, _ in following.most_common())
+            ranked.extend(c for c, _ in self._popularity.most_common())
+            result = []
+            for canonical in ranked:
+                if canonical in asked or self._popularity[canonical] < self.min_count:
+                    continue
+                asked.add(canonical)
+                result.append(self._phrasing[canonical])
+                if len(result) >= limit:
+                    break
+            return result
+
+    def _forget_least_asked(self):
+        keep = {c for c, _ in self._popularity.most_common(self.max_questions // 2)}
+        self._popularity = Counter({c: n for c, n in self._popularity.items() if c in keep})
+        self._phrasing = {c: q for c, q in self._phrasing.items() if c in keep}
+        self._following = {
+            c: Counter({d: n for d, n in nxt.items() if d in keep})
+            for c, nxt in self._following.items()
+            if c in keep
+        }
+
+
+_OUTCOME_STATS = {"hit": "hits", "late": "late", "miss": "misses"}
+
+
+class _Task:
+    __slots__ = ("question", "deadline", "state", "seconds")
+
+    def __init__(self, question):
+        self.question = question
+        self.deadline = Deadline(PREFETCH_TIMEOUT)
+        self.state = "queued"  # queued -> running -> done / failed / cancelled
+        self.seconds = 0.0
+
+
+class Prefetcher:
+    """Runs prefetch rounds per game on a low-concurrency background pool."""
+
+    def __init__(self, workers=PREFETCH_WORKERS, max_pending=PREFETCH_MAX_PENDING):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            workers: Background threads (kept small so prefetch never competes much with live requests)
+            max_pending: Queued tasks beyond which new rounds are dropped
+        """
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._rounds = {}  # game_id -> {canonical: _Task}
+        self._pending = 0
+        self.stats = {
+            "scheduled": 0,
+            "dropped": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "hits": 0,
+            "late": 0,
+            "misses": 0,
+            "wasted": 0,
+            "work_seconds": 0.0,
+            "wasted_seconds": 0.0,
+        }
+
+    def on_ask(self, game_id, question):
+        """
+        Account the player's actual next question against the game's prefetch round and end the round.
+
+        Returns:
+            str: "hit" (prefetch finished), "late" (still running), "miss" or None if no round
+        """
+        canonical = canonicalize(question)
+        with self._lock:
+            tasks = self._rounds.pop(game_id, None)
+            if tasks is None:
+                return None
+            task = tasks.get(canonical)
+            if task is None:
+                outcome = "miss"
+            elif task.state == "done":
+                outcome = "hit"
+            else:
+                outcome = "late"
+            self.stats[_OUTCOME_STATS[outcome]] += 1
+            for other in tasks.values():
+                if other is not task:
+                    self._discard_locked(other)
+            return outcome
+
+    def schedule(self, game_id, questions, resolve):
+        """
+        Start a prefetch round for a game, replacing any previous round.
+
+        Args:
+            game_id: The game
+            questions: Predicted next questions
+            resolve: Callable ``resolve(question, deadline)`` doing the work
+        """
+        self.cancel(game_id)
+        with self._lock:
+            if self._pending + len(questions) > self.max_pending:
+                self.stats["dropped"] += len(questions)
+                return
+            tasks = {canonicalize(q): _Task(q) for q in questions}
+            self._rounds[game_id] = tasks
+            self._pending += len(tasks)
+            self.stats["scheduled"] += len(tasks)
+        for task in tasks.values():
+            self._executor.submit(self._run, task, resolve)
+
+    def cancel(self, game_id):
+        """Cancel the game's prefetch round (e.g. when the game ends)."""
+        with self._lock:
+            tasks = self._rounds.pop(game_id, None)
+            for task in (tasks or {}).values():
+                self._discard_locked(task)
+
+    def get_stats(self):
+        """Return prefetch counts, hit rate and wasted work."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = self._pending
+            stats["active_games"] = len(self._rounds)
+        accounted = stats["hits"] + stats["late"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / accounted if accounted else 0.0
+        stats["waste_rate"] = stats["wasted"] / stats["completed"] if stats["completed"] else 0.0
+        return stats
+
+    def _discard_locked(self, task):
+        """Cancel a task that is no longer useful, counting finished work as wasted."""
+        if task.state == "done":
+            self.stats["wasted"] += 1
+            self.stats["wasted_seconds"] += task.seconds
+        elif task.state in ("queued", "running"):
+            self.stats["cancelled"] += 1
+            # Expiring the deadline stops a running filter before its next batch
+            task.deadline.cancel()
+            task.state = "cancelled"
+
+    def _run(self, task, resolve):
+        with self._lock:
+            self._pending -= 1
+            if task.state != "queued":
+                return
+            task.state = "running"
+        started = time.monotonic()
+        try:
+            resolve(task.question, task.deadline)
+            state = "done"
+        except Exception:
+            state = "failed"
+        seconds = time.monotonic() - started
+        with self._lock:
+            self.stats["work_seconds"] += seconds
+            task.seconds = seconds
+            if task.state == "running":
+                task.state = state
+                self.stats["completed" if state == "done" else "failed"] += 1
+            elif state == "done":
+                # Finished after its round was cancelled
+                self.stats["completed"] += 1
+                self.stats["wasted"] += 1
+                self.stats["wasted_seconds"] += seconds
@@ -0,0 +1,79 @@
+"""Compact text encoding of number sets for LLM prompts and replies.
+
+Sets are written as comma-separated runs: ``100-149`` for a contiguous run,
+``0-48/2`` for an arithmetic progression with step 2 and ``7`` for a single
+number. The even numbers 0..500 take 9 characters instead of ~1000.
+"""
+
+import re
+
+_TOKEN = re.compile(r"^(-?\d+)(?:-(-?\d+)(?:/(\d+))?)?$")
+
+
+def encode_numbers(numbers):
+    """
+    Encode numbers as compact runs.
+
+    Args:
+        numbers: Iterable of integers
+
+    Returns:
+        str: Encoded text, e.g. "0-48/2, 100-149, 7"
+    """
+    values = sorted(set(numbers))
+    parts = []
+    i = 0
+    while i < len(values):
+        j = i
+        if i + 2 < len(values):
+            step = values[i + 1] - values[i]
+            while j + 1 < len(values) and values[j + 1] - values[j] == step:
+                j += 1
+        if j - i >= 2:
+            step = values[i + 1] - values[i]
+            parts.append(f"{values[i]}-{values[j]}" if step == 1 else f"{values[i]}-{values[j]}/{step}")
+            i = j + 1
+        else:
+            parts.append(str(values[i]))
+            i += 1
+    return ", ".join(parts)
+
+
+def decode_numbers(text, minimum=None, maximum=None):
+    """
+    Decode text produced by :func:`encode_numbers`.
+
+    Replies come from the model, so a run outside ``minimum``..``maximum`` is
+    rejected before it is expanded ("0-10000000000" would not fit in memory).
+
+    Args:
+        text: Encoded text; an empty string decodes to an empty list
+        minimum: Smallest number allowed (None: unbounded)
+        maximum: Largest number allowed (None: unbounded)
+
+    Returns:
+        list: The numbers, in encoded order
+
+    Raises:
+        ValueError: If a token is malformed or out of bounds
+    """
+    numbers = []
+    for token in text.split(","):
+        token = token.strip().replace(" ", "")
+        if not token:
+            continue
+        m = _TOKEN.match(token)
+        if not m:
+            raise ValueError(f"Malformed range token: {token!r}")
+        start = int(m.group(1))
+        end = start if m.group(2) is None else int(m.group(2))
+        if (minimum is not None and min(start, end) < minimum) or (maximum is not None and max(start, end) > maximum):
+            raise ValueError(f"Range token out of bounds {minimum}..{maximum}: {token!r}")
+        if m.group(2) is None:
+            numbers.append(start)
+            continue
+        step = int(m.group(3) or 1)
+        if step <= 0 or end < start or (end - start) % step:
+            raise ValueError(f"Malformed range token: {token!r}")
+        numbers.extend(range(start, end + 1, step))
+    return numbers
@@ -1,7 +1,40 @@
 """Range Manager for filtering and narrowing down possible numbers."""
 
+from circuit_breaker import CircuitOpenError
+from deadline import DeadlineExceeded
+from tracing import span
+
+
+def _mask_to_numbers(mask, offset):
+    """Expand a bitmask (bit ``i`` is ``offset + i``) into a set of numbers."""
+    numbers = set()
+    # One pass over the bytes; shifting the whole int per bit would be quadratic
+    for index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        base = offset + index * 8
+        while byte:
+            low = byte & -byte
+            numbers.add(base + low.bit_length() - 1)
+            byte ^= low
+    return numbers
+
+
+def _numbers_to_mask(numbers, min_num, max_num):
+    """Build the bitmask of the numbers within [min_num, max_num]."""
+    mask = 0
+    for n in numbers:
+        if min_num <= n <= max_num:
+            mask |= 1 << (n - min_num)
+    return mask
+
+
 class RangeManager:
-    """Manages the set of possible numbers and applies filters based on questions and answers."""
+    """Manages the set of possible numbers and applies filters based on questions and answers.
+    
+    The possible numbers are stored as a bitmask (bit ``i`` set when ``min_num + i``
+    is still possible), which keeps a full 0-500 range under a hundred bytes.
+    """
+    
+    __slots__ = ("min_num", "max_num", "llm_service", "mask")
     
     def __init__(self, min_num=0, max_num=500, llm_service=None):
         """
@@ -12,46 +45,139 @@ class RangeManager:
             max_num: Maximum number in range (default: 500)
             llm_service: LLMService instance for filtering (required)
         """
-        self.possible_numbers = set(range(min_num, max_num + 1))
         self.min_num = min_num
         self.max_num = max_num
         self.llm_service = llm_service
+        self.mask = (1 << (max_num - min_num + 1)) - 1
+    
+    @property
+    def possible_numbers(self):
+        """The set of possible numbers (a new set on every access)."""
+        return _mask_to_numbers(self.mask, self.min_num)
+    
+    @possible_numbers.setter
+    def possible_numbers(self, numbers):
+        self.mask = _numbers_to_mask(numbers, self.min_num, self.max_num)
     
     def get_count(self):
         """Return the count of possible numbers remaining."""
-        return len(self.possible_numbers)
+        return bin(self.mask).count("1")
     
     def get_numbers(self):
         """Return the set of possible numbers."""
-        return self.possible_numbers.copy()
+        return self.possible_numbers
     
-    def apply_filter(self, question, answer):
+    def apply_filter(self, question, answer, deadline=None):
         """
         Apply a filter based on question and answer to narrow down possible numbers using LLM.
         
         Args:
             question: The mathematical question asked
             answer: "Yes" or "No"
+            deadline: Optional Deadline for the request
         
         Returns:
             int: Number of possible numbers remaining after filter
+        
+        Raises:
+            DeadlineExceeded: If filtering cannot finish before the deadline (numbers are left unchanged)
+            CircuitOpenError: If the LLM is unavailable and the question cannot be evaluated locally
         """
         if self.llm_service is None:
             raise ValueError("LLMService is required for filtering. Pass llm_service to RangeManager constructor.")
         
-        try:
-            # Use LLM to filter numbers
-            self.possible_numbers = self.llm_service.filter_numbers(
-                self.possible_numbers,
-                question,
-                answer
-            )
-        except Exception as e:
-            # If LLM filtering fails, don't filter (keep all numbers)
-            # This ensures the game can continue even if LLM has issues
-            print(f"Warning: LLM filtering failed: {e}. Keeping all possible numbers.")
+        predicate = self.llm_service.local_predicate(question)
+        if predicate is not None:
+            # The LLM is unavailable: evaluate the whole range locally as one bitmap
+            return self.apply_predicate(predicate, answer)
+        
+        with span("RangeManager.apply_filter", before=self.get_count()) as current:
+            try:
+                # Use LLM to filter numbers
+                self.possible_numbers = self.llm_service.filter_numbers(
+                    self.possible_numbers,
+                    question,
+                    answer,
+                    deadline=deadline
+                )
+            except (DeadlineExceeded, CircuitOpenError):
+                raise
+            except Exception as e:
+                # If LLM filtering fails, don't filter (keep all numbers)
+                # This ensures the game can continue even if LLM has issues
+                print(f"Warning: LLM filtering failed: {e}. Keeping all possible numbers.")
+                current.set(failed=str(e))
+            
+            count = self.get_count()
+            current.set(after=count)
+            return count
+    
+    def snapshot(self):
+        """
+        Return an immutable snapshot of the possible numbers.
+        
+        The mask is an int, so a snapshot is shared, not copied; filtering
+        replaces ``self.mask`` and never changes a snapshot already taken.
+        """
+        return self.mask
+    
+    def evaluate(self, question, deadline=None):
+        """
+        Split the possible numbers by the answer to a question without applying it.
+        
+        Args:
+            question: The mathematical question
+            deadline: Optional Deadline for the request
         
-        return len(self.possible_numbers)
+        Returns:
+            tuple: (snapshot, yes_mask, no_mask); numbers the LLM could not resolve
+            are in neither mask (:meth:`apply_filter` would keep them for both answers)
+        """
+        if self.llm_service is None:
+            raise ValueError("LLMService is required for filtering. Pass llm_service to RangeManager constructor.")
+        
+        with span("RangeManager.evaluate", candidates=self.get_count()):
+            snapshot = self.snapshot()
+            predicate = self.llm_service.local_predicate(question)
+            if predicate is not None:
+                yes_mask = predicate.mask(self.min_num, self.max_num) & snapshot
+                return snapshot, yes_mask, snapshot & ~yes_mask
+            numbers = _mask_to_numbers(snapshot, self.min_num)
+            yes, no = self.llm_service.split_numbers(numbers, question, deadline=deadline)
+            yes_mask = _numbers_to_mask(yes, self.min_num, self.max_num) & snapshot
+            no_mask = _numbers_to_mask(no, self.min_num, self.max_num) & snapshot & ~yes_mask
+            return snapshot, yes_mask, no_mask
+    
+    def apply_mask(self, mask):
+        """
+        Keep only the possible numbers whose bits are set in ``mask``.
+        
+        Returns:
+            int: Number of possible numbers remaining
+        """
+        self.mask &= mask
+        return self.get_count()
+    
+    def apply_predicate(self, predicate, answer):
+        """
+        Filter locally with an arithmetic predicate instead of the LLM.
+        
+        The predicate's bitmap over the whole range is ANDed into the mask
+        (vectorized for large ranges, see vector_predicates).
+        
+        Args:
+            predicate: Predicate (see predicates.py)
+            answer: "Yes" or "No"
+        
+        Returns:
+            int: Number of possible numbers remaining
+        """
+        with span("RangeManager.apply_predicate", key=predicate.key, before=self.get_count()) as current:
+            full = (1 << (self.max_num - self.min_num + 1)) - 1
+            yes_mask = predicate.mask(self.min_num, self.max_num)
+            count = self.apply_mask(yes_mask if answer == "Yes" else full & ~yes_mask)
+            current.set(after=count)
+            return count
     
     def reset(self, min_num=None, max_num=None):
         """Reset to full range."""
@@ -59,5 +185,5 @@ class RangeManager:
             self.min_num = min_num
         if max_num is not None:
             self.max_num = max_num
-        self.possible_numbers = set(range(self.min_num, self.max_num + 1))
+        self.mask = (1 << (self.max_num - self.min_num + 1)) - 1
 
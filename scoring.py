@@ -2,7 +2,9 @@
 
 import json
 import os
-from config import SCORING_FILE
+from config import GAME_RESULTS_FILE, SCORING_FILE
+from game_results import GameResultLog
+from tracing import span
 
 class Scoring:
     """Manages game statistics and scoring."""
@@ -10,6 +12,8 @@ class Scoring:
     def __init__(self):
         """Initialize scoring system and load existing stats."""
         self.stats = self._load_stats()
+        # Per-game detail; the counters below are aggregates only
+        self.results = GameResultLog(GAME_RESULTS_FILE) if GAME_RESULTS_FILE else None
     
     def _load_stats(self):
         """Load statistics from file or return default stats."""
@@ -37,13 +41,15 @@ class Scoring:
     
     def _save_stats(self):
         """Save statistics to file."""
-        try:
-            with open(SCORING_FILE, 'w') as f:
-                json.dump(self.stats, f, indent=2)
-        except IOError as e:
-            print(f"Warning: Could not save statistics: {e}")
+        with span("Scoring.save_stats"):
+            try:
+                with open(SCORING_FILE, 'w') as f:
+                    json.dump(self.stats, f, indent=2)
+            except IOError as e:
+                print(f"Warning: Could not save statistics: {e}")
     
-    def record_game(self, won, questions_asked, mode=1):
+    def record_game(self, won, questions_asked, mode=1, qa_history=None, guesses_used=None,
+                    secret_number=None, game_id=None):
         """
         Record a completed game.
         
@@ -51,7 +57,15 @@ class Scoring:
             won: True if game was won, False otherwise
             questions_asked: Number of questions asked in this game
             mode: Game mode (1 or 2)
+            qa_history: Optional list of (question, answer) pairs; when given, the
+                game is also written to the per-game results log
+            guesses_used: Number of guesses made
+            secret_number: The secret number
+            game_id: Game id (API games)
         """
+        if qa_history is not None and self.results is not None:
+            self.results.append(game_id, mode, won, questions_asked, guesses_used, secret_number, qa_history)
+
         self.stats["total_games"] += 1
         self.stats["total_questions"] += questions_asked
         
@@ -0,0 +1,158 @@
+"""Single-flight coalescing of identical in-flight work.
+
+Concurrent callers asking for the same key share one execution of the work and
+all receive its result (or its exception). The shared execution runs on its own
+thread for all of them: its deadline is the latest of the callers' deadlines and
+its LLM calls are scheduled in the highest of their priority classes, so one
+caller giving up or being cancelled (e.g. a prefetch whose round is over) does
+not fail the work for a request that joined it. Every caller, the one that
+started the work included, stops waiting when its own deadline passes.
+
+Threaded callers use :meth:`SingleFlight.do`; asyncio callers use
+:meth:`SingleFlight.do_async`, which waits without blocking the event loop and
+shares executions with threaded callers.
+"""
+
+import asyncio
+import contextvars
+import threading
+
+from deadline import DeadlineExceeded, LatestDeadline
+from llm_scheduler import SharedClass, scheduling
+
+
+class _Call:
+    __slots__ = ("event", "result", "error", "deadline", "work_class", "waiters")
+
+    def __init__(self, deadline):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.deadline = LatestDeadline(deadline)
+        self.work_class = SharedClass()
+        self.waiters = []  # (loop, future) pairs of asyncio callers
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def _join(self, key, fn, deadline):
+        """Return (call, is_leader) for key, starting the work if no call is in flight."""
+        with self._lock:
+            self.stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(deadline)
+                self.stats["executions"] += 1
+            else:
+                self.stats["coalesced"] += 1
+                call.deadline.add(deadline)
+            call.work_class.join()
+        if leader:
+            # The work keeps the starting caller's context (trace span, session)
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(self._run, key, call, fn),
+                             name="singleflight", daemon=True).start()
+        return call, leader
+
+    def _run(self, key, call, fn):
+        try:
+            with scheduling(call.work_class):
+                call.result = fn(call.deadline)
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                call.event.set()
+                waiters = list(call.waiters)
+            for loop, future in waiters:
+                try:
+                    loop.call_soon_threadsafe(_resolve, future)
+                except RuntimeError:
+                    pass  # that caller's event loop has already closed
+
+    @staticmethod
+    def _retry(call, leader, deadline):
+        """Return True if a caller should start over rather than take the call's outcome."""
+        # Joined just as the others ran out of time; this caller still has time of its own
+        return (not leader and isinstance(call.error, DeadlineExceeded)
+                and not call.deadline.cancelled and not (deadline and deadline.expired()))
+
+    @staticmethod
+    def _outcome(call):
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def do(self, key, fn, deadline=None):
+        """
+        Run ``fn`` once for all concurrent callers with the same key.
+
+        Args:
+            key: Hashable identity of the work
+            fn: Callable doing the work; it is passed the shared deadline
+            deadline: Optional Deadline of this caller; the caller stops waiting when it passes
+
+        Returns:
+            The shared result of ``fn``
+
+        Raises:
+            DeadlineExceeded: If this caller's deadline passes first
+        """
+        while True:
+            call, leader = self._join(key, fn, deadline)
+            if not call.event.wait(deadline.remaining() if deadline is not None else None):
+                raise DeadlineExceeded("Request deadline exceeded waiting for shared in-flight work")
+            if not self._retry(call, leader, deadline):
+                return self._outcome(call)
+
+    async def do_async(self, key, fn, deadline=None):
+        """
+        Asyncio variant of :meth:`do`; ``fn`` is a blocking callable run on the work's own thread.
+
+        Returns:
+            The shared result of ``fn``
+
+        Raises:
+            DeadlineExceeded: If this caller's deadline passes first
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            call, leader = self._join(key, fn, deadline)
+            future = loop.create_future()
+            waiter = (loop, future)
+            with self._lock:
+                done = call.event.is_set()
+                if not done:
+                    call.waiters.append(waiter)
+            if not done:
+                try:
+                    await asyncio.wait_for(future, deadline.remaining() if deadline is not None else None)
+                except asyncio.TimeoutError:
+                    raise DeadlineExceeded("Request deadline exceeded waiting for shared in-flight work") from None
+                finally:
+                    with self._lock:
+                        if waiter in call.waiters:
+                            call.waiters.remove(waiter)
+            if not self._retry(call, leader, deadline):
+                return self._outcome(call)
+
+    def get_stats(self):
+        """Return call, execution and coalescing counters."""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._calls)
+        stats["coalesced_rate"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,344 @@
+"""Precomputed minimum-depth decision tree solver for the computer's play.
+
+The solver builds a decision tree over the predicate library for a number
+range. Every node splits the remaining candidates with one predicate and the
+tree is saved as a compact binary table so that play-time lookups are a single
+dictionary access keyed by the candidate-set signature (a bitmask).
+
+Because the library always contains "less than N" thresholds, any candidate set
+of size ``c`` can be split into halves, so the tree reaches the information
+theoretic lower bound ``ceil(log2(c))`` at every node and is therefore optimal.
+Among splits that reach the bound, the fixed predicates (even, prime, ...) are
+preferred over thresholds so games stay varied.
+
+With ``SOLVER_HINTS=1`` the CLI and the API offer the solver's next question
+to the player as a hint.
+"""
+
+import json
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+from config import MIN_NUMBER, MAX_NUMBER, SOLVER_TABLE_FILE
+from predicates import DEFAULT_PREDICATE_KEYS, predicate_from_key
+
+_MAGIC = b"MGDT"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHqqI")
+_NODE = struct.Struct("<iii")
+
+# Ranges at least this large are built with a process pool.
+PARALLEL_MIN_SIZE = 4096
+
+
+def _popcount(mask):
+    return bin(mask).count("1")
+
+
+def _lower_bound(count):
+    """Minimum number of Yes/No questions needed to isolate one of ``count`` numbers."""
+    return max(0, (count - 1).bit_length())
+
+
+def _kth_bit(mask, k):
+    """Return the position of the k-th (0-based) set bit of mask."""
+    lo, hi = 0, mask.bit_length()
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _popcount(mask & ((1 << (mid + 1)) - 1)) > k:
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+class DecisionTreeSolver:
+    """Builds, stores and queries an optimal questioning strategy."""
+
+    def __init__(self, min_num=MIN_NUMBER, max_num=MAX_NUMBER, predicate_keys=DEFAULT_PREDICATE_KEYS):
+        """
+        Initialize an empty solver.
+
+        Args:
+            min_num: Minimum number in range
+            max_num: Maximum number in range
+            predicate_keys: Keys of the fixed predicates to consider (thresholds are always included)
+        """
+        self.min_num = min_num
+        self.max_num = max_num
+        self.predicate_keys = tuple(predicate_keys)
+        self._mask_cache = {}
+        # signature (bitmask) -> (predicate key, yes mask, no mask); leaves map to None
+        self._memo = {}
+
+    @property
+    def full_mask(self):
+        """Bitmask with every number of the range set."""
+        return (1 << (self.max_num - self.min_num + 1)) - 1
+
+    def mask_of(self, numbers):
+        """Convert an iterable of numbers into a candidate-set signature."""
+        mask = 0
+        for n in numbers:
+            mask |= 1 << (n - self.min_num)
+        return mask
+
+    def _predicate_mask(self, key):
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            if key.startswith("lt:"):
+                mask = (1 << max(0, int(key[3:]) - self.min_num)) - 1
+                mask &= self.full_mask
+            else:
+                mask = predicate_from_key(key).mask(self.min_num, self.max_num)
+            self._mask_cache[key] = mask
+        return mask
+
+    def _split(self, mask):
+        """Pick the predicate for a node and return (key, yes mask, no mask)."""
+        count = _popcount(mask)
+        target = _lower_bound(count) - 1
+        best = None
+        best_balance = count
+        for key in self.predicate_keys:
+            yes = mask & self._predicate_mask(key)
+            yes_count = _popcount(yes)
+            if yes_count == 0 or yes_count == count:
+                continue
+            if max(_lower_bound(yes_count), _lower_bound(count - yes_count)) > target:
+                continue
+            balance = max(yes_count, count - yes_count)
+            if balance < best_balance:
+                best, best_balance = (key, yes), balance
+        if best is None:
+            # The median threshold always reaches the lower bound.
+            threshold = self.min_num + _kth_bit(mask, count // 2)
+            key = f"lt:{threshold}"
+            best = (key, mask & self._predicate_mask(key))
+        key, yes = best
+        return key, yes, mask & ~yes
+
+    def _build_from(self, root):
+        stack = [root]
+        while stack:
+            mask = stack.pop()
+            if mask in self._memo:
+                continue
+            if _popcount(mask) <= 1:
+                self._memo[mask] = None
+                continue
+            key, yes, no = self._split(mask)
+            self._memo[mask] = (key, yes, no)
+            stack.append(yes)
+            stack.append(no)
+
+    def build(self, processes=None):
+        """
+        Build the decision tree for the full range.
+
+        Args:
+            processes: Worker processes for large ranges (default: CPU count, 1 disables the pool)
+
+        Returns:
+            DecisionTreeSolver: self, for chaining
+        """
+        self._memo.clear()
+        root = self.full_mask
+        size = self.max_num - self.min_num + 1
+        processes = processes or os.cpu_count() or 1
+        if processes == 1 or size < PARALLEL_MIN_SIZE:
+            self._build_from(root)
+            return self
+
+        # Expand the top of the tree here and hand independent subtrees to workers.
+        frontier = [root]
+        while len(frontier) < processes * 4:
+            mask = max(frontier, key=_popcount)
+            if _popcount(mask) < PARALLEL_MIN_SIZE // 4:
+                break
+            frontier.remove(mask)
+            key, yes, no = self._split(mask)
+            self._memo[mask] = (key, yes, no)
+            frontier.extend((yes, no))
+
+        args = [(self.min_num, self.max_num, self.predicate_keys, mask) for mask in frontier]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for memo in pool.map(_build_subtree, args):
+                self._memo.update(memo)
+        return self
+
+    def depth(self, mask=None):
+        """Return the depth of the tree below ``mask`` (default: the root)."""
+        mask = self.full_mask if mask is None else mask
+        node = self._memo.get(mask)
+        if node is None:
+            return 0
+        return 1 + max(self.depth(node[1]), self.depth(node[2]))
+
+    def next_question(self, numbers):
+        """
+        Look up the optimal question for the remaining candidates.
+
+        Args:
+            numbers: Set of possible numbers remaining
+
+        Returns:
+            Predicate: The predicate to ask, or None if the set is solved
+        """
+        mask = self.mask_of(numbers)
+        if mask in self._memo:
+            node = self._memo[mask]
+        elif _popcount(mask) > 1:
+            # Not on the precomputed tree (e.g. after the player's own questions):
+            # one split still reaches the lower bound
+            node = self._split(mask)
+        else:
+            node = None
+        if node is None:
+            return None
+        return predicate_from_key(node[0])
+
+    def best_guess(self, numbers):
+        """
+        Pick the solver's guess for the remaining candidates.
+
+        Args:
+            numbers: Set of possible numbers remaining
+
+        Returns:
+            int: The guess, or None if there are no candidates
+        """
+        mask = self.mask_of(numbers)
+        if mask not in self._memo:
+            if mask == 0:
+                return None
+            # Not on the precomputed tree: the median candidate
+            return self.min_num + _kth_bit(mask, _popcount(mask) // 2)
+        node = self._memo[mask]
+        while node is not None:
+            mask = node[1]
+            node = self._memo.get(mask)
+        if mask == 0:
+            return None
+        return self.min_num + mask.bit_length() - 1
+
+    def save(self, path=SOLVER_TABLE_FILE):
+        """
+        Save the tree as a compact binary table.
+
+        Nodes are written in breadth-first order as ``(predicate id, yes index,
+        no index)`` triples; leaves store ``(-1, number offset, 0)``. Candidate
+        signatures are not stored, they are recomputed from the predicates on load.
+        """
+        keys = []
+        key_ids = {}
+        order = [self.full_mask]
+        records = []
+        i = 0
+        while i < len(order):
+            node = self._memo.get(order[i])
+            i += 1
+            if node is None:
+                mask = order[i - 1]
+                records.append((-1, mask.bit_length() - 1, 0))
+                continue
+            key, yes, no = node
+            if key not in key_ids:
+                key_ids[key] = len(keys)
+                keys.append(key)
+            records.append((key_ids[key], len(order), len(order) + 1))
+            order.extend((yes, no))
+
+        keys_blob = json.dumps(keys, separators=(",", ":")).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.min_num, self.max_num, len(keys_blob)))
+            f.write(keys_blob)
+            f.write(struct.pack("<I", len(records)))
+            for record in records:
+                f.write(_NODE.pack(*record))
+
+    @classmethod
+    def load(cls, path=SOLVER_TABLE_FILE):
+        """
+        Load a table written by :meth:`save`.
+
+        Args:
+            path: Path of the table file
+
+        Returns:
+            DecisionTreeSolver: A solver ready for lookups
+
+        Raises:
+            ValueError: If the file is not a solver table
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, min_num, max_num, keys_len = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a solver table")
+        offset = _HEADER.size
+        keys = json.loads(data[offset:offset + keys_len].decode("utf-8"))
+        offset += keys_len
+        (count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        records = [_NODE.unpack_from(data, offset + i * _NODE.size) for i in range(count)]
+
+        fixed = [k for k in keys if not k.startswith("lt:")]
+        solver = cls(min_num, max_num, predicate_keys=fixed or DEFAULT_PREDICATE_KEYS)
+        masks = [0] * count
+        if count:
+            masks[0] = solver.full_mask
+        for i, (key_id, yes_idx, no_idx) in enumerate(records):
+            mask = masks[i]
+            if key_id < 0:
+                solver._memo[mask] = None
+                continue
+            key = keys[key_id]
+            yes = mask & solver._predicate_mask(key)
+            masks[yes_idx] = yes
+            masks[no_idx] = mask & ~yes
+            solver._memo[mask] = (key, yes, mask & ~yes)
+        return solver
+
+
+def load_solver(path=SOLVER_TABLE_FILE, min_num=MIN_NUMBER, max_num=MAX_NUMBER):
+    """
+    Load the solver table at ``path`` if it exists and covers the range.
+
+    Without a usable table the solver still works, computing each split when
+    it is asked for.
+    """
+    if path and os.path.exists(path):
+        try:
+            solver = DecisionTreeSolver.load(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Warning: Could not load solver table {path}: {e}")
+        else:
+            if (solver.min_num, solver.max_num) == (min_num, max_num):
+                return solver
+            print(f"Warning: Solver table {path} covers {solver.min_num}-{solver.max_num}, not {min_num}-{max_num}")
+    return DecisionTreeSolver(min_num, max_num)
+
+
+def _build_subtree(args):
+    """Process pool entry point: build one subtree and return its memo."""
+    min_num, max_num, predicate_keys, mask = args
+    solver = DecisionTreeSolver(min_num, max_num, predicate_keys)
+    solver._build_from(mask)
+    return solver._memo
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Precompute the optimal decision tree table.")
+    parser.add_argument("--min", type=int, default=MIN_NUMBER)
+    parser.add_argument("--max", type=int, default=MAX_NUMBER)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--out", default=SOLVER_TABLE_FILE)
+    cli_args = parser.parse_args()
+
+    built = DecisionTreeSolver(cli_args.min, cli_args.max).build(processes=cli_args.processes)
+    built.save(cli_args.out)
+    print(f"Wrote {len(built._memo)} nodes (depth {built.depth()}) to {cli_args.out}")
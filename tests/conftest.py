@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Tests run offline against the local stand-in for the OpenAI client.
+os.environ.setdefault("LLM_BACKEND", "local")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
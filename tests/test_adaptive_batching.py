@@ -0,0 +1,19 @@
+from adaptive_batching import AdaptiveBatchSizer
+
+
+def test_unanswerable_question_halves_the_size_once():
+    sizer = AdaptiveBatchSizer(initial=64, minimum=4, maximum=256, target_latency=10)
+    for _ in range(5):
+        sizer.record("m", 64, 0.1, 0, success=False, question="Is it a triangular number?")
+    assert sizer.get_stats()["m"]["batch_size"] == 32
+    # Other questions are unaffected by further failures of that one
+    sizer.record("m", 32, 0.1, 0, success=True, question="Is it even?")
+    assert sizer.get_stats()["m"]["batch_size"] == 40
+
+
+def test_question_halves_again_after_it_parses():
+    sizer = AdaptiveBatchSizer(initial=64, minimum=4, maximum=256, target_latency=10)
+    sizer.record("m", 64, 0.1, 0, success=False, question="q")
+    sizer.record("m", 8, 0.1, 0, success=True, question="q")
+    sizer.record("m", 32, 0.1, 0, success=False, question="q")
+    assert sizer.get_stats()["m"]["batch_size"] == 16
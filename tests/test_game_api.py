@@ -0,0 +1,56 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.app.main as main
+from backend.app.core import dependencies
+
+
+def clear_singletons():
+    for getter in (dependencies.get_scoring, dependencies.get_session_manager, dependencies.get_game_service,
+                   dependencies.get_llm_service):
+        getter.cache_clear()
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    # Scoring and game results are written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    clear_singletons()
+
+    def make(export_enabled):
+        monkeypatch.setattr(main, "GAME_EXPORT_ENABLED", export_enabled)
+        return TestClient(main.create_app())
+
+    yield make
+    clear_singletons()
+
+
+def test_export_is_disabled_by_default(make_client):
+    client = make_client(export_enabled=False)
+    game_id = client.post("/api/game/start").json()["game_id"]
+    client.post(f"/api/game/{game_id}/end")
+    assert client.get("/api/games/export").status_code == 404
+
+
+def test_secret_from_the_export_cannot_win_an_ended_game(make_client):
+    client = make_client(export_enabled=True)
+    game_id = client.post("/api/game/start").json()["game_id"]
+    assert client.post(f"/api/game/{game_id}/end").json()["game_over"] is True
+    records = [line for line in client.get("/api/games/export").iter_lines() if line]
+    assert len(records) == 1
+    secret = __import__("json").loads(records[0])["secret"]
+    response = client.post(f"/api/game/{game_id}/guess", json={"guess": secret})
+    assert response.status_code == 400
+    assert client.get(f"/api/game/{game_id}/status").json()["won"] is False
+
+
+def test_sessions_are_restored_at_startup_not_at_import(make_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(dependencies, "SESSION_JOURNAL_DIR", str(tmp_path / "journal"))
+    with make_client(export_enabled=False) as client:
+        game_id = client.post("/api/game/start").json()["game_id"]
+
+    clear_singletons()
+    app = main.create_app()
+    assert dependencies.get_llm_service.cache_info().currsize == 0
+    with TestClient(app) as client:
+        assert client.get(f"/api/game/{game_id}/status").status_code == 200
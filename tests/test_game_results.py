@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from game_results import TIME_SLACK_SECONDS, GameResultLog
+
+
+def write_log(path, times):
+    """Write one game per timestamp, in the given (finishing) order."""
+    with open(path, "w") as f:
+        for i, ts in enumerate(times):
+            record = {"ts": ts, "game_id": f"g{i}", "mode": 2, "won": True, "questions": 1, "guesses": 1,
+                      "secret": i, "qa_history": [["Is it even?", "Yes"]]}
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return GameResultLog(str(path))
+
+
+def game_ids(rows):
+    return [json.loads(line)["game_id"] for line, _ in rows]
+
+
+def test_paging_resumes_after_the_cursor(tmp_path):
+    log = write_log(tmp_path / "games.jsonl", [1000.0 + i for i in range(10)])
+    first = list(log.read(limit=4))
+    rest = list(log.read(cursor=first[-1][1]))
+    assert game_ids(first + rest) == [f"g{i}" for i in range(10)]
+
+
+def test_cursor_inside_a_line_starts_at_the_next_line(tmp_path):
+    log = write_log(tmp_path / "games.jsonl", [1000.0 + i for i in range(5)])
+    rows = list(log.read())
+    start_of_g2 = rows[1][1]
+    for cursor in (start_of_g2 + 1, start_of_g2 + 20, rows[2][1] - 1):
+        assert game_ids(log.read(cursor=cursor)) == ["g3", "g4"]
+    assert game_ids(log.read(cursor=rows[2][1])) == ["g3", "g4"]
+    assert list(log.read(cursor=log.size() + 100)) == []
+
+
+@pytest.mark.parametrize("since, until", [(1003.0, None), (None, 1006.0), (1002.5, 1007.0), (999.0, 1020.0)])
+def test_time_filters_include_games_logged_out_of_order_within_the_slack(tmp_path, since, until):
+    # Writers' clocks differ by less than the slack, so lines are only roughly in time order
+    skew = TIME_SLACK_SECONDS * 0.8
+    times = [1000.0, 1001.0, 1003.0 + skew, 1002.0, 1004.0, 1005.0, 1006.0 + skew, 1003.5, 1007.0, 1008.0]
+    log = write_log(tmp_path / "games.jsonl", times)
+    expected = [f"g{i}" for i, ts in enumerate(times)
+                if (since is None or ts >= since) and (until is None or ts < until)]
+    assert game_ids(log.read(since=since, until=until)) == expected
+
+
+def test_since_skips_lines_before_the_slack_window(tmp_path):
+    times = [1000.0 + i for i in range(200)]
+    log = write_log(tmp_path / "games.jsonl", times)
+    rows = list(log.read(since=1150.0, limit=1))
+    assert game_ids(rows) == ["g150"]
+    # Resuming from the returned cursor continues in order
+    assert game_ids(log.read(cursor=rows[0][1], since=1150.0, limit=2)) == ["g151", "g152"]
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from hedging import RequestHedger
+from llm_scheduler import FILTER, INTERACTIVE, LLMScheduler
+from llm_service import LLMService
+from local_llm import LocalChatClient
+
+
+def make_service(max_concurrency):
+    service = LLMService()
+    service.client = LocalChatClient(latency=0.01, slow_seconds=0.5, seed=1)
+    service.hedger = RequestHedger(enabled=True, max_rate=1.0, min_delay=0.05, min_samples=3)
+    service.scheduler = LLMScheduler(
+        max_concurrency, limits={INTERACTIVE: max_concurrency, FILTER: max_concurrency, "background": 1}
+    )
+    for number in range(3):
+        service.determine_answer_for_number(number, "Is it even?")
+    return service
+
+
+def ask_with_slow_primary(service, number):
+    """Ask a question whose first request is slow and whose hedge (if any) is fast."""
+    client = service.client
+    calls = client.calls
+    client.slow_rate = 1.0
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(answer=service.determine_answer_for_number(number, "Is it even?")))
+    thread.start()
+    while client.calls == calls:
+        time.sleep(0.001)
+    time.sleep(0.01)
+    client.slow_rate = 0.0
+    thread.join()
+    return result["answer"]
+
+
+def test_hedge_holds_its_own_slot_and_the_loser_keeps_its_slot_until_done():
+    service = make_service(max_concurrency=2)
+    started = time.monotonic()
+    assert ask_with_slow_primary(service, 10) == "Yes"
+    assert time.monotonic() - started < 0.4
+    assert service.hedger.get_stats()["hedge_wins"] == 1
+    # The slow primary is still running and still holds its slot
+    assert service.scheduler.get_stats()["in_flight"] == 1
+    time.sleep(0.6)
+    assert service.scheduler.get_stats()["in_flight"] == 0
+
+
+def test_no_hedge_without_a_free_slot():
+    service = make_service(max_concurrency=1)
+    started = time.monotonic()
+    assert ask_with_slow_primary(service, 11) == "No"
+    assert time.monotonic() - started >= 0.5
+    stats = service.hedger.get_stats()
+    assert stats["hedged"] == 0
+    assert stats["hedges_skipped_no_slot"] == 1
+    time.sleep(0.05)
+    assert service.scheduler.get_stats()["in_flight"] == 0
+
+
+def test_hedge_delay_is_tracked_per_kind_of_call():
+    hedger = RequestHedger(enabled=True, min_delay=0.0, min_samples=3)
+    for _ in range(3):
+        hedger.call(lambda: time.sleep(0.001), kind=INTERACTIVE)
+        hedger.call(lambda: time.sleep(0.05), kind=FILTER)
+    # Slow filter batches do not stretch the delay before an answer call is hedged
+    assert hedger.hedge_delay(INTERACTIVE) < 0.02
+    assert hedger.hedge_delay(FILTER) >= 0.05
+    assert set(hedger.get_stats()["hedge_delay"]) == {INTERACTIVE, FILTER}
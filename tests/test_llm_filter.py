@@ -0,0 +1,41 @@
+from llm_service import LLMService
+from local_llm import LocalChatClient
+
+from config import FILTER_RECOVERY_CALLS
+
+
+def make_service(**client_options):
+    service = LLMService()
+    service.client = LocalChatClient(seed=7, **client_options)
+    return service
+
+
+def test_filter_with_malformed_replies_never_eliminates_wrongly():
+    service = make_service(malformed_rate=0.3)
+    numbers = set(range(0, 501))
+    result = service.filter_numbers(numbers, "Is it even?", "Yes")
+    evens = {n for n in numbers if n % 2 == 0}
+    # Every even number survives; odd numbers survive only if they could not be resolved
+    assert evens <= result
+    assert len(result - evens) <= service.get_stats()["filter"]["unresolved_numbers"]
+
+
+def test_unresolvable_question_stops_at_the_recovery_budget():
+    service = make_service()
+    numbers = set(range(0, 501))
+    planned = len(service.batch_sizer.plan(service.router.model(service.router.tier_for("filter", "q")), 501))
+    result = service.filter_numbers(numbers, "Is it a triangular number?", "Yes")
+    # The stand-in cannot answer this question, so every reply is unusable
+    assert result == numbers
+    assert service.client.calls <= planned + FILTER_RECOVERY_CALLS
+    assert service.get_stats()["filter"]["unresolved_numbers"] == len(numbers)
+
+
+def test_async_filter_matches_the_threaded_filter():
+    import asyncio
+
+    service = make_service()
+    numbers = set(range(0, 201))
+    result = asyncio.run(service.filter_numbers_async(numbers, "Is it even?", "No"))
+    assert result == {n for n in numbers if n % 2 == 1}
+    assert service.filter_numbers(numbers, "Is it even?", "No") == result
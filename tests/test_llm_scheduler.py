@@ -0,0 +1,79 @@
+import threading
+import time
+
+from llm_scheduler import BACKGROUND, FILTER, INTERACTIVE, LLMScheduler, scheduling
+
+
+def make_scheduler(total=3, interactive=3, filter_limit=1, background=1):
+    return LLMScheduler(total, limits={INTERACTIVE: interactive, FILTER: filter_limit, BACKGROUND: background})
+
+
+def queue_call(scheduler, work_class, session, granted):
+    """Wait for a slot in a thread; the slot is recorded in ``granted`` and kept until released."""
+    def run():
+        with scheduling(session=session):
+            _, release = scheduler.acquire(work_class)
+        granted.append((work_class, session, release))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_queued(scheduler, work_class, count):
+    while scheduler.get_stats()["classes"][work_class]["waiting"] < count:
+        time.sleep(0.001)
+
+
+def test_interactive_waiter_is_granted_before_filter_and_background():
+    scheduler = make_scheduler(total=2)
+    _, filter_release = scheduler.acquire(FILTER)
+    _, background_release = scheduler.acquire(BACKGROUND)
+    # Both classes are at their limits and every slot is taken
+    granted = []
+    threads = [queue_call(scheduler, FILTER, "a", granted), queue_call(scheduler, BACKGROUND, "b", granted)]
+    wait_queued(scheduler, FILTER, 1)
+    wait_queued(scheduler, BACKGROUND, 1)
+    threads.append(queue_call(scheduler, INTERACTIVE, "c", granted))
+    wait_queued(scheduler, INTERACTIVE, 1)
+
+    background_release()
+    while not granted:
+        time.sleep(0.001)
+    assert [g[0] for g in granted] == [INTERACTIVE]
+    # Freed slots then go to the next class under its limit, by priority
+    filter_release()
+    while len(granted) < 2:
+        time.sleep(0.001)
+    granted[0][2]()
+    for thread in threads:
+        thread.join()
+    assert [g[0] for g in granted] == [INTERACTIVE, FILTER, BACKGROUND]
+
+
+def test_background_context_demotes_calls():
+    scheduler = make_scheduler()
+    with scheduling(BACKGROUND):
+        with scheduler.slot(INTERACTIVE) as work_class:
+            assert work_class == BACKGROUND
+
+
+def test_sessions_take_turns_within_a_class():
+    scheduler = make_scheduler(total=1, filter_limit=1)
+    _, release = scheduler.acquire(FILTER)
+    granted = []
+    threads = []
+    # Session "a" queues three calls before "b" and "c" queue one each
+    for session, count in (("a", 3), ("b", 1), ("c", 1)):
+        for _ in range(count):
+            queued = scheduler.get_stats()["classes"][FILTER]["waiting"]
+            threads.append(queue_call(scheduler, FILTER, session, granted))
+            wait_queued(scheduler, FILTER, queued + 1)
+    release()
+    for expected in range(1, 6):
+        while len(granted) < expected:
+            time.sleep(0.001)
+        granted[-1][2]()
+    for thread in threads:
+        thread.join()
+    assert [g[1] for g in granted] == ["a", "b", "c", "a", "a"]
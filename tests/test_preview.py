@@ -0,0 +1,43 @@
+from game_engine import GameEngine
+from llm_service import LLMService
+from local_llm import LocalChatClient
+
+
+def make_engine():
+    service = LLMService()
+    service.client = LocalChatClient(seed=7)
+    return GameEngine(0, 500, llm_service=service)
+
+
+def test_preview_counts_add_up_to_the_possible_numbers():
+    engine = make_engine()
+    calls_before = engine.llm_service.client.calls
+    preview = engine.preview("Is it even?")
+    assert preview == {"possible_count": 501, "yes_count": 251, "no_count": 250, "unresolved_count": 0}
+    filter_calls = engine.llm_service.client.calls - calls_before
+    # Asking the previewed question reuses the split
+    engine.record_qa("Is it even?", "No")
+    assert engine.llm_service.client.calls - calls_before == filter_calls
+    assert engine.get_possible_numbers() == set(range(1, 501, 2))
+
+
+def test_unresolved_numbers_are_reported_and_kept_for_either_answer():
+    engine = make_engine()
+    preview = engine.preview("Is it a triangular number?")
+    assert preview["unresolved_count"] == 501
+    assert preview["yes_count"] + preview["no_count"] + preview["unresolved_count"] == preview["possible_count"]
+    engine.record_qa("Is it a triangular number?", "Yes")
+    assert engine.get_possible_count() == 501
+
+
+def test_open_breaker_filters_recognized_questions_with_the_predicate_bitmap():
+    engine = make_engine()
+    service = engine.llm_service
+    with service.breaker._lock:
+        service.breaker._trip()
+    calls_before = service.client.calls
+    assert engine.preview("Is it less than 100?")["yes_count"] == 100
+    engine.record_qa("Is it divisible by 3?", "Yes")
+    assert engine.get_possible_numbers() == set(range(0, 501, 3))
+    assert service.client.calls == calls_before
+    assert service.get_stats()["breaker"]["local_filters"] == 2
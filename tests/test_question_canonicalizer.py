@@ -0,0 +1,97 @@
+import pytest
+
+from question_canonicalizer import QuestionIndex, canonicalize
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("Is it even?", "even"),
+        ("is the number divisible by 2", "even"),
+        ("Is it a multiple of five?", "divisible by 5"),
+        ("Is it less than two hundred and five?", "less than 205"),
+        ("Is it greater than forty two?", "greater than 42"),
+        ("Is it below one thousand and one?", "less than 1001"),
+        ("one thousand two hundred and thirty four", "1234"),
+        ("Is it at least 10?", "greater than 9"),
+    ],
+)
+def test_canonical_forms(question, expected):
+    assert canonicalize(question) == expected
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("Is it divisible by two and three?", "divisible by 2 and 3"),
+        ("Is it between one and five?", "between 1 and 5"),
+        ("two hundred and three hundred", "200 and 300"),
+        ("Is it between twenty and thirty?", "between 20 and 30"),
+        ("twenty twenty", "20 20"),
+    ],
+)
+def test_and_between_numerals_keeps_them_separate(question, expected):
+    assert canonicalize(question) == expected
+
+
+def test_separate_numerals_do_not_collide_with_their_sum():
+    assert canonicalize("Is it divisible by two and three?") != canonicalize("Is it divisible by five?")
+    assert canonicalize("Is it between one and five?") != canonicalize("Is it between six?")
+
+
+def test_index_does_not_merge_questions_with_different_numbers():
+    index = QuestionIndex(threshold=0.5)
+    index.add("Is it less than 200?")
+    assert index.lookup("Is it less than 300?") is None
+    assert index.lookup("Is it below two hundred?") == "less than 200"
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Is x > 200?", "Is x < 200?"),
+        ("Is x >= 100?", "Is x <= 100?"),
+        ("Is x >= 100?", "Is x > 100?"),
+        ("Is x == 5?", "Is x != 5?"),
+        ("Is x+1 prime?", "Is x-1 prime?"),
+        ("Is x*2 > 100?", "Is x/2 > 100?"),
+        ("Is x % 3 == 0?", "Is x / 3 == 0?"),
+        ("Is x**2 < 50?", "Is x*2 < 50?"),
+        ("Is x - 10 > 5?", "Is 10 - x > 5?"),
+        ("Is x > -5?", "Is x > 5?"),
+    ],
+)
+def test_operators_keep_questions_apart(first, second):
+    assert canonicalize(first) != canonicalize(second)
+    index = QuestionIndex(threshold=0.5)
+    index.add(first)
+    assert index.lookup(second) is None
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("Is x > 200?", "greater than 200"),
+        ("Is x < 200?", "less than 200"),
+        ("Is x >= 100?", "greater than 99"),
+        ("Is x <= 100?", "less than 101"),
+        ("Is it twenty-five?", "25"),
+    ],
+)
+def test_operator_symbols_match_their_spelled_out_forms(question, expected):
+    assert canonicalize(question) == expected
+
+
+def test_unhandled_symbols_keep_the_question_as_asked():
+    assert canonicalize("Is x & 1 set?") == "is x & 1 set?"
+    assert canonicalize("Is x | 1 set?") != canonicalize("Is x & 1 set?")
+
+
+def test_cached_answer_is_not_reused_for_the_opposite_comparison():
+    from llm_service import LLMService
+    from local_llm import LocalChatClient
+
+    service = LLMService()
+    service.client = LocalChatClient(seed=1)
+    assert service.determine_answer_for_number(300, "Is x < 200?") == "No"
+    assert service.determine_answer_for_number(300, "Is x > 200?") == "Yes"
@@ -0,0 +1,14 @@
+import pytest
+
+from range_codec import decode_numbers, encode_numbers
+
+
+def test_round_trip():
+    numbers = list(range(0, 49, 2)) + list(range(100, 150)) + [7, 301]
+    assert sorted(decode_numbers(encode_numbers(numbers))) == sorted(numbers)
+
+
+@pytest.mark.parametrize("text", ["0-10000000000", "5-10000000000/3", "-1", "0-20, 501"])
+def test_runs_outside_the_bounds_are_rejected_before_expanding(text):
+    with pytest.raises(ValueError):
+        decode_numbers(text, 0, 500)
@@ -0,0 +1,12 @@
+import random
+
+from range_manager import _mask_to_numbers, _numbers_to_mask
+
+
+def test_mask_round_trip():
+    rng = random.Random(3)
+    for offset, size in ((0, 501), (-20, 64), (1000, 5000)):
+        numbers = {offset + i for i in range(size) if rng.random() < 0.4}
+        mask = _numbers_to_mask(numbers, offset, offset + size - 1)
+        assert _mask_to_numbers(mask, offset) == numbers
+    assert _mask_to_numbers(0, 5) == set()
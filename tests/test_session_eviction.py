@@ -0,0 +1,24 @@
+import threading
+
+from backend.app.services.game_service import GameService
+from backend.app.services.session_manager import SessionManager
+from llm_service import LLMService
+from question_prefetch import Prefetcher
+
+
+def test_evicted_game_stops_its_prefetch_round():
+    prefetcher = Prefetcher(workers=1)
+    sessions = SessionManager(max_sessions=1)
+    service = GameService(sessions, LLMService(), prefetcher=prefetcher)
+    release = threading.Event()
+    first = service.start_game()
+    prefetcher.schedule(first.game_id, ["Is it even?", "Is it prime?"], lambda question, deadline: release.wait(5))
+    assert prefetcher.get_stats()["active_games"] == 1
+
+    # The second game pushes the first one out of the session cap
+    service.start_game()
+    assert sessions.get_session(first.game_id) is None
+    stats = prefetcher.get_stats()
+    assert stats["active_games"] == 0
+    assert stats["cancelled"] >= 1
+    release.set()
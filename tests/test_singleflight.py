@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded, LatestDeadline
+from llm_scheduler import BACKGROUND, FILTER, LLMScheduler, scheduling
+from singleflight import SingleFlight
+
+
+def start_leader(flight, key, fn, deadline, work_class=None):
+    results = {}
+
+    def run():
+        with scheduling(work_class):
+            try:
+                results["value"] = flight.do(key, fn, deadline)
+            except Exception as e:
+                results["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, results
+
+
+def slow_work(started, release):
+    def work(shared):
+        started.set()
+        while not release.is_set():
+            shared.check("step")
+            time.sleep(0.01)
+        return 42
+    return work
+
+
+def test_cancelled_leader_does_not_fail_a_joined_request():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    prefetch_deadline = Deadline(10)
+    thread, leader = start_leader(flight, "k", slow_work(started, release), prefetch_deadline)
+    started.wait()
+    follower = {}
+    joined = threading.Thread(target=lambda: follower.update(value=flight.do("k", None, Deadline(10))))
+    joined.start()
+    while flight.get_stats()["coalesced"] == 0:
+        time.sleep(0.005)
+    # The prefetch round ends while the real request is waiting on the same work
+    prefetch_deadline.cancel()
+    time.sleep(0.05)
+    release.set()
+    thread.join()
+    joined.join()
+    assert follower["value"] == 42
+    assert leader["value"] == 42
+
+
+def test_work_runs_until_the_latest_deadline():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    thread, leader = start_leader(flight, "k", slow_work(started, release), Deadline(0.1))
+    started.wait()
+    result = {}
+    joined = threading.Thread(target=lambda: result.update(value=flight.do("k", None, Deadline(10))))
+    joined.start()
+    # The leader stops waiting at its own deadline while the work carries on for the follower
+    thread.join(timeout=1)
+    assert not thread.is_alive()
+    assert isinstance(leader["error"], DeadlineExceeded)
+    time.sleep(0.1)
+    release.set()
+    joined.join()
+    assert result["value"] == 42
+
+
+def test_follower_stops_waiting_at_its_own_deadline():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    thread, leader = start_leader(flight, "k", slow_work(started, release), None)
+    started.wait()
+    with pytest.raises(DeadlineExceeded):
+        flight.do("k", None, Deadline(0.05))
+    release.set()
+    thread.join()
+    assert leader["value"] == 42
+
+
+def test_shared_work_runs_in_the_highest_participant_class():
+    flight = SingleFlight()
+    scheduler = LLMScheduler()
+    joined, observed = threading.Event(), []
+
+    def work(shared):
+        observed.append(scheduler.effective_class(FILTER))
+        joined.wait()
+        observed.append(scheduler.effective_class(FILTER))
+        return 1
+
+    thread, _ = start_leader(flight, "k", work, None, work_class=BACKGROUND)
+    while not observed:
+        time.sleep(0.005)
+    follower = threading.Thread(target=lambda: flight.do("k", None))
+    follower.start()
+    while flight.get_stats()["coalesced"] == 0:
+        time.sleep(0.005)
+    joined.set()
+    thread.join()
+    follower.join()
+    # A prefetch runs in the background class until a real request joins it
+    assert observed == [BACKGROUND, FILTER]
+
+
+def test_cancelling_shared_work_leaves_the_callers_deadlines_alone():
+    first, second = Deadline(10), Deadline(10)
+    shared = LatestDeadline(first)
+    shared.add(second)
+    shared.cancel()
+    assert shared.expired()
+    assert not first.expired() and not second.expired()
+
+
+def test_async_caller_shares_work_with_a_threaded_caller():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    thread, leader = start_leader(flight, "k", slow_work(started, release), Deadline(10))
+    started.wait()
+
+    async def join():
+        waiting = asyncio.ensure_future(flight.do_async("k", None, Deadline(10)))
+        await asyncio.sleep(0.05)
+        # The event loop is free while the shared work runs
+        assert not waiting.done()
+        release.set()
+        return await waiting
+
+    assert asyncio.run(join()) == 42
+    thread.join()
+    assert leader["value"] == 42
+    assert flight.get_stats()["executions"] == 1
+
+
+def test_async_caller_stops_waiting_at_its_own_deadline():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    async def run():
+        with pytest.raises(DeadlineExceeded):
+            await flight.do_async("k", slow_work(started, release), Deadline(0.05))
+
+    asyncio.run(run())
+    release.set()
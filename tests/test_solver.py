@@ -0,0 +1,61 @@
+from game_engine import GameEngine
+import solver as solver_module
+from solver import DecisionTreeSolver, load_solver
+
+
+def test_hint_for_any_candidate_set_halves_it_at_worst():
+    solver = DecisionTreeSolver(0, 500)
+    engine = GameEngine(0, 500, solver=solver)
+    # Candidates the precomputed tree never reaches, e.g. after "Is it less than 300?" / "Yes"
+    engine.range_manager.possible_numbers = set(range(0, 300))
+    question = engine.next_optimal_question()
+    assert question
+    predicate = solver.next_question(set(range(0, 300)))
+    yes = sum(1 for n in range(0, 300) if predicate.test(n))
+    assert 0 < yes < 300 and max(yes, 300 - yes) <= 256
+
+
+def test_no_hint_once_one_number_is_left():
+    engine = GameEngine(0, 500, solver=DecisionTreeSolver(0, 500))
+    engine.range_manager.possible_numbers = {42}
+    assert engine.next_optimal_question() is None
+
+
+def test_load_solver_without_a_table(tmp_path):
+    solver = load_solver(str(tmp_path / "missing.bin"), 0, 500)
+    assert solver.next_question(set(range(0, 501))) is not None
+
+
+def test_saved_table_loads_the_same_tree(tmp_path):
+    path = str(tmp_path / "solver.bin")
+    built = DecisionTreeSolver(0, 500).build(processes=1)
+    built.save(path)
+    loaded = DecisionTreeSolver.load(path)
+    assert (loaded.min_num, loaded.max_num) == (0, 500)
+    assert loaded._memo == built._memo
+    assert loaded.depth() == built.depth() == 9
+    assert load_solver(path, 0, 500)._memo == built._memo
+
+
+def test_large_range_is_built_with_a_process_pool(monkeypatch):
+    pools = []
+
+    class RecordingPool(solver_module.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(solver_module, "ProcessPoolExecutor", RecordingPool)
+    max_num = solver_module.PARALLEL_MIN_SIZE - 1
+    parallel = DecisionTreeSolver(0, max_num).build(processes=2)
+    assert len(pools) == 1
+    assert parallel._memo == DecisionTreeSolver(0, max_num).build(processes=1)._memo
+    assert parallel.depth() == (max_num + 1).bit_length() - 1
+
+
+def test_best_guess_off_the_tree_is_a_remaining_candidate():
+    solver = DecisionTreeSolver(0, 500).build(processes=1)
+    assert solver.best_guess({3, 17, 250, 499}) == 250
+    engine = GameEngine(0, 500, solver=solver)
+    engine.range_manager.possible_numbers = {3, 17, 250, 499}
+    assert engine.make_final_guess() == 250
@@ -0,0 +1,26 @@
+import json
+
+from llm_service import LLMService
+from local_llm import LocalChatClient
+from truth_table import build_truth_table, load_truth_table
+
+
+def test_build_skips_questions_with_unresolved_numbers(tmp_path):
+    history = tmp_path / "history.json"
+    history.write_text(json.dumps([
+        {"qa_history": [["Is it even?", "Yes"], ["Is it a triangular number?", "No"]]},
+    ]))
+    out = tmp_path / "truth_table.bin"
+    service = LLMService()
+    service.truth_table = None
+    # The stand-in cannot answer the triangular question, so every reply for it is unusable
+    service.client = LocalChatClient(seed=3)
+
+    assert build_truth_table([str(history)], str(out), llm_service=service, min_num=1, max_num=60) == 1
+    table = load_truth_table(str(out))
+    try:
+        numbers = set(range(1, 61))
+        assert table.filter_numbers(numbers, "Is it even?", "Yes") == {n for n in numbers if n % 2 == 0}
+        assert table.filter_numbers(numbers, "Is it a triangular number?", "Yes") is None
+    finally:
+        table.close()
@@ -0,0 +1,182 @@
+"""Lightweight in-process request tracing.
+
+A trace is a tree of timed spans. The API route opens the root span and each
+layer below it (GameService, every LLM call, RangeManager.apply_filter, the
+stats write) opens a child with :func:`span`. The current span travels in a
+context variable, so nesting needs no plumbing through call signatures, and
+finished traces are kept in a bounded ring buffer for the debug endpoint.
+"""
+
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import TRACE_BUFFER_SIZE, TRACING_ENABLED
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_ids = itertools.count(1)
+
+
+class _Trace:
+    __slots__ = ("trace_id", "started_at", "started", "spans")
+
+    def __init__(self):
+        self.trace_id = next(_ids)
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.spans = []
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "started", "duration", "attrs", "error")
+
+    def __init__(self, trace, parent_id, name, attrs):
+        self.trace = trace
+        self.span_id = next(_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration = None
+        self.attrs = attrs
+        self.error = None
+
+    def set(self, **attrs):
+        """Attach attributes (counts, sources, model names, ...) to the span."""
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        """Return the span as JSON-ready data, with times in ms relative to the trace start."""
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ms": round((self.started - self.trace.started) * 1000, 3),
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Records spans and keeps the most recent finished traces."""
+
+    def __init__(self, capacity=TRACE_BUFFER_SIZE, enabled=TRACING_ENABLED):
+        """
+        Initialize the tracer.
+
+        Args:
+            capacity: Number of finished traces kept (oldest are dropped first)
+            enabled: Record spans; when False, :meth:`span` costs almost nothing
+        """
+        self.enabled = enabled
+        self._traces = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._finished = 0
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time the enclosed block as a child of the current span (or as a new trace).
+
+        Args:
+            name: Operation name
+            **attrs: Initial attributes
+
+        Yields:
+            Span: The open span, for adding attributes
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        parent = _current_span.get()
+        trace = _Trace() if parent is None else parent.trace
+        current = Span(trace, None if parent is None else parent.span_id, name, attrs)
+        trace.spans.append(current)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.duration = time.perf_counter() - current.started
+            _current_span.reset(token)
+            if parent is None:
+                with self._lock:
+                    self._traces.append(trace)
+                    self._finished += 1
+
+    def traces(self, limit=None, min_duration=0.0, name=None):
+        """
+        Return finished traces, newest first.
+
+        Args:
+            limit: Maximum number of traces
+            min_duration: Only traces whose root took at least this long, in seconds
+            name: Only traces whose root span has this name
+
+        Returns:
+            list: Traces as JSON-ready dicts with a flat, start-ordered span list
+        """
+        with self._lock:
+            traces = list(self._traces)
+        result = []
+        for trace in reversed(traces):
+            root = trace.spans[0]
+            if root.duration < min_duration or (name is not None and root.name != name):
+                continue
+            result.append({
+                "trace_id": trace.trace_id,
+                "name": root.name,
+                "started_at": trace.started_at,
+                "duration_ms": round(root.duration * 1000, 3),
+                "error": root.error,
+                "spans": [s.to_dict() for s in list(trace.spans)],
+            })
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+    def clear(self):
+        """Drop all buffered traces."""
+        with self._lock:
+            self._traces.clear()
+
+    def get_stats(self):
+        """Return whether tracing is on and how many traces were recorded and kept."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "finished_traces": self._finished,
+                "buffered_traces": len(self._traces),
+                "capacity": self._traces.maxlen,
+            }
+
+
+# Process-wide tracer used by :func:`span`
+tracer = Tracer()
+
+
+def current_span():
+    """Return the innermost open span (a no-op stand-in outside any span or when disabled)."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def span(name, **attrs):
+    """Open a span on the process-wide tracer (see :meth:`Tracer.span`)."""
+    return tracer.span(name, **attrs)
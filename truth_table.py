@@ -0,0 +1,250 @@
+"""Memory-mapped truth tables of resolved questions shared by all worker processes.
+
+A truth table file stores, for every known question, a packed bitset over the
+number range whose bit ``i`` is set when the answer for ``MIN + i`` is "Yes".
+The file is built offline from historical ``qa_history`` logs and mapped
+read-only by every process, so lookups hit shared OS pages and need no
+per-worker warm-up.
+
+File layout (little-endian)::
+
+    header   magic "MGTT", version, min, max, entry count, bytes per bitset
+    index    entry count x uint64 question hashes, sorted
+    bitsets  entry count x bytes-per-bitset, in index order
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from config import MIN_NUMBER, MAX_NUMBER, TRUTH_TABLE_FILE
+from question_canonicalizer import canonicalize
+
+_MAGIC = b"MGTT"
+_VERSION = 2
+_HEADER = struct.Struct("<4sHqqII")
+
+
+def question_hash(question):
+    """Return the 64-bit hash of a question's canonical form."""
+    digest = hashlib.blake2b(canonicalize(question).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class TruthTableStore:
+    """Read-only view over a memory-mapped truth table file."""
+
+    def __init__(self, path=TRUTH_TABLE_FILE):
+        """
+        Map a truth table file.
+
+        Args:
+            path: Path of the file written by :func:`write_truth_table`
+
+        Raises:
+            ValueError: If the file is not a truth table
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.min_num, self.max_num, self.count, self.bitset_bytes = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a truth table")
+        view = memoryview(self._mmap)
+        index_end = _HEADER.size + self.count * 8
+        self._hashes = view[_HEADER.size:index_end].cast("Q")
+        self._bitsets = view[index_end:index_end + self.count * self.bitset_bytes]
+
+    def __len__(self):
+        return self.count
+
+    def _bitset(self, question):
+        key = question_hash(question)
+        i = bisect.bisect_left(self._hashes, key)
+        if i == self.count or self._hashes[i] != key:
+            return None
+        start = i * self.bitset_bytes
+        return self._bitsets[start:start + self.bitset_bytes]
+
+    def __contains__(self, question):
+        return self._bitset(question) is not None
+
+    def answer(self, question, number):
+        """
+        Look up the answer for one number.
+
+        Returns:
+            str: "Yes" or "No", or None if the question or number is not covered
+        """
+        if not (self.min_num <= number <= self.max_num):
+            return None
+        bitset = self._bitset(question)
+        if bitset is None:
+            return None
+        offset = number - self.min_num
+        return "Yes" if bitset[offset >> 3] & (1 << (offset & 7)) else "No"
+
+    def yes_mask(self, question):
+        """
+        Get the bitmask of numbers answering "Yes" (bit ``i`` is ``min_num + i``).
+
+        Returns:
+            int: The bitmask, or None if the question is not in the table
+        """
+        bitset = self._bitset(question)
+        if bitset is None:
+            return None
+        return int.from_bytes(bitset, "little")
+
+    def filter_numbers(self, numbers, question, answer):
+        """
+        Filter numbers using the table, mirroring ``LLMService.filter_numbers``.
+
+        Returns:
+            set: Matching numbers, or None if the question or any number is not covered
+        """
+        mask = self.yes_mask(question)
+        if mask is None:
+            return None
+        want_yes = answer == "Yes"
+        result = set()
+        for n in numbers:
+            if not (self.min_num <= n <= self.max_num):
+                return None
+            if bool(mask >> (n - self.min_num) & 1) == want_yes:
+                result.add(n)
+        return result
+
+    def close(self):
+        """Release the mapping."""
+        self._hashes.release()
+        self._bitsets.release()
+        self._mmap.close()
+
+
+def load_truth_table(path=TRUTH_TABLE_FILE):
+    """Map the truth table at ``path`` if it exists, otherwise return None."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return TruthTableStore(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Warning: Could not load truth table {path}: {e}")
+        return None
+
+
+def write_truth_table(path, yes_sets, min_num=MIN_NUMBER, max_num=MAX_NUMBER):
+    """
+    Write a truth table file.
+
+    The file is written next to ``path`` and moved into place atomically, so
+    processes that still map the previous version are unaffected.
+
+    Args:
+        path: Destination path
+        yes_sets: Dict mapping question -> set of numbers answering "Yes"
+        min_num: Minimum number in range
+        max_num: Maximum number in range
+    """
+    bitset_bytes = (max_num - min_num + 1 + 7) // 8
+    entries = {}
+    for question, yes in yes_sets.items():
+        mask = 0
+        for n in yes:
+            if min_num <= n <= max_num:
+                mask |= 1 << (n - min_num)
+        entries[question_hash(question)] = mask.to_bytes(bitset_bytes, "little")
+
+    keys = sorted(entries)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, min_num, max_num, len(keys), bitset_bytes))
+        f.write(struct.pack(f"<{len(keys)}Q", *keys))
+        for key in keys:
+            f.write(entries[key])
+    os.replace(tmp_path, path)
+
+
+def collect_questions(history_paths):
+    """
+    Collect distinct questions from historical ``qa_history`` logs.
+
+    Each file is either JSON or JSON Lines; every object with a ``qa_history``
+    list of ``[question, answer]`` pairs contributes its questions.
+
+    Returns:
+        list: Questions in first-seen order, deduplicated by canonical form
+    """
+    seen = {}
+
+    def visit(record):
+        if isinstance(record, list):
+            for item in record:
+                visit(item)
+        elif isinstance(record, dict):
+            for entry in record.get("qa_history") or []:
+                question = entry[0] if isinstance(entry, (list, tuple)) else entry
+                if isinstance(question, str) and question.strip():
+                    seen.setdefault(canonicalize(question), question.strip())
+
+    for path in history_paths:
+        with open(path, "r") as f:
+            text = f.read()
+        try:
+            visit(json.loads(text))
+        except json.JSONDecodeError:
+            for line in text.splitlines():
+                if line.strip():
+                    visit(json.loads(line))
+    return list(seen.values())
+
+
+def build_truth_table(history_paths, out_path=TRUTH_TABLE_FILE, llm_service=None,
+                      min_num=MIN_NUMBER, max_num=MAX_NUMBER):
+    """
+    Resolve every historical question once and write the truth table file.
+
+    Args:
+        history_paths: Paths of JSON/JSONL files containing ``qa_history`` logs
+        out_path: Destination truth table path
+        llm_service: LLMService used to resolve questions
+        min_num: Minimum number in range
+        max_num: Maximum number in range
+
+    Returns:
+        int: Number of questions written; questions with any number left
+        unresolved are skipped rather than stored with a guessed answer
+    """
+    numbers = set(range(min_num, max_num + 1))
+    yes_sets = {}
+    for question in collect_questions(history_paths):
+        try:
+            yes, no = llm_service.split_numbers(numbers, question)
+        except Exception as e:
+            print(f"Warning: Could not resolve {question!r}: {e}")
+            continue
+        unresolved = len(numbers) - len(yes) - len(no)
+        if unresolved:
+            print(f"Warning: Skipping {question!r}: {unresolved} numbers unresolved")
+            continue
+        yes_sets[question] = yes
+    write_truth_table(out_path, yes_sets, min_num, max_num)
+    return len(yes_sets)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from llm_service import LLMService
+
+    parser = argparse.ArgumentParser(description="Build the shared truth table from qa_history logs.")
+    parser.add_argument("history", nargs="+", help="JSON/JSONL files with qa_history entries")
+    parser.add_argument("--out", default=TRUTH_TABLE_FILE)
+    cli_args = parser.parse_args()
+
+    written = build_truth_table(cli_args.history, cli_args.out, llm_service=LLMService())
+    print(f"Wrote {written} questions to {cli_args.out}")
@@ -0,0 +1,191 @@
+"""Vectorized evaluation of arithmetic predicates over large number ranges.
+
+Predicates (see predicates.py) are evaluated with NumPy on fixed-size chunks
+of the range, so memory stays bounded by the chunk size plus the packed
+result (one bit per number). Very large ranges are split across a process
+pool. Results are packed bitmaps in the same layout ``RangeManager`` and the
+solver use: bit ``i`` is set when ``min_num + i`` answers "Yes", so a result
+can be ANDed into a candidate mask directly.
+
+NumPy is optional; without it :func:`evaluate_mask` falls back to evaluating
+one number at a time.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from config import VECTOR_CHUNK_SIZE, VECTOR_PARALLEL_MIN_SIZE
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+def available():
+    """Return True if NumPy is installed and vectorized evaluation is possible."""
+    return np is not None
+
+
+def _digit_sum(values):
+    total = np.zeros_like(values)
+    rest = np.abs(values)
+    while rest.any():
+        total += rest % 10
+        rest //= 10
+    return total
+
+
+def _reversed_digits(values):
+    reverse = np.zeros_like(values)
+    digits = np.zeros_like(values)
+    rest = np.abs(values)
+    rounds = 0
+    while rest.any():
+        reverse = reverse * 10 + rest % 10
+        digits += rest > 0
+        rest //= 10
+        rounds += 1
+    # Shorter numbers picked up trailing zeros for the rounds after their last digit
+    return reverse // np.power(10, rounds - digits)
+
+
+def _is_square(values):
+    root = np.floor(np.sqrt(np.maximum(values, 0))).astype(np.int64)
+    # Correct float rounding at the edges
+    root -= root * root > values
+    root += (root + 1) * (root + 1) <= values
+    return (values >= 0) & (root * root == values)
+
+
+def _is_cube(values):
+    magnitude = np.abs(values)
+    root = np.rint(np.cbrt(magnitude)).astype(np.int64)
+    result = np.zeros(values.shape, dtype=bool)
+    for d in (-1, 0, 1):
+        candidate = root + d
+        result |= candidate * candidate * candidate == magnitude
+    return result
+
+
+def _small_primes(limit):
+    """Return the primes <= limit (simple sieve)."""
+    if limit < 2:
+        return np.zeros(0, dtype=np.int64)
+    sieve = np.ones(limit + 1, dtype=bool)
+    sieve[:2] = False
+    for p in range(2, math.isqrt(limit) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = False
+    return np.flatnonzero(sieve)
+
+
+def _is_prime(start, stop):
+    """Segmented sieve of Eratosthenes over [start, stop)."""
+    result = np.ones(stop - start, dtype=bool)
+    if stop <= 2:
+        result[:] = False
+        return result
+    for p in _small_primes(math.isqrt(stop - 1)).tolist():
+        first = max(p * p, -(-start // p) * p)
+        if first < stop:
+            result[first - start::p] = False
+    # 0, 1 and negative numbers are not prime
+    result[:max(0, min(stop, 2) - start)] = False
+    return result
+
+
+def evaluate_chunk(key, start, stop):
+    """
+    Evaluate a predicate for every number in [start, stop).
+
+    Args:
+        key: Predicate key (see predicates.predicate_from_key)
+        start: First number
+        stop: One past the last number
+
+    Returns:
+        numpy.ndarray: Boolean array, True where the answer is "Yes"
+
+    Raises:
+        ValueError: If the key is not recognized
+    """
+    name, _, arg = key.partition(":")
+    if name == "not":
+        return ~evaluate_chunk(arg, start, stop)
+    if name == "prime":
+        return _is_prime(start, stop)
+    values = np.arange(start, stop, dtype=np.int64)
+    if name == "lt":
+        return values < int(arg)
+    if name == "mod":
+        return values % int(arg) == 0
+    if name == "digitsum_mod":
+        return _digit_sum(values) % int(arg) == 0
+    if name == "last_digit":
+        return np.abs(values) % 10 == int(arg)
+    if name == "square":
+        return _is_square(values)
+    if name == "cube":
+        return _is_cube(values)
+    if name == "palindrome":
+        return _reversed_digits(values) == np.abs(values)
+    raise ValueError(f"Unknown predicate key: {key}")
+
+
+def _packed_chunk(args):
+    key, start, stop = args
+    return np.packbits(evaluate_chunk(key, start, stop), bitorder="little").tobytes()
+
+
+def _chunks(key, min_num, max_num, chunk_size):
+    # Chunk sizes are multiples of 8 so packed chunks concatenate bit-exactly
+    chunk_size = max(8, chunk_size - chunk_size % 8)
+    for start in range(min_num, max_num + 1, chunk_size):
+        yield key, start, min(start + chunk_size, max_num + 1)
+
+
+def iter_packed(key, min_num, max_num, chunk_size=VECTOR_CHUNK_SIZE):
+    """
+    Stream the packed bitmap of a predicate chunk by chunk.
+
+    Yields:
+        tuple: (first number of the chunk, little-endian packed bytes)
+    """
+    for args in _chunks(key, min_num, max_num, chunk_size):
+        yield args[1], _packed_chunk(args)
+
+
+def evaluate_mask(key, min_num, max_num, chunk_size=VECTOR_CHUNK_SIZE, processes=None):
+    """
+    Evaluate a predicate over a range as a bitmask.
+
+    Args:
+        key: Predicate key (see predicates.predicate_from_key)
+        min_num: Minimum number in range
+        max_num: Maximum number in range
+        chunk_size: Numbers evaluated per chunk
+        processes: Worker processes for ranges of at least VECTOR_PARALLEL_MIN_SIZE
+            numbers (None = one per CPU, 1 = no pool)
+
+    Returns:
+        int: Bitmask with bit ``i`` set when ``min_num + i`` answers "Yes"
+    """
+    if np is None:
+        from predicates import predicate_from_key
+
+        return predicate_from_key(key).mask(min_num, max_num)
+    if max_num < min_num:
+        return 0
+    processes = processes or os.cpu_count() or 1
+    chunks = _chunks(key, min_num, max_num, chunk_size)
+    packed = bytearray()
+    if processes > 1 and max_num - min_num + 1 >= VECTOR_PARALLEL_MIN_SIZE:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for data in pool.map(_packed_chunk, chunks):
+                packed += data
+    else:
+        for args in chunks:
+            packed += _packed_chunk(args)
+    return int.from_bytes(packed, "little")